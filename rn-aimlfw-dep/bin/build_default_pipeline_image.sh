@@ -16,9 +16,13 @@
 #
 # ==================================================================================
 
+# The QoE sample pipelines pin this tag, bump it when qoe_utils.py changes
+PIPELINE_IMAGE_TAG=qoe-utils-1
+
 sudo buildctl --addr=nerdctl-container://buildkitd build \
     --frontend dockerfile.v0 \
     --opt filename=Dockerfile.pipeline \
     --local dockerfile=tools/kubeflow \
     --local context=tools/kubeflow \
-    --output type=oci,name=traininghost/pipelineimage:latest | sudo nerdctl load --namespace k8s.io
\ No newline at end of file
+    --output type=oci,name=traininghost/pipelineimage:$PIPELINE_IMAGE_TAG | sudo nerdctl load --namespace k8s.io
+sudo nerdctl --namespace k8s.io tag traininghost/pipelineimage:$PIPELINE_IMAGE_TAG traininghost/pipelineimage:latest
\ No newline at end of file
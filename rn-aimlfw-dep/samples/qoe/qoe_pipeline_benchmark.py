@@ -0,0 +1,156 @@
+# ==================================================================================
+#
+#       Copyright (c) 2025 Samsung Electronics Co., Ltd. All Rights Reserved.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#          http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ==================================================================================
+
+# Training throughput benchmark for the QoE LSTM.
+#
+# Trains the model of qoe_pipeline.py for a fixed number of steps with the same training
+# config parameters (batchsize, intraopthreads, interopthreads, xla, onednn,
+# mixedprecision, prefetch, cache) and reports the training samples/sec as a pipeline
+# metric, nothing is uploaded. Run it once per setting on a node type to pick the values
+# to train with there. Without a featurepath it trains on a random series, so no
+# training job is needed.
+#
+# QOE_BENCHMARK_NODE_SELECTOR=<label>=<value>, read when the pipeline is compiled, pins
+# the benchmark to the nodes with that label.
+
+import os
+
+import kfp
+import kfp.dsl as dsl
+from kfp.dsl import Metrics, Output
+from kfp.dsl import component as component
+from kfp import kubernetes
+
+# Built by bin/build_default_pipeline_image.sh, the first tag with the qoe_utils helpers
+BASE_IMAGE = "traininghost/pipelineimage:qoe-utils-1"
+NODE_SELECTOR = os.getenv("QOE_BENCHMARK_NODE_SELECTOR", "")
+
+@component(base_image=BASE_IMAGE)
+def benchmark_training(featurepath: str, steps: str, warmupsteps: str,
+                       batchsize: str, intraopthreads: str, interopthreads: str, xla: str, onednn: str,
+                       mixedprecision: str, prefetch: str, cache: str, metrics: Output[Metrics]):
+
+    import os
+    # oneDNN is chosen when TensorFlow is imported; "" keeps TensorFlow's default
+    if onednn:
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if onednn == "true" else "0"
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.layers import LSTM
+    import numpy as np
+    from qoe_utils import to_float32, split_series, window_batches, enable_mixed_bfloat16
+    import time
+
+    # The samples/sec are timed over the steps after the warm-up ones, so there must be one
+    batch_size, n_steps, warmup = int(batchsize), int(steps), max(int(warmupsteps), 1)
+    if n_steps < 1 or batch_size < 1:
+        raise ValueError(f"steps and batchsize must be at least 1, got steps={steps} batchsize={batchsize}")
+
+    # Thread pools are sized before TensorFlow runs its first op, 0 keeps its default
+    tf.config.threading.set_intra_op_parallelism_threads(int(intraopthreads))
+    tf.config.threading.set_inter_op_parallelism_threads(int(interopthreads))
+    if mixedprecision == "true":
+        enable_mixed_bfloat16()
+
+    columns = ['pdcpBytesDl', 'pdcpBytesUl']
+    if featurepath:
+        from featurestoresdk.feature_store_sdk import FeatureStoreSdk
+        print("featurepath is: ", featurepath)
+        features = FeatureStoreSdk().get_features(featurepath, columns)
+        series = to_float32(features, columns)
+        del features
+    else:
+        series = np.random.default_rng(0).uniform(0, 100, (100000, len(columns))).astype(np.float32)
+    print(f"Feature buffer: {series.shape} {series.dtype}")
+
+    X, y = split_series(series, 10, 1)
+    y = y.reshape((y.shape[0], y.shape[2]))
+
+    model = Sequential()
+    model.add(LSTM(units = 150, activation="tanh" ,return_sequences = True, input_shape = (X.shape[1], X.shape[2])))
+    model.add(LSTM(units = 150, return_sequences = True,activation="tanh"))
+    model.add(LSTM(units = 150,return_sequences = False,activation="tanh" ))
+    model.add((Dense(units = X.shape[2], dtype="float32")))
+    model.compile(loss='mse', optimizer='adam',metrics=['mse'], jit_compile=xla == "true")
+
+    class StepTimer(tf.keras.callbacks.Callback):
+        # Times the steps after the warm-up ones, which pay for tracing and compilation
+        def __init__(self, warmup):
+            super().__init__()
+            self.warmup = warmup
+            self.start = None
+            self.steps = 0
+
+        def on_train_batch_end(self, batch, logs=None):
+            if batch + 1 == self.warmup:
+                self.start = time.perf_counter()
+            elif batch + 1 > self.warmup:
+                self.steps += 1
+
+    timer = StepTimer(warmup)
+    # One epoch of warmup + steps batches, repeating the windows if there are fewer
+    dataset = window_batches(X, y, batch_size, shuffle=True, cache=cache == "true", prefetch=prefetch)
+    dataset = dataset.repeat().take(warmup + n_steps)
+    model.fit(dataset, epochs=1, callbacks=[timer], verbose=0)
+    duration = time.perf_counter() - timer.start
+
+    samples_per_second = timer.steps * batch_size / duration
+    config = {
+        'batchsize': batchsize, 'intraopthreads': intraopthreads, 'interopthreads': interopthreads,
+        'xla': xla, 'onednn': onednn or 'default', 'policy': tf.keras.mixed_precision.global_policy().name,
+        'prefetch': prefetch, 'cache': cache
+    }
+    print(f"{timer.steps} steps of {batch_size} in {duration:.2f}s: {samples_per_second:.1f} samples/sec, "
+          f"{os.cpu_count()} CPUs, config {config}")
+    metrics.log_metric('samples_per_second', samples_per_second)
+    metrics.log_metric('step_seconds', duration / timer.steps)
+    metrics.log_metric('cpus', os.cpu_count())
+    metrics.log_metric('batchsize', batch_size)
+    metrics.log_metric('intraopthreads', int(intraopthreads))
+    metrics.log_metric('interopthreads', int(interopthreads))
+
+@dsl.pipeline(
+    name="qoe benchmark Pipeline",
+    description="qoe training throughput",
+)
+
+def benchmark_pipeline(
+    featurepath: str = "", steps: str = "200", warmupsteps: str = "20",
+    batchsize: str = "10", intraopthreads: str = "0", interopthreads: str = "0", xla: str = "false",
+    onednn: str = "", mixedprecision: str = "false", prefetch: str = "autotune", cache: str = "false"):
+
+    benchmarkop=benchmark_training(featurepath=featurepath, steps=steps, warmupsteps=warmupsteps,
+                                   batchsize=batchsize, intraopthreads=intraopthreads, interopthreads=interopthreads,
+                                   xla=xla, onednn=onednn, mixedprecision=mixedprecision, prefetch=prefetch, cache=cache)
+    benchmarkop.set_caching_options(False)
+    kubernetes.set_image_pull_policy(benchmarkop, "IfNotPresent")
+    if NODE_SELECTOR:
+        label_key, label_value = NODE_SELECTOR.split("=", 1)
+        kubernetes.add_node_selector(benchmarkop, label_key=label_key, label_value=label_value)
+
+pipeline_func = benchmark_pipeline
+file_name = "qoe_benchmark_pipeline"
+
+kfp.compiler.Compiler().compile(pipeline_func,
+  '{}.yaml'.format(file_name))
+
+import requests
+pipeline_name="qoe_benchmark_Pipeline"
+pipeline_file = file_name+'.yaml'
+requests.post("http://tm.ridenext-ai-platform:32002/pipelines/{}/upload".format(pipeline_name), files={'file':open(pipeline_file,'rb')})
@@ -0,0 +1,252 @@
+# ==================================================================================
+#
+#       Copyright (c) 2025 Samsung Electronics Co., Ltd. All Rights Reserved.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#          http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ==================================================================================
+
+# QoE pipeline variant that trains one LSTM per cell group instead of one for all cells.
+#
+# partition_cells reads the features once, splits them by nrCellIdentity and deals the
+# cells into cellgroups groups (one group per cell if cellgroups is 0); cells with too few
+# rows for a training and a validation window are left out. The groups are
+# trained concurrently with dsl.ParallelFor, at most QOE_PARALLELISM (environment
+# variable read when the pipeline is compiled, default 4) at a time. register_models
+# then uploads all group models as one model version to MME:
+#
+#   keras_model/cells.json               {nrCellIdentity: group}
+#   keras_model/<group>/model.keras
+#   saved_model/cells.json
+#   saved_model/<group>/...
+#
+# and the overall and per group accuracy as the training job metrics. The cells left out
+# are not in cells.json.
+
+import os
+
+import kfp
+import kfp.dsl as dsl
+from kfp.dsl import Dataset, Input, Model, Output
+from kfp.dsl import component as component
+from kfp import kubernetes
+from typing import List
+
+# Built by bin/build_default_pipeline_image.sh, the first tag with the qoe_utils helpers
+BASE_IMAGE = "traininghost/pipelineimage:qoe-utils-1"
+PARALLELISM = int(os.getenv("QOE_PARALLELISM", "4"))
+
+@component(base_image=BASE_IMAGE)
+def partition_cells(featurepath: str, cellgroups: str, series: Output[Dataset]) -> List[str]:
+
+    import json
+    import numpy as np
+    import os
+    from featurestoresdk.feature_store_sdk import FeatureStoreSdk
+    from qoe_utils import to_float32
+
+    fs_sdk = FeatureStoreSdk()
+    print("featurepath is: ", featurepath)
+    columns = ['pdcpBytesDl', 'pdcpBytesUl']
+    features = fs_sdk.get_features(featurepath, ['measTimeStampRf', 'nrCellIdentity'] + columns)
+    print(f"Loaded {len(features)} rows, dtypes: {dict(features.dtypes.astype(str))}")
+    features = features.sort_values(['nrCellIdentity', 'measTimeStampRf'], kind='stable')
+
+    # A cell needs two windows of n_past + n_future rows (as in train_cell_group), one
+    # for training and one for validation; windows never span two cells, so the cells
+    # with fewer rows are left out instead of leaving a group without training data
+    n_past, n_future = 10, 1
+    min_rows = n_past + n_future + 1
+    rows = features['nrCellIdentity'].value_counts()
+    cells = sorted(rows.index[rows >= min_rows])
+    skipped = sorted(rows.index[rows < min_rows])
+    if skipped:
+        print(f"Skipping {len(skipped)} cells with fewer than {min_rows} rows: {skipped}")
+    if not cells:
+        raise ValueError(f"No cell in {featurepath} has the {min_rows} rows needed for training")
+    n_groups = min(int(cellgroups), len(cells)) if int(cellgroups) > 0 else len(cells)
+    # Cells are dealt round robin, so groups differ in size by at most one cell
+    groups = {f"group{i}": cells[i::n_groups] for i in range(n_groups)}
+    print(f"{len(cells)} cells in {n_groups} groups")
+
+    # One float32 series per group, the cells' series one after the other; offsets marks
+    # where each cell starts so that no training window spans two cells
+    os.makedirs(series.path, exist_ok=True)
+    by_cell = dict(tuple(features.groupby('nrCellIdentity', sort=False)))
+    del features
+    for group, group_cells in groups.items():
+        parts = [to_float32(by_cell[cell], columns) for cell in group_cells]
+        offsets = np.cumsum([0] + [len(part) for part in parts])
+        np.savez(os.path.join(series.path, f"{group}.npz"), series=np.concatenate(parts), offsets=offsets)
+    with open(os.path.join(series.path, "groups.json"), "w") as f:
+        json.dump(groups, f)
+
+    return list(groups)
+
+@component(base_image=BASE_IMAGE)
+def train_cell_group(series: Input[Dataset], group: str, epochs: str, model: Output[Model],
+                     batchsize: str, intraopthreads: str, interopthreads: str, xla: str, onednn: str,
+                     mixedprecision: str, prefetch: str, cache: str):
+
+    import os
+    # oneDNN is chosen when TensorFlow is imported; "" keeps TensorFlow's default
+    if onednn:
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if onednn == "true" else "0"
+    import tensorflow as tf
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.layers import LSTM
+    import numpy as np
+    import json
+    from qoe_utils import split_series, window_batches, enable_mixed_bfloat16
+
+    # Thread pools are sized before TensorFlow runs its first op, 0 keeps its default.
+    # Tasks of the ParallelFor may share a node, size them for the cores of one task
+    tf.config.threading.set_intra_op_parallelism_threads(int(intraopthreads))
+    tf.config.threading.set_inter_op_parallelism_threads(int(interopthreads))
+    if mixedprecision == "true":
+        enable_mixed_bfloat16()
+
+    with open(os.path.join(series.path, "groups.json")) as f:
+        cells = json.load(f)[group]
+    data = np.load(os.path.join(series.path, f"{group}.npz"))
+    buffer, offsets = data["series"], data["offsets"]
+    print(f"{group}: {len(cells)} cells, {len(buffer)} rows")
+
+    n_past, n_future = 10, 1
+
+    X, y = split_series(buffer, n_past, n_future)
+    y = y.reshape((y.shape[0], y.shape[2]))
+    # Windows that lie within one cell; per cell the last 20% of them are for validation
+    train_index, val_index = [], []
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        starts = np.arange(start, max(stop - n_past - n_future + 1, start))
+        split_at = int(len(starts) * 0.8)
+        train_index.append(starts[:split_at])
+        val_index.append(starts[split_at:])
+    train_index, val_index = np.concatenate(train_index), np.concatenate(val_index)
+    print(f"{len(train_index)} training and {len(val_index)} validation windows")
+
+    lstm = Sequential()
+    lstm.add(LSTM(units = 150, activation="tanh" ,return_sequences = True, input_shape = (X.shape[1], X.shape[2])))
+    lstm.add(LSTM(units = 150, return_sequences = True,activation="tanh"))
+    lstm.add(LSTM(units = 150,return_sequences = False,activation="tanh" ))
+    lstm.add((Dense(units = X.shape[2], dtype="float32")))
+    lstm.compile(loss='mse', optimizer='adam',metrics=['mse'], jit_compile=xla == "true")
+    lstm.summary()
+
+    lstm.fit(window_batches(X, y, int(batchsize), shuffle=True, index=train_index,
+                            cache=cache == "true", prefetch=prefetch), epochs=int(epochs),
+             validation_data=window_batches(X, y, int(batchsize), index=val_index,
+                                            cache=cache == "true", prefetch=prefetch))
+
+    all_index = np.concatenate([train_index, val_index])
+    yhat = lstm.predict(window_batches(X, None, 32, index=all_index, prefetch=prefetch), verbose = 0)
+    accuracy = float(np.mean(np.absolute(y[all_index] - yhat) < 5))
+    print(f"{group} accuracy: {accuracy}")
+
+    os.makedirs(model.path, exist_ok=True)
+    lstm.save(os.path.join(model.path, 'model.keras'))
+    lstm.export(os.path.join(model.path, 'saved_model'))
+    with open(os.path.join(model.path, 'group.json'), 'w') as f:
+        json.dump({'group': group, 'cells': cells, 'windows': len(all_index), 'Accuracy': accuracy}, f)
+    model.metadata['group'] = group
+    model.metadata['accuracy'] = accuracy
+
+@component(base_image=BASE_IMAGE)
+def register_models(models: Input[List[Model]], featurepath: str, modelname: str, modelversion: str):
+
+    import json
+    import os
+    import shutil
+    import requests
+    from modelmetricsdk.model_metrics_sdk import ModelMetricsSdk
+
+    mm_sdk = ModelMetricsSdk()
+
+    cells = {}
+    data = {}
+    data['metrics'] = []
+    hits, windows = 0.0, 0
+    for model in models:
+        with open(os.path.join(model.path, 'group.json')) as f:
+            info = json.load(f)
+        group = info['group']
+        shutil.copytree(model.path, os.path.join('./keras_model', group),
+                        ignore=shutil.ignore_patterns('saved_model', 'group.json'))
+        shutil.copytree(os.path.join(model.path, 'saved_model'), os.path.join('./saved_model', group))
+        cells.update({cell: group for cell in info['cells']})
+        data['metrics'].append({'group': group, 'cells': info['cells'], 'Accuracy': str(info['Accuracy'])})
+        hits += info['Accuracy'] * info['windows']
+        windows += info['windows']
+    print(f"{len(models)} group models for {len(cells)} cells")
+
+    for directory in ('./keras_model', './saved_model'):
+        with open(os.path.join(directory, 'cells.json'), 'w') as f:
+            json.dump(cells, f)
+    # Overall accuracy over the windows of all groups, first as in the single model pipeline
+    data['metrics'].insert(0, {'Accuracy': str(hits / windows if windows else 0.0)})
+
+#     as new artifact after training will always be 1.0.0
+    artifactversion="1.0.0"
+
+    #featurepath is a combination of <feature_group>_<trainingjob_Id>
+    trainingjob_id = featurepath.split('_')[-1]
+    mm_sdk.upload_metrics(data, trainingjob_id)
+    print("Model-metric : ", mm_sdk.get_metrics(trainingjob_id))
+    print("uploading keras models to MME")
+    mm_sdk.upload_model("./keras_model", modelname + "_keras", modelversion, artifactversion)
+    print("Saved keras format")
+    mm_sdk.upload_model("./saved_model", modelname, modelversion, artifactversion)
+    print("Saved savedmodel format")
+
+    url = f"http://modelmgmtservice.ridenext-ai-platform:8082/ai-ml-model-registration/v1/model-registrations/updateArtifact/{modelname}/{modelversion}/{artifactversion}"
+    updated_model_info= requests.post(url).json()
+    print(updated_model_info)
+
+@dsl.pipeline(
+    name="qoe multicell Pipeline",
+    description="qoe, one model per cell group",
+)
+
+def super_model_pipeline(
+    featurepath: str, epochs: str, modelname: str, modelversion:str, cellgroups: str = "0",
+    batchsize: str = "10", intraopthreads: str = "0", interopthreads: str = "0", xla: str = "false",
+    onednn: str = "", mixedprecision: str = "false", prefetch: str = "autotune", cache: str = "false"):
+
+    partitionop=partition_cells(featurepath=featurepath, cellgroups=cellgroups)
+    partitionop.set_caching_options(False)
+    kubernetes.set_image_pull_policy(partitionop, "IfNotPresent")
+
+    with dsl.ParallelFor(partitionop.outputs['Output'], parallelism=PARALLELISM) as group:
+        trainop=train_cell_group(series=partitionop.outputs['series'], group=group, epochs=epochs,
+                                 batchsize=batchsize, intraopthreads=intraopthreads, interopthreads=interopthreads,
+                                 xla=xla, onednn=onednn, mixedprecision=mixedprecision, prefetch=prefetch, cache=cache)
+        trainop.set_caching_options(False)
+        kubernetes.set_image_pull_policy(trainop, "IfNotPresent")
+
+    registerop=register_models(models=dsl.Collected(trainop.outputs['model']), featurepath=featurepath,
+                               modelname=modelname, modelversion=modelversion)
+    registerop.set_caching_options(False)
+    kubernetes.set_image_pull_policy(registerop, "IfNotPresent")
+
+pipeline_func = super_model_pipeline
+file_name = "qoe_multicell_model_pipeline"
+
+kfp.compiler.Compiler().compile(pipeline_func,
+  '{}.yaml'.format(file_name))
+
+import requests
+pipeline_name="qoe_multicell_Pipeline"
+pipeline_file = file_name+'.yaml'
+requests.post("http://tm.ridenext-ai-platform:32002/pipelines/{}/upload".format(pipeline_name), files={'file':open(pipeline_file,'rb')})
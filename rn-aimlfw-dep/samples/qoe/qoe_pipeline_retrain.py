@@ -22,12 +22,19 @@ from kfp.dsl import InputPath, OutputPath
 from kfp.dsl import component as component
 from kfp import kubernetes
 
-BASE_IMAGE = "traininghost/pipelineimage:latest"
+# Built by bin/build_default_pipeline_image.sh, the first tag with the qoe_utils helpers
+BASE_IMAGE = "traininghost/pipelineimage:qoe-utils-1"
 
 @component(base_image=BASE_IMAGE,packages_to_install=['requests'])
-def train_export_model(featurepath: str, epochs: str, modelname: str, modelversion:str):
+def train_export_model(featurepath: str, epochs: str, modelname: str, modelversion:str,
+                       batchsize: str, intraopthreads: str, interopthreads: str, xla: str, onednn: str,
+                       prefetch: str, cache: str):
     
     import re
+    import os
+    # oneDNN is chosen when TensorFlow is imported; "" keeps TensorFlow's default
+    if onednn:
+        os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if onednn == "true" else "0"
     import tensorflow as tf
     from numpy import array
     from tensorflow.keras.models import Sequential
@@ -40,39 +47,31 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
     print("numpy version")
     print(np.__version__)
     import pandas as pd
+    from qoe_utils import to_float32, split_series, window_batches
     import os
     from featurestoresdk.feature_store_sdk import FeatureStoreSdk
     from modelmetricsdk.model_metrics_sdk import ModelMetricsSdk
     
     fs_sdk = FeatureStoreSdk()
     mm_sdk = ModelMetricsSdk()
+
+    # Thread pools are sized before TensorFlow runs its first op, 0 keeps its default
+    tf.config.threading.set_intra_op_parallelism_threads(int(intraopthreads))
+    tf.config.threading.set_inter_op_parallelism_threads(int(interopthreads))
+    print(f"Training config: batch size {batchsize}, intra-op threads {intraopthreads}, inter-op threads {interopthreads}, "
+          f"XLA {xla}, oneDNN {onednn or 'default'}, prefetch {prefetch}, cache {cache}")
     print("featurepath is: ", featurepath)
-    features = fs_sdk.get_features(featurepath, ['pdcpBytesDl','pdcpBytesUl'])
-    print("Dataframe:")
-    print(features)
-
-    features_cellc2b2 = features
-    print(features_cellc2b2)
-    print('Previous Data Types are --> ', features_cellc2b2.dtypes)
-    features_cellc2b2["pdcpBytesDl"] = pd.to_numeric(features_cellc2b2["pdcpBytesDl"], downcast="float")
-    features_cellc2b2["pdcpBytesUl"] = pd.to_numeric(features_cellc2b2["pdcpBytesUl"], downcast="float")
-    print('New Data Types are --> ', features_cellc2b2.dtypes)
-    
-    features_cellc2b2 = features_cellc2b2[['pdcpBytesDl', 'pdcpBytesUl']]
-    
-    def split_series(series, n_past, n_future):
-        X, y = list(), list()
-        for window_start in range(len(series)):
-            past_end = window_start + n_past
-            future_end = past_end + n_future
-            if future_end > len(series):
-                break
-            # slicing the past and future parts of the window
-            past, future = series[window_start:past_end, :], series[past_end:future_end, :]
-            X.append(past)
-            y.append(future)
-        return np.array(X), np.array(y)
-    X, y = split_series(features_cellc2b2.values,10, 1)
+    columns = ['pdcpBytesDl', 'pdcpBytesUl']
+    features = fs_sdk.get_features(featurepath, columns)
+    print(f"Loaded {len(features)} rows, dtypes: {dict(features.dtypes.astype(str))}")
+    print(features.head())
+
+    series = to_float32(features, columns)
+    # Only the float32 buffer is kept for training, the windows below are views into it
+    del features
+    print(f"Feature buffer: {series.shape} {series.dtype}, {series.nbytes / 2**20:.1f} MiB")
+
+    X, y = split_series(series, 10, 1)
     X = X.reshape((X.shape[0], X.shape[1],X.shape[2]))
     y = y.reshape((y.shape[0], y.shape[2]))
     print(X.shape)
@@ -132,7 +131,7 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
     # Load the model in SavedModel format     
     model = tf.keras.models.load_model(model_path)
     
-    model.compile(loss='mse', optimizer='adam', metrics=['mse'])
+    model.compile(loss='mse', optimizer='adam', metrics=['mse'], jit_compile=xla == "true")
     model.summary()
 
     # Define a directory to save checkpoints
@@ -153,16 +152,18 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
 
     # Train the model with checkpointing
     print("Retraining the model with checkpoints...")
+    # Same split as validation_split=0.2: the last 20% of the windows are for validation
+    split_at = int(len(X) * 0.8)
     history = model.fit(
-        X, 
-        y, 
-        batch_size=10, 
+        window_batches(X[:split_at], y[:split_at], int(batchsize), shuffle=True,
+                       cache=cache == "true", prefetch=prefetch),
         epochs=int(epochs), 
-        validation_split=0.2, 
+        validation_data=window_batches(X[split_at:], y[split_at:], int(batchsize),
+                                       cache=cache == "true", prefetch=prefetch),
         callbacks=[checkpoint_callback]  # Add the callback here
     )
     
-    yhat = model.predict(X, verbose = 0)
+    yhat = model.predict(window_batches(X, None, 32, prefetch=prefetch), verbose = 0)
     xx = y
     yy = yhat
     
@@ -207,9 +208,13 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
     description="qoe",
 )
 def super_model_pipeline( 
-    featurepath: str, epochs: str, modelname: str, modelversion:str):
+    featurepath: str, epochs: str, modelname: str, modelversion:str,
+    batchsize: str = "10", intraopthreads: str = "0", interopthreads: str = "0", xla: str = "false",
+    onednn: str = "", prefetch: str = "autotune", cache: str = "false"):
     
-    trainop=train_export_model(featurepath=featurepath, epochs=epochs, modelname=modelname, modelversion=modelversion)
+    trainop=train_export_model(featurepath=featurepath, epochs=epochs, modelname=modelname, modelversion=modelversion,
+                               batchsize=batchsize, intraopthreads=intraopthreads, interopthreads=interopthreads,
+                               xla=xla, onednn=onednn, prefetch=prefetch, cache=cache)
     trainop.set_caching_options(False)
     kubernetes.set_image_pull_policy(trainop, "IfNotPresent")
 
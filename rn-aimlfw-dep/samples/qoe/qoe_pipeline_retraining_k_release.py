@@ -22,7 +22,8 @@ from kfp.dsl import InputPath, OutputPath
 from kfp.dsl import component as component
 from kfp import kubernetes
 
-BASE_IMAGE = "traininghost/pipelineimage:latest"
+# Built by bin/build_default_pipeline_image.sh, the first tag with the qoe_utils helpers
+BASE_IMAGE = "traininghost/pipelineimage:qoe-utils-1"
 
 @component(base_image=BASE_IMAGE,packages_to_install=['requests'])
 def train_export_model(featurepath: str, epochs: str, modelname: str, modelversion:str):
@@ -40,6 +41,7 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
     print("numpy version")
     print(np.__version__)
     import pandas as pd
+    from qoe_utils import to_float32, split_series, window_batches
     import os
     from featurestoresdk.feature_store_sdk import FeatureStoreSdk
     from modelmetricsdk.model_metrics_sdk import ModelMetricsSdk
@@ -47,32 +49,17 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
     fs_sdk = FeatureStoreSdk()
     mm_sdk = ModelMetricsSdk()
     print("featurepath is: ", featurepath)
-    features = fs_sdk.get_features(featurepath, ['pdcpBytesDl','pdcpBytesUl'])
-    print("Dataframe:")
-    print(features)
-
-    features_cellc2b2 = features
-    print(features_cellc2b2)
-    print('Previous Data Types are --> ', features_cellc2b2.dtypes)
-    features_cellc2b2["pdcpBytesDl"] = pd.to_numeric(features_cellc2b2["pdcpBytesDl"], downcast="float")
-    features_cellc2b2["pdcpBytesUl"] = pd.to_numeric(features_cellc2b2["pdcpBytesUl"], downcast="float")
-    print('New Data Types are --> ', features_cellc2b2.dtypes)
-    
-    features_cellc2b2 = features_cellc2b2[['pdcpBytesDl', 'pdcpBytesUl']]
-    
-    def split_series(series, n_past, n_future):
-        X, y = list(), list()
-        for window_start in range(len(series)):
-            past_end = window_start + n_past
-            future_end = past_end + n_future
-            if future_end > len(series):
-                break
-            # slicing the past and future parts of the window
-            past, future = series[window_start:past_end, :], series[past_end:future_end, :]
-            X.append(past)
-            y.append(future)
-        return np.array(X), np.array(y)
-    X, y = split_series(features_cellc2b2.values,10, 1)
+    columns = ['pdcpBytesDl', 'pdcpBytesUl']
+    features = fs_sdk.get_features(featurepath, columns)
+    print(f"Loaded {len(features)} rows, dtypes: {dict(features.dtypes.astype(str))}")
+    print(features.head())
+
+    series = to_float32(features, columns)
+    # Only the float32 buffer is kept for training, the windows below are views into it
+    del features
+    print(f"Feature buffer: {series.shape} {series.dtype}, {series.nbytes / 2**20:.1f} MiB")
+
+    X, y = split_series(series, 10, 1)
     X = X.reshape((X.shape[0], X.shape[1],X.shape[2]))
     y = y.reshape((y.shape[0], y.shape[2]))
     print(X.shape)
@@ -152,16 +139,16 @@ def train_export_model(featurepath: str, epochs: str, modelname: str, modelversi
 
     # Train the model with checkpointing
     print("Retraining the model with checkpoints...")
+    # Same split as validation_split=0.2: the last 20% of the windows are for validation
+    split_at = int(len(X) * 0.8)
     history = model.fit(
-        X, 
-        y, 
-        batch_size=10, 
+        window_batches(X[:split_at], y[:split_at], 10, shuffle=True),
         epochs=int(epochs), 
-        validation_split=0.2, 
+        validation_data=window_batches(X[split_at:], y[split_at:], 10),
         callbacks=[checkpoint_callback]  # Add the callback here
     )
     
-    yhat = model.predict(X, verbose = 0)
+    yhat = model.predict(window_batches(X, None, 32), verbose = 0)
     xx = y
     yy = yhat
     
@@ -0,0 +1,91 @@
+# ==================================================================================
+#
+#       Copyright (c) 2025 Samsung Electronics Co., Ltd. All Rights Reserved.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#          http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ==================================================================================
+
+# Helpers shared by the QoE pipelines in samples/qoe. Dockerfile.pipeline copies this
+# module into the pipeline image, the components import it from their function body.
+#
+# TensorFlow is imported by the functions that need it, not here, so that a component
+# can still set TF_ENABLE_ONEDNN_OPTS before TensorFlow is first imported.
+
+import numpy as np
+import pandas as pd
+
+
+def to_float32(features, columns, chunk_rows=100000):
+    # One float32 (rows, features) buffer, filled a chunk of rows at a time so that no
+    # full-length float64 or object copy of a column is made on the way
+    series = np.empty((len(features), len(columns)), dtype=np.float32)
+    for start in range(0, len(features), chunk_rows):
+        chunk = features.iloc[start:start + chunk_rows]
+        for i, column in enumerate(columns):
+            series[start:start + len(chunk), i] = pd.to_numeric(chunk[column], downcast="float")
+    return series
+
+
+def split_series(series, n_past, n_future):
+    # Zero-copy windows: sliding_window_view returns strided views into series,
+    # shaped (windows, n_past, features) and (windows, n_future, features)
+    windows = np.lib.stride_tricks.sliding_window_view(series, n_past + n_future, axis=0)
+    windows = windows.transpose(0, 2, 1)
+    return windows[:, :n_past, :], windows[:, n_past:, :]
+
+
+def window_batches(X, y, batch_size, shuffle=False, index=None, cache=False, prefetch="autotune"):
+    # Feeds Keras from the window views, only the windows of the current batch are copied.
+    # index selects the windows to feed (all of them by default), y None feeds X alone.
+    # prefetch is "autotune", a number of batches or "0" for none
+    import tensorflow as tf
+
+    index = np.arange(len(X)) if index is None else index
+    signature = tf.TensorSpec((None,) + X.shape[1:], tf.float32)
+    if y is not None:
+        signature = (signature, tf.TensorSpec((None,) + y.shape[1:], tf.float32))
+
+    def batches():
+        order = np.random.permutation(index) if shuffle else index
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            if y is None:
+                yield np.asarray(X[batch], dtype=np.float32)
+            else:
+                yield np.asarray(X[batch], dtype=np.float32), np.asarray(y[batch], dtype=np.float32)
+
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+    if cache:
+        # The batches are copied once and kept in memory; when shuffling, only their
+        # order changes from epoch to epoch
+        dataset = dataset.cache()
+        if shuffle:
+            dataset = dataset.shuffle(-(-len(index) // batch_size))
+    if prefetch != "0":
+        dataset = dataset.prefetch(tf.data.AUTOTUNE if prefetch == "autotune" else int(prefetch))
+    return dataset
+
+
+def enable_mixed_bfloat16():
+    # The LSTM layers compute in bfloat16, variables and the output layer stay float32.
+    # Only CPUs with bf16 instructions gain from it, elsewhere training stays in float32
+    import tensorflow as tf
+
+    with open("/proc/cpuinfo") as f:
+        cpu_flags = f.read().split()
+    if "avx512_bf16" not in cpu_flags and "amx_bf16" not in cpu_flags:
+        print("This CPU has no bf16 support, training in float32")
+        return False
+    tf.keras.mixed_precision.set_global_policy("mixed_bfloat16")
+    return True
@@ -0,0 +1,177 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+POWER_ON = "on"
+POWER_OFF = "off"
+
+
+class RateLimiter(object):
+    # Spaces calls evenly so that no more than max_rate calls per second are let through
+    def __init__(self, max_rate):
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ActuationScheduler(object):
+    """
+    Applies cell power on/off intents without blocking the inference loop.
+
+    Intents are queued per node. Nodes are served concurrently by a bounded worker pool,
+    while PATCHes to the same node are sent one at a time and at least node_interval
+    seconds apart; when the NCMP client runs in "node" bulk mode, all intents queued for
+    a node go out in a single request. A global rate limit caps the total NCMP request
+    rate. A newer intent for a cell replaces one that is still queued. submit returns
+    (future, created): a Future that completes with the NCMP result for that cell, and
+    False if it is the Future of the same intent, already scheduled.
+    """
+
+    def __init__(self, ncmp_client, node_interval=3.0, max_rate=10.0, max_workers=8):
+        self.ncmp_client = ncmp_client
+        self.node_interval = node_interval
+        self.rate_limiter = RateLimiter(max_rate)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="actuation")
+
+        self.lock = threading.Lock()
+        self.pending = {}  # node -> OrderedDict(cell_with_node -> (action, future))
+        self.intents = {}  # cell_with_node -> (action, future), queued or running
+        self.active_nodes = set()
+        self.last_actuation = {}  # node -> monotonic time of the last PATCH
+        # Send everything queued for a node in one request when the client supports it
+        self.batch_per_node = getattr(ncmp_client, "bulk_mode", "cell") == "node"
+
+    def submit(self, cell_with_node, action):
+        if action not in (POWER_ON, POWER_OFF):
+            raise ValueError(f"Unknown actuation: {action}")
+
+        node_id = cell_with_node.split('_')[1]
+
+        with self.lock:
+            current = self.intents.get(cell_with_node)
+            if current is not None and current[0] == action and not current[1].done():
+                logger.debug(f"Power-{action} of cell {cell_with_node} is already scheduled.")
+                return current[1], False
+
+            node_queue = self.pending.setdefault(node_id, OrderedDict())
+            superseded = node_queue.pop(cell_with_node, None)
+            if superseded is not None:
+                logger.debug(f"Replacing queued power-{superseded[0]} of cell {cell_with_node} with power-{action}.")
+                superseded[1].cancel()
+
+            future = Future()
+            node_queue[cell_with_node] = (action, future)
+            self.intents[cell_with_node] = (action, future)
+
+            if node_id not in self.active_nodes:
+                self.active_nodes.add(node_id)
+                self.executor.submit(self.drain_node, node_id)
+
+        return future, True
+
+    def intended_action(self, cell_with_node):
+        # The action of the queued or running intent for the cell, None if there is none
+        with self.lock:
+            current = self.intents.get(cell_with_node)
+        if current is None or current[1].done():
+            return None
+        return current[0]
+
+    def pending_count(self):
+        with self.lock:
+            return sum(len(node_queue) for node_queue in self.pending.values())
+
+    def drain_node(self, node_id):
+        while True:
+            with self.lock:
+                node_queue = self.pending.get(node_id)
+                if not node_queue:
+                    self.pending.pop(node_id, None)
+                    self.active_nodes.discard(node_id)
+                    return
+                if self.batch_per_node:
+                    batch = list(node_queue.items())
+                    node_queue.clear()
+                else:
+                    batch = [node_queue.popitem(last=False)]
+
+            batch = [(cell_with_node, action, future) for cell_with_node, (action, future) in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self.wait_for_node(node_id)
+            self.rate_limiter.acquire()
+            try:
+                results = self.actuate_batch(node_id, batch)
+                for cell_with_node, _, future in batch:
+                    future.set_result(results.get(cell_with_node, False))
+            except Exception as e:
+                for cell_with_node, action, future in batch:
+                    logger.error(f"Power-{action} of cell {cell_with_node} failed: {str(e)}")
+                    future.set_exception(e)
+            finally:
+                with self.lock:
+                    self.last_actuation[node_id] = time.monotonic()
+                    for cell_with_node, _, future in batch:
+                        if self.intents.get(cell_with_node, (None, None))[1] is future:
+                            del self.intents[cell_with_node]
+
+    def wait_for_node(self, node_id):
+        last = self.last_actuation.get(node_id)
+        if last is None:
+            return
+        delay = self.node_interval - (time.monotonic() - last)
+        if delay > 0:
+            time.sleep(delay)
+
+    def actuate_batch(self, node_id, batch):
+        if len(batch) == 1:
+            cell_with_node, action, _ = batch[0]
+            return {cell_with_node: self.actuate(cell_with_node, action)}
+        return self.ncmp_client.actuate_node(node_id, {cell_with_node: action for cell_with_node, action, _ in batch})
+
+    def actuate(self, cell_with_node, action):
+        if action == POWER_OFF:
+            return self.ncmp_client.power_off_cell(cell_with_node)
+        return self.ncmp_client.power_on_cell(cell_with_node)
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            for node_queue in self.pending.values():
+                for _, future in node_queue.values():
+                    future.cancel()
+            self.pending.clear()
+        self.executor.shutdown(wait=wait)
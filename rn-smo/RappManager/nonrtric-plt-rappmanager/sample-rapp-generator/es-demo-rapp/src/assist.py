@@ -17,9 +17,13 @@
 
 import json
 import random
-import requests
 import logging
-from sme_client import SMEClient
+import numpy as np
+import requests
+from http_transport import get_transport
+from rapp_config import get_config
+from request_capture import RequestCapture
+from sme_client import get_discovery_cache
 
 logger = logging.getLogger(__name__)
 
@@ -30,26 +34,33 @@ class ASSIST(object):
         self.invoker_id = None
         self.api_name = None
         self.resource_name = None
+        self.batch_size = None
+        self.capture = None
         self.config()
         self.get_url_from_sme()
 
     def config(self):
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = get_config()
 
         assist_config = config.get("SME", {})
         self.invoker_id = assist_config.get("kserve_invoker_id")
         self.api_name = assist_config.get("kserve_api_name")
         self.resource_name = assist_config.get("kserve_resource_name")
 
-    def get_url_from_sme(self):
-        sme_client = SMEClient(
-            invoker_id=self.invoker_id,
-            api_name=self.api_name,
-            resource_name=self.resource_name
-        )
+        # Number of cell windows packed into a single KServe predict request
+        rapp_config = config.get("RAPP", {})
+        self.batch_size = max(1, int(rapp_config.get("kserve_batch_size", 64)))
 
-        self.kserve_url = sme_client.discover_service()
+        # Optional sampled capture of prediction requests, off by default
+        self.capture = RequestCapture.from_config(config.get("CAPTURE", {}))
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+
+    def get_url_from_sme(self):
+        self.kserve_url = get_discovery_cache().get(self.invoker_id, self.api_name, self.resource_name)
 
         if self.kserve_url is None:
             logger.error("Failed to discover KServe URL.")
@@ -60,7 +71,10 @@ class ASSIST(object):
 
         if(not randomize):
 
-            if isinstance(json_data, dict) and "instances" in json_data:
+            if isinstance(json_data, dict) and isinstance(json_data.get("instances"), np.ndarray):
+                # Serialise the float32 tensor in one call instead of casting value by value
+                json_data = dict(json_data, instances=json_data["instances"].tolist())
+            elif isinstance(json_data, dict) and "instances" in json_data:
                 json_data["instances"] = [
                     [
                         [float(val) for val in sublist]
@@ -69,20 +83,29 @@ class ASSIST(object):
                     for instance in json_data["instances"]
                 ]
 
-
-            with open('input.json', 'w') as f:
-                json.dump(json_data, f)
-
             # Commented out for local testing
             # url = 'http://localhost:8080/v1/models/es-aiml-model:predict'
             # headers = {'Host': 'es-aiml-model-predictor-default.default.svc.cluster.local'}
+            # Resolved through the discovery cache so an expired or invalidated URL is discovered again
+            self.kserve_url = get_discovery_cache().get(self.invoker_id, self.api_name, self.resource_name)
+            if self.kserve_url is None:
+                logger.error("KServe URL is not available, cannot send the prediction request.")
+                return None, None
+
             url = self.kserve_url + 'v1/models/es-aiml-model:predict'
             host = self.kserve_url.split('/')[2].split(':')[0]
             headers = {'Host': host }
 
-            response = requests.post(url, headers=headers, json=json_data)
+            try:
+                response = get_transport().post(url, headers=headers, json=json_data)
+            except requests.ConnectionError:
+                get_discovery_cache().invalidate(self.invoker_id, self.api_name, self.resource_name)
+                raise
             logger.info("Prediction result")
             logger.info(response.text)
+
+            if self.capture is not None:
+                self.capture.capture(json_data, response.status_code, response.text)
             return response.status_code, response.text
         else:
             data = json.dumps({
@@ -94,6 +117,29 @@ class ASSIST(object):
 
             return 200, data
 
+    def send_batch_request_to_server(self, json_data, randomize=False):
+        # Send several cell windows in one predict call and return one prediction per instance
+        if randomize:
+            predictions = [self.random_predictions()[0] for _ in json_data["instances"]]
+            logger.info(f"Random prediction result for {len(predictions)} instances")
+            return 200, predictions
+
+        status_code, response_text = self.send_request_to_server(json_data)
+        if status_code != 200:
+            logger.error(f"Batch prediction failed with status code {status_code}")
+            return status_code, None
+
+        try:
+            predictions = json.loads(response_text).get("predictions")
+        except ValueError as e:
+            logger.error(f"Failed to decode batch prediction response: {e}")
+            return status_code, None
+
+        if predictions is None or len(predictions) != len(json_data["instances"]):
+            logger.error("Batch prediction response does not match the number of instances sent")
+            return status_code, None
+        return status_code, predictions
+
     def random_predictions(self):
         predictions = []
         # Generate random decision for all rows
@@ -0,0 +1,122 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""
+Benchmarks cell actuation against a local NCMP stub server.
+
+The stub accepts passthrough PATCHes, answers after a configurable delay and
+counts the requests it received. The benchmark compares a sequential loop of
+power_off_cell calls with NCMP_CLIENT.bulk_actuate in "cell" and "node" mode.
+Run it from this directory so config.json is picked up, e.g.:
+
+    python benchmark_ncmp.py --cells 200 --nodes 4 --latency 0.02
+
+With --serve the stub is started on its own (e.g. to point the rApp at it).
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ncmp_client import NCMP_CLIENT
+
+
+class StubNcmpHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    reject_node_patch = False
+    requests_received = 0
+    counter_lock = threading.Lock()
+
+    def do_PATCH(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.counter_lock:
+            StubNcmpHandler.requests_received += 1
+        time.sleep(self.latency)
+
+        node_patch = not self.path.endswith("/attributes")
+        if node_patch and self.reject_node_patch:
+            self.send_response(405)
+            self.end_headers()
+            return
+
+        cells = len(json.loads(body).get("_3gpp-nr-nrm-nrcelldu:NRCellDU", [])) if node_patch else 1
+        response = json.dumps({"updated": cells}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0, latency=0.0, reject_node_patch=False):
+    StubNcmpHandler.latency = latency
+    StubNcmpHandler.reject_node_patch = reject_node_patch
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubNcmpHandler)
+    threading.Thread(target=server.serve_forever, name="ncmp-stub", daemon=True).start()
+    return server
+
+
+def run(name, fn):
+    StubNcmpHandler.requests_received = 0
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for success in results.values() if success)
+    print(f"{name:<12} {elapsed:>9.3f} {StubNcmpHandler.requests_received:>9} {succeeded:>6}/{len(results)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NCMP cell actuation against a local stub server.")
+    parser.add_argument("--cells", type=int, default=200, help="Number of cells to actuate.")
+    parser.add_argument("--nodes", type=int, default=4, help="Number of nodes (CM handles) the cells are spread over.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub response delay in seconds.")
+    parser.add_argument("--max_workers", type=int, default=8, help="Concurrent NCMP requests for bulk_actuate.")
+    parser.add_argument("--reject_node_patch", action="store_true", help="Make the stub reject PATCHes on the GNBDUFunction.")
+    parser.add_argument("--serve", action="store_true", help="Only run the stub server.")
+    parser.add_argument("--port", type=int, default=0, help="Stub server port (0 picks a free one).")
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency, args.reject_node_patch)
+    port = server.server_address[1]
+    if args.serve:
+        print(f"NCMP stub listening on http://127.0.0.1:{port}/")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    client = NCMP_CLIENT(ncmp_uri=f"http://127.0.0.1:{port}/")
+    client.max_workers = args.max_workers
+    cells = [f"NRCellDU-{i:04d}_node-{i % args.nodes}" for i in range(args.cells)]
+    intents = {cell_with_node: "off" for cell_with_node in cells}
+
+    print(f"{'mode':<12} {'seconds':>9} {'requests':>9} {'succeeded':>10}")
+    run("sequential", lambda: {cell_with_node: client.power_off_cell(cell_with_node) for cell_with_node in cells})
+    for mode in ("cell", "node"):
+        client.bulk_mode = mode
+        client.node_patch_unsupported.clear()
+        run(f"bulk-{mode}", lambda: client.bulk_actuate(intents))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
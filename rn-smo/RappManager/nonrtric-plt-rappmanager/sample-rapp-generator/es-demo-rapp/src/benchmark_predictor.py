@@ -0,0 +1,98 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""
+Compares the ES model backends on synthetic cell windows.
+
+For every backend it reports the latency of one cell per call (the old
+one-request-per-cell path) and the throughput of batched calls.
+Run it from this directory so config.json is picked up, e.g.:
+
+    python benchmark_predictor.py --backend kserve local --model_path models/es-aiml-model --cells 1000
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from assist import ASSIST
+from predictor import KServePredictor, LocalPredictor
+
+
+def make_predictor(backend, args):
+    if backend == "kserve":
+        predictor = KServePredictor(ASSIST())
+    else:
+        predictor = LocalPredictor(args.model_path)
+    predictor.batch_size = args.batch_size
+    return predictor
+
+
+def benchmark(predictor, instances, single_calls, repeat):
+    # Warm up connections / the runtime before measuring
+    predictor.predict(instances[:1])
+
+    latencies = []
+    for i in range(single_calls):
+        start = time.perf_counter()
+        predictor.predict(instances[i:i + 1])
+        latencies.append(time.perf_counter() - start)
+
+    batch_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predictor.predict(instances)
+        batch_times.append(time.perf_counter() - start)
+
+    latencies_ms = np.array(latencies) * 1000
+    best_batch = min(batch_times)
+    return {
+        "per_cell_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "per_cell_p95_ms": float(np.percentile(latencies_ms, 95)),
+        "per_cell_cells_per_s": single_calls / sum(latencies),
+        "batched_ms_per_cell": best_batch * 1000 / len(instances),
+        "batched_cells_per_s": len(instances) / best_batch
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ES model predictor backends.")
+    parser.add_argument("--backend", nargs="+", choices=["kserve", "local"], default=["kserve"], help="Backends to benchmark.")
+    parser.add_argument("--model_path", default="models/es-aiml-model", help="SavedModel directory, .tflite or .onnx file for the local backend.")
+    parser.add_argument("--cells", type=int, default=1000, help="Number of cell windows per batched pass.")
+    parser.add_argument("--window", type=int, default=10, help="Time steps per cell window.")
+    parser.add_argument("--features", type=int, default=3, help="Features per time step.")
+    parser.add_argument("--batch_size", type=int, default=256, help="Cells per predictor call in the batched pass.")
+    parser.add_argument("--single_calls", type=int, default=100, help="Number of one-cell calls used for the latency figures.")
+    parser.add_argument("--repeat", type=int, default=3, help="Batched passes; the fastest one is reported.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    instances = rng.uniform(1, 100, size=(args.cells, args.window, args.features)).astype(np.float32)
+    single_calls = min(args.single_calls, args.cells)
+
+    print(f"{'backend':<8} {'p50 ms/cell':>12} {'p95 ms/cell':>12} {'cells/s':>10} {'batched ms/cell':>16} {'batched cells/s':>16}")
+    for backend in args.backend:
+        result = benchmark(make_predictor(backend, args), instances, single_calls, args.repeat)
+        print(f"{backend:<8} {result['per_cell_p50_ms']:>12.2f} {result['per_cell_p95_ms']:>12.2f} "
+              f"{result['per_cell_cells_per_s']:>10.1f} {result['batched_ms_per_cell']:>16.3f} {result['batched_cells_per_s']:>16.1f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
@@ -20,15 +20,50 @@ import logging
 from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
 from requests.exceptions import RequestException, ConnectionError
 import influxdb_client
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import random
-import json
-from sme_client import SMEClient
+import numpy as np
+from rapp_config import get_config
+from sme_client import get_discovery_cache
 from influxdb_client.client.write_api import SYNCHRONOUS
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+SYNTHETIC_FIELDS = ["CellID", "DRB.UEThpUl", "RRU.PrbUsedUl", "PEE.AvgPower", "GranularityPeriod", "RRC.ConnMean", "RRU.PrbTotDl", "DRB.UEThpDl"]
+SYNTHETIC_MEASUREMENTS = ["o-ran-pm", "ManagedElement=o-du-pynts-1122,ManagedElement=o-du-pynts-1122,GNBDUFunction=1,NRCellDU=1", "ManagedElement=o-du-pynts-1123,ManagedElement=o-du-pynts-1123,GNBDUFunction=1,NRCellDU=1"]
+
+
+# Line protocol escaping, see https://docs.influxdata.com/influxdb/v2/reference/syntax/line-protocol/
+def escape_measurement(name):
+    return name.replace("\\", "\\\\").replace(",", "\\,").replace(" ", "\\ ")
+
+
+def escape_key(key):
+    return escape_measurement(key).replace("=", "\\=")
+
+
+def format_field_value(value):
+    # Keeps the field types Point would write: str -> string, int -> integer, float -> float
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, np.integer)):
+        return f"{value}i"
+    if isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def to_nanoseconds(iso_time):
+    timestamp = datetime.fromisoformat(iso_time)
+    if timestamp.tzinfo is None:
+        # Naive times are taken as UTC, as Point.time does
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (timestamp - EPOCH) // timedelta(microseconds=1) * 1000
+
 class DATABASE(object):
 
     def __init__(self, dbname='Timeseries', user='user', password='password', host="influxdb_ip", port='influxdb_port', path='', ssl=False):
@@ -47,6 +82,7 @@ class DATABASE(object):
         self.influx_invoker_id = None
         self.influx_api_name = None
         self.influx_resource_name = None
+        self.influx_url = None
         self.time_range = None
         self.measurements = None
         self.config()
@@ -58,13 +94,7 @@ class DATABASE(object):
         pd.set_option('display.colheader_justify', 'left')  # Align column headers to the left
 
     def get_url_from_sme(self):
-        sme_client = SMEClient(
-            invoker_id=self.influx_invoker_id,
-            api_name=self.influx_api_name,
-            resource_name=self.influx_resource_name
-        )
-
-        self.influx_url = sme_client.discover_service()
+        self.influx_url = get_discovery_cache().get(self.influx_invoker_id, self.influx_api_name, self.influx_resource_name)
 
         logger.info("InfluxDB URL: {}".format(self.influx_url))
 
@@ -86,7 +116,7 @@ class DATABASE(object):
             self.client.close()
 
         try:
-            self.client = influxdb_client.InfluxDBClient(url=self.address, org=self.org, token=self.token)
+            self.client = influxdb_client.InfluxDBClient(url=self.address, org=self.org, token=self.token, enable_gzip=self.enable_gzip)
             version = self.client.version()
             logger.info("Connected to Influx Database, InfluxDB version : {}".format(version))
             return True
@@ -109,19 +139,22 @@ class DATABASE(object):
         self.data = result
         return result
 
-    def read_data(self, train=False, valid=False, limit=False):
+    def read_data(self, train=False, valid=False, limit=False, measurements=None, nodes=None):
+        # measurements restricts the query to a subset of the configured measurements, nodes
+        # restricts the measurements that do not name a ManagedElement to the points whose
+        # node_tag is one of the nodes
         self.data = None
         query = 'from(bucket:"{}")'.format(self.bucket)
 
         time_range = getattr(self, 'time_range', '-10m')
         query += f'|> range(start: {time_range}) '
 
-        measurements = getattr(self, 'measurements', ['o-ran-pm'])
+        if measurements is None:
+            measurements = getattr(self, 'measurements', None) or ['o-ran-pm']
         if isinstance(measurements, str):
             measurements = [measurements]
 
-        measurement_filters = [f'r["_measurement"] == "{m}"' for m in measurements]
-        query += f' |> filter(fn: (r) => {" or ".join(measurement_filters)})'
+        query += f' |> filter(fn: (r) => {self.measurement_filter(measurements, nodes)})'
 
         query += ' |> filter(fn: (r) => r["_field"] == "CellID" or r["_field"] == "DRB.UEThpUl" or r["_field"] == "RRU.PrbUsedUl" or r["_field"] == "PEE.AvgPower") '
         # Keep _measurement in the rowKey to preserve it
@@ -132,6 +165,17 @@ class DATABASE(object):
         self.data = result
         return result
 
+    def measurement_filter(self, measurements, nodes=None):
+        if nodes is not None:
+            node_filter = " or ".join(f'r["{self.node_tag}"] == "{node}"' for node in sorted(nodes)) or "false"
+        filters = []
+        for m in measurements:
+            if nodes is None or "ManagedElement=" in m:
+                filters.append(f'r["_measurement"] == "{m}"')
+            else:
+                filters.append(f'(r["_measurement"] == "{m}" and ({node_filter}))')
+        return " or ".join(filters)
+
     # Query data
     def query(self, query):
         while True:
@@ -143,6 +187,11 @@ class DATABASE(object):
             except (RequestException, InfluxDBClientError, InfluxDBServerError, ConnectionError) as e:
                 logger.error(f'Failed to query influxdb: {e}, retrying in 60 seconds...')
                 time.sleep(60)
+                if self.influx_url is not None:
+                    # The InfluxDB URL came from SME, discover it again in case the service moved
+                    get_discovery_cache().invalidate(self.influx_invoker_id, self.influx_api_name, self.influx_resource_name)
+                    self.get_url_from_sme()
+                    self.connect()
 
     def mapping(self, data):
         data[['S', 'B', 'C']] = data['CellID'].str.extract(r'S(\d+)-[BN](\d+)-C(\d+)')
@@ -154,16 +203,14 @@ class DATABASE(object):
 
     def generate_synthetic_data(self):
         data = []
-        fields = ["CellID", "DRB.UEThpUl", "RRU.PrbUsedUl", "PEE.AvgPower", "GranularityPeriod", "RRC.ConnMean", "RRU.PrbTotDl", "DRB.UEThpDl"]
-        measurements = ["o-ran-pm", "ManagedElement=o-du-pynts-1122,ManagedElement=o-du-pynts-1122,GNBDUFunction=1,NRCellDU=1", "ManagedElement=o-du-pynts-1123,ManagedElement=o-du-pynts-1123,GNBDUFunction=1,NRCellDU=1"]
 
         # Generate matching records (synchronized _time for each group of 4)
         for _ in range(50):  # 50 records, each with 4 rows sharing the same time
             common_time = datetime.now() - timedelta(minutes=random.randint(0, 60))
             iso_time = common_time.isoformat()
-            measurement = random.choice(measurements)
+            measurement = random.choice(SYNTHETIC_MEASUREMENTS)
 
-            for field in fields:
+            for field in SYNTHETIC_FIELDS:
                 value = (
                     f"S{random.randint(1,9)}-B{random.randint(1,9)}-C{random.randint(1,9)}" if field == "CellID"
                     else (900 if field == "GranularityPeriod"
@@ -182,23 +229,81 @@ class DATABASE(object):
 
         self.write_synthetic_data_to_db(data)
 
+    def seed_synthetic_data(self, rows, cells=1000, minutes=60, seed=None):
+        """
+        Writes rows synthetic PM records (one point per row) for scale tests.
+
+        Rows are generated with numpy and formatted straight into line protocol, batch
+        by batch, so memory stays bounded however many rows are seeded. The fields and
+        field types match generate_synthetic_data.
+        """
+        rng = np.random.default_rng(seed)
+        cell_ids = np.array([f"S{i % 9 + 1}-B{i // 81 + 1}-C{i // 9 % 9 + 1}" for i in range(cells)])
+        measurements = np.array([escape_measurement(m) for m in SYNTHETIC_MEASUREMENTS])
+        value_fields = [escape_key(field) for field in SYNTHETIC_FIELDS if field not in ("CellID", "GranularityPeriod")]
+        now_ns = time.time_ns()
+        # Rows are spread evenly over the last minutes, so no two points share a timestamp
+        step_ns = max(1, minutes * 60 * 1_000_000_000 // max(rows, 1))
+
+        def lines():
+            for start in range(0, rows, self.write_batch_size):
+                size = min(self.write_batch_size, rows - start)
+                cell = cell_ids[rng.integers(0, cells, size)]
+                measurement = measurements[rng.integers(0, len(measurements), size)]
+                times = now_ns - (start + np.arange(size)) * step_ns
+                values = np.round(rng.uniform(1, 100, (size, len(value_fields))), 5).astype(str)
+                for i in range(size):
+                    fields = ",".join(f'{key}="{value}"' for key, value in zip(value_fields, values[i]))
+                    yield f'{measurement[i]} CellID="{cell[i]}",GranularityPeriod=900i,{fields} {times[i]}'
+
+        started = time.perf_counter()
+        self.write_lines(lines())
+        elapsed = time.perf_counter() - started
+        logger.info(f"Seeded {rows} synthetic rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s).")
+
+    def to_line_protocol(self, data):
+        # Merges the single-field records that share a measurement and time into one point each
+        points = {}
+        for record in data:
+            key = (record["_measurement"], record["_time"])
+            points.setdefault(key, []).append(f'{escape_key(record["_field"])}={format_field_value(record["_value"])}')
 
-    def write_synthetic_data_to_db(self, data):
+        for (measurement, iso_time), fields in points.items():
+            yield f"{escape_measurement(measurement)} {','.join(fields)} {to_nanoseconds(iso_time)}"
 
+    def write_lines(self, lines):
+        # Writes line protocol in batches of write_batch_size lines, write_workers batches at a time
         write_api = self.client.write_api(write_options=SYNCHRONOUS)
-        for record in data:
-            point = influxdb_client.Point(record["_measurement"]) \
-                .field(record["_field"], record["_value"]) \
-                .time(datetime.fromisoformat(record["_time"]))
-            write_api.write(bucket=self.bucket, org=self.org, record=point)
-        write_api.flush()
-        write_api.close()
-        logger.info("Synthetic data successfully written to InfluxDB.")
+        lines = iter(lines)
+
+        def write(batch):
+            write_api.write(bucket=self.bucket, org=self.org, record="\n".join(batch))
+            return len(batch)
+
+        written = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.write_workers) as executor:
+                in_flight = []
+                while True:
+                    batch = list(islice(lines, self.write_batch_size))
+                    if batch:
+                        in_flight.append(executor.submit(write, batch))
+                    # Bound the number of batches held in memory
+                    while in_flight and (len(in_flight) >= self.write_workers or not batch):
+                        written += in_flight.pop(0).result()
+                    if not batch:
+                        break
+        finally:
+            write_api.close()
+        return written
+
+    def write_synthetic_data_to_db(self, data):
+        points = self.write_lines(self.to_line_protocol(data))
+        logger.info(f"Synthetic data successfully written to InfluxDB ({points} points).")
 
     def config(self):
 
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = get_config()
 
         # Load the SME configuration from the JSON file
         sme_config = config.get("SME", {})
@@ -226,3 +331,8 @@ class DATABASE(object):
         self.password = influx_config.get("password")
         self.time_range = influx_config.get("time_range")
         self.measurements = influx_config.get("measurements")
+        # Tag naming the ManagedElement of the points in measurements shared by several nodes
+        self.node_tag = influx_config.get("node_tag", "ManagedElement")
+        self.write_batch_size = int(influx_config.get("write_batch_size", 5000))
+        self.write_workers = int(influx_config.get("write_workers", 4))
+        self.enable_gzip = influx_config.get("enable_gzip", True)
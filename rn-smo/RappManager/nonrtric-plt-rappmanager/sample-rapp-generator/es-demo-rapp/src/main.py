@@ -16,33 +16,56 @@
 #
 
 import argparse
+import signal
 import time
+from functools import partial
+import numpy as np
 import pandas as pd
-import schedule
-from threading import Lock
+from threading import Event, Lock
 import logging
 from data import DATABASE
 from assist import ASSIST
+from http_transport import configure_transport
 from ncmp_client import NCMP_CLIENT
-from teiv_client import TEIV_CLIENT
+from teiv_client import TEIV_CLIENT, CellInventory
+from actuation import ActuationScheduler, POWER_ON, POWER_OFF
+from pm_events import Debouncer, PmEventListener
+from predictor import create_predictor
+from rapp_config import get_config
+from sme_client import get_discovery_cache
 import json
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Model input features, in the order the ES model expects them
+FEATURE_COLUMNS = ["DRB.UEThpUl", "RRU.PrbUsedUl", "PEE.AvgPower"]
+
 
 class ESrapp():
-    def __init__(self, generate_db_data=True, use_sme_db=False, random_predictions=False):
+    def __init__(self, generate_db_data=True, use_sme_db=False, random_predictions=False, seed_rows=0):
 
         # Initialize the local storage of cell status
         self.cell_power_status = {}
-        self.teiv_cells = {}
+        # Parsed (S, B, C) parts per CellID, None for IDs the regex does not match
+        self.cell_id_cache = {}
+
+        # All clients share one HTTP transport, configured by the "HTTP" section
+        configure_transport(get_config().get("HTTP", {}))
+
+        # The ES model runs on KServe unless PREDICTOR.backend selects the in-process backend
+        predictor_config = get_config().get("PREDICTOR", {})
+        use_kserve = predictor_config.get("backend", "kserve") == "kserve" or random_predictions
+
+        # Discover all SME services in parallel so the clients below start from the cache
+        self.prefetch_services(use_sme_db, use_kserve)
 
         # Initialize the database and prediction client
         self.db = DATABASE()
-        self.assist=ASSIST()
+        self.assist = ASSIST() if use_kserve else None
 
         self.random_predictions = random_predictions
+        self.predictor = create_predictor(predictor_config, self.assist, randomize=random_predictions)
 
         if use_sme_db:
             # Get the InfluxDB URL from SME
@@ -50,7 +73,10 @@ class ESrapp():
 
         self.db.connect()
 
-        if generate_db_data:
+        if seed_rows:
+            # Bulk seed synthetic data for scale tests
+            self.db.seed_synthetic_data(seed_rows)
+        elif generate_db_data:
             # Use local InfluxDB and generate synthetic data - only for local testing
             self.db.generate_synthetic_data()
 
@@ -68,9 +94,42 @@ class ESrapp():
 
         # Create policy type and policy instance
         #self.policy_manager.create_policy_type()
+
+        self.config()
+        # Keep an indexed copy of the TEIV cells, refreshed in the background
+        self.cell_inventory = CellInventory(self.teiv_client, ttl=self.teiv_inventory_ttl)
+        self.cell_inventory.start()
+
+        # Applies the power on/off decisions in the background with per-node pacing
+        self.actuation = ActuationScheduler(
+            self.ncmp_client,
+            node_interval=self.actuation_node_interval,
+            max_rate=self.actuation_max_rate,
+            max_workers=self.actuation_max_workers
+        )
+
         self.inference_lock = Lock()
         self._running = False
-
+        self._stopped = Event()
+
+    def config(self):
+        rapp_config = get_config().get("RAPP", {})
+        self.actuation_node_interval = float(rapp_config.get("actuation_node_interval", 3))
+        self.actuation_max_rate = float(rapp_config.get("actuation_max_rate", 10))
+        self.actuation_max_workers = int(rapp_config.get("actuation_max_workers", 8))
+        self.teiv_inventory_ttl = float(rapp_config.get("teiv_inventory_ttl", 300))
+        # "poll" runs inference every poll_interval seconds, "kafka" when PM events arrive
+        self.trigger = rapp_config.get("trigger", "poll")
+        self.poll_interval = float(rapp_config.get("poll_interval", 10))
+        self.events_config = get_config().get("EVENTS", {})
+
+    def prefetch_services(self, use_sme_db, use_kserve=True):
+        sme_config = get_config().get("SME", {})
+        names = ["ncmp", "teiv"] + (["kserve"] if use_kserve else []) + (["influxdb"] if use_sme_db else [])
+        get_discovery_cache().prefetch([
+            (sme_config.get(f"{name}_invoker_id"), sme_config.get(f"{name}_api_name"), sme_config.get(f"{name}_resource_name"))
+            for name in names
+        ])
 
     def entry(self):
         if self._running:
@@ -78,45 +137,96 @@ class ESrapp():
             return
 
         self._running = True
-        self.job = schedule.every(10).seconds.do(self.safe_inference)
-        last_run = 0
+        self._stopped.clear()
 
         try:
-            while self._running:
-                now = time.time()
-                if now - last_run >= 10:  # 10 second interval
-                    self.safe_inference()
-                    last_run = now
-                time.sleep(1)
+            if self.trigger == "kafka":
+                self.run_event_driven()
+            else:
+                self.run_polling()
 
         except KeyboardInterrupt:
             logger.info("ES rApp shutting down gracefully")
         except Exception as e:
             logger.error(f"Error in entry loop: {str(e)}", exc_info=True)
         finally:
-            try:
-                schedule.cancel_job(self.job)
-            except:
-                pass
             self._running = False
+            self.actuation.shutdown(wait=False)
+            self.cell_inventory.stop()
+            # Flushes the sampled request capture, if enabled
+            self.predictor.close()
             try:
                 if self.inference_lock.locked():
                     self.inference_lock.release()
             except:
                 pass
 
-    def safe_inference(self):
+    def stop(self):
+        self._running = False
+        self._stopped.set()
+
+    def run_polling(self):
+        while self._running:
+            started = time.monotonic()
+            self.safe_inference()
+            self._stopped.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def run_event_driven(self):
+        # Inference only runs when PM reports arrive, once they have settled for debounce seconds
+        debouncer = Debouncer(
+            self.on_pm_data_changed,
+            delay=float(self.events_config.get("debounce", 5)),
+            max_delay=float(self.events_config.get("max_delay", 30))
+        )
+        listener = PmEventListener(
+            debouncer,
+            bootstrap_servers=self.events_config.get("bootstrap_servers", "localhost:9092"),
+            topic=self.events_config.get("topic", "pmreports"),
+            group_id=self.events_config.get("group_id", "es-rapp")
+        )
+        listener.start()
+        # Run once at startup so cells are evaluated before the first report arrives
+        debouncer.notify(None)
+        try:
+            while self._running:
+                self._stopped.wait(1)
+        finally:
+            listener.stop()
+
+    def on_pm_data_changed(self, nodes):
+        measurements = self.measurements_for_nodes(nodes)
+        if measurements is not None and not measurements:
+            logger.debug(f"PM data of nodes {nodes} is not used by this rApp, skipping inference.")
+            return
+        logger.info(f"PM data changed for nodes {sorted(nodes) if nodes else 'all'}, running inference.")
+        self.safe_inference(measurements, nodes)
+
+    def measurements_for_nodes(self, nodes):
+        # Measurements to re-read for the changed nodes, None for all of them.
+        # Measurements that do not name a ManagedElement are shared by the nodes; read_data
+        # narrows them to the changed nodes by their node tag.
+        if nodes is None:
+            return None
+        measurements = self.db.measurements
+        if isinstance(measurements, str):
+            measurements = [measurements]
+        return [
+            measurement for measurement in measurements
+            if "ManagedElement=" not in measurement or self.extract_managed_element(measurement) in nodes
+        ]
+
+    def safe_inference(self, measurements=None, nodes=None):
         if not self.inference_lock.acquire(blocking=False):
             logger.warning("Previous inference still running, skipping this iteration")
             return
 
         try:
-            self.inference()
+            self.inference(measurements, nodes)
         finally:
             self.inference_lock.release()
     # Send data to ML rApp
-    def inference(self):
-        data = self.db.read_data()
+    def inference(self, measurements=None, nodes=None):
+        data = self.db.read_data(measurements=measurements, nodes=nodes)
 
         if data.empty:
             logger.info("No data to process... skipping this iteration of inference.")
@@ -124,51 +234,79 @@ class ESrapp():
 
         data_mapping = self.mapping(data)
         # Group the data by CellID and _measurement. This means that even if cell ids are the same, but the measurement is different, they will be processed separately.
-        groups = data_mapping.groupby(["CellID", "_measurement"])
-        for group_name, group_data in groups:
-            json_data = self.generate_json_data(group_data)
-            logger.info(f"Send data to ML rApp {group_name}: {json_data}")
-            status_code, response_text = self.assist.send_request_to_server(json_data, randomize=self.random_predictions)
-            if not self.check_and_perform_action(response_text):
-                cell_id_name = group_data['CellID'].iloc[0]
-                # Check if the cell is in TEIV
-                self.check_cell_in_teiv(cell_id_name)
-                du_name = self.extract_managed_element(group_data['_measurement'].iloc[0])
-                cell_with_node = cell_id_name + "_" + du_name
-                logger.info(f"Turn on the cell {group_name}")
-                # Wait for 3 seconds before performing the action
-                time.sleep(3)
-
-                if cell_with_node not in self.cell_power_status:
-                    logger.debug(f"Cell {cell_with_node} not in local cache. Adding it...")
-                    self.cell_power_status[cell_with_node] = "off"
-                # Check if the cell is already powered on
-                if self.cell_power_status[cell_with_node] == "on":
-                    logger.debug(f"Cell {cell_with_node} is already powered on.")
-                    # continue
-                else:
-                    self.ncmp_client.power_on_cell(cell_with_node)
-                    self.cell_power_status[cell_with_node] = "on"
-            else:
-                du_name = self.extract_managed_element(group_data['_measurement'].iloc[0])
-                cell_id_name = group_data['CellID'].iloc[0]
-                # Check if the cell is in TEIV
-                self.check_cell_in_teiv(cell_id_name)
-                cell_with_node = cell_id_name + "_" + du_name
-                logger.info(f"Turn off the cell {group_name}")
-                # Wait for 3 seconds before performing the action
-                time.sleep(3)
-
-                if cell_with_node not in self.cell_power_status:
-                    logger.debug(f"Cell {cell_with_node} not in local cache. Adding it...")
-                    self.cell_power_status[cell_with_node] = "on"
-
-                if self.cell_power_status[cell_with_node] == "off":
-                    logger.debug(f"Cell {cell_with_node} is already powered off.")
-                    # continue
-                else:
-                    if self.ncmp_client.power_off_cell(cell_with_node):
-                        self.cell_power_status[cell_with_node] = "off"
+        groups = self.build_feature_windows(data_mapping)
+        for group_name, prediction in self.predict_groups(groups):
+            power_off = self.should_power_off([prediction])
+            state = POWER_OFF if power_off else POWER_ON
+
+            cell_id_name, measurement = group_name
+            # Check if the cell is in TEIV
+            self.check_cell_in_teiv(cell_id_name)
+            du_name = self.extract_managed_element(measurement)
+            cell_with_node = cell_id_name + "_" + du_name
+            logger.info(f"Turn {state} the cell {group_name}")
+
+            if cell_with_node not in self.cell_power_status:
+                logger.debug(f"Cell {cell_with_node} not in local cache. Adding it...")
+                self.cell_power_status[cell_with_node] = POWER_ON if power_off else POWER_OFF
+
+            # An intent that is still queued or running decides where the cell is heading,
+            # so reverting to the applied state replaces it instead of being skipped
+            target = self.actuation.intended_action(cell_with_node) or self.cell_power_status[cell_with_node]
+            if target == state:
+                logger.debug(f"Cell {cell_with_node} is already powered {state}.")
+                continue
+
+            # The scheduler paces the NCMP requests per node, so the inference loop does not wait for them
+            future, created = self.actuation.submit(cell_with_node, state)
+            if created:
+                future.add_done_callback(partial(self.on_actuation_complete, cell_with_node, state))
+
+    def on_actuation_complete(self, cell_with_node, state, future):
+        if future.cancelled():
+            logger.debug(f"Power-{state} of cell {cell_with_node} was superseded by a newer decision.")
+            return
+        if future.exception() is not None:
+            logger.error(f"Power-{state} of cell {cell_with_node} failed: {future.exception()}")
+            return
+        if future.result():
+            self.cell_power_status[cell_with_node] = state
+            logger.info(f"Cell {cell_with_node} is now powered {state}.")
+        else:
+            logger.warning(f"Power-{state} of cell {cell_with_node} was not applied.")
+
+    # Predict all cell groups with one predictor call per batch and yield (group_name, prediction)
+    def predict_groups(self, groups):
+        # Bucket the windows by length so every instance in a request has the same shape
+        buckets = {}
+        for group_name, window in groups:
+            buckets.setdefault(window.shape[0], []).append((group_name, window))
+
+        batch_size = self.predictor.batch_size
+        batches = [
+            bucket[i:i + batch_size]
+            for bucket in buckets.values()
+            for i in range(0, len(bucket), batch_size)
+        ]
+
+        for batch in batches:
+            instances = np.stack([window for _, window in batch])
+            logger.info(f"Send {len(batch)} cells to ML rApp: {[group_name for group_name, _ in batch]}")
+            yield from self.scatter_predictions(batch, instances)
+
+    def scatter_predictions(self, batch, instances):
+        try:
+            predictions = self.predictor.predict(instances)
+        except Exception as e:
+            logger.error(f"Batch prediction request failed: {str(e)}", exc_info=True)
+            return
+
+        if predictions is None:
+            logger.error(f"No predictions returned for {len(batch)} cells, skipping them this iteration.")
+            return
+
+        for (group_name, _), prediction in zip(batch, predictions):
+            yield group_name, prediction
 
     def extract_managed_element(self, measurement):
         if '=' not in measurement or ',' not in measurement:
@@ -180,42 +318,52 @@ class ESrapp():
                 return part.split('=')[1]
 
         return measurement
-    # Generate the input data for ML rApp
-    def generate_json_data(self, data):
-        # rrc_conn_mean_values = data["RRC.ConnMean"].tolist()
-        drb_ue_thp_ul_values = data["DRB.UEThpUl"].tolist()
-        rru_prb_used_ul_values = data["RRU.PrbUsedUl"].tolist()
-        pee_avg_power_values = data["PEE.AvgPower"].tolist()
-
-        instances = [
-            [
-                [drb, rru, pee]
-                for drb, rru, pee in zip(
-                drb_ue_thp_ul_values,
-                rru_prb_used_ul_values,
-                pee_avg_power_values
-            )
-            ]
+    # Split the feature columns into one contiguous float32 window per (CellID, _measurement) group
+    def build_feature_windows(self, data):
+        if data.empty:
+            return []
+        sort_columns = ["CellID", "_measurement"] + (["_time"] if "_time" in data.columns else [])
+        data = data.sort_values(by=sort_columns, kind="stable")
+        features = data[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+
+        cell_ids = data["CellID"].to_numpy()
+        measurements = data["_measurement"].to_numpy()
+        boundaries = np.flatnonzero((cell_ids[1:] != cell_ids[:-1]) | (measurements[1:] != measurements[:-1])) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(data)]))
+
+        return [
+            ((cell_ids[start], measurements[start]), features[start:end])
+            for start, end in zip(starts, ends)
         ]
 
-        json_data = {"signature_name": "serving_default", "instances": instances}
-        logger.debug(f'Generated JSON data: {json_data}')
-        return json_data
     # Mapping CellID and Cell name
     def mapping(self, data):
         data = pd.DataFrame(data)
-        # TODO: This regex is not likely to match all cell IDs. Will need to be improved.
-        data[['S', 'B', 'C']] = data['CellID'].str.extract(r'S(\d+)-[BN](\d+)-C(\d+)')
-        data[['S', 'B', 'C']] = data[['S', 'B', 'C']].astype(int)
-        data = data.sort_values(by=['B', 'S', 'C'])
-        data['cellidnumber'] = data.groupby(['B', 'S', 'C']).ngroup().add(1)
-        data = data.drop(['S', 'B', 'C'], axis=1)
-        return data
-
+        # Only cell IDs that were not seen before are parsed, the rest come from the cache
+        unique_ids = data['CellID'].unique()
+        new_ids = [cell_id for cell_id in unique_ids if cell_id not in self.cell_id_cache]
+        if new_ids:
+            # TODO: This regex is not likely to match all cell IDs. Will need to be improved.
+            parsed = pd.Series(new_ids).str.extract(r'S(\d+)-[BN](\d+)-C(\d+)')
+            for cell_id, (s, b, c) in zip(new_ids, parsed.itertuples(index=False)):
+                self.cell_id_cache[cell_id] = None if pd.isna(s) else (int(s), int(b), int(c))
+
+        unmatched = [cell_id for cell_id in unique_ids if self.cell_id_cache[cell_id] is None]
+        if unmatched:
+            logger.warning(f"Skipping cells with unrecognised IDs: {unmatched}")
+            data = data[~data['CellID'].isin(unmatched)]
+            unique_ids = [cell_id for cell_id in unique_ids if cell_id not in unmatched]
+
+        parts = pd.DataFrame([self.cell_id_cache[cell_id] for cell_id in unique_ids], index=unique_ids, columns=['S', 'B', 'C'])
+        cell_numbers = parts.groupby(['B', 'S', 'C']).ngroup().add(1)
+        return data.assign(cellidnumber=data['CellID'].map(cell_numbers))
 
     def check_and_perform_action(self, data):
         response_obj = json.loads(data)
-        predictions = response_obj.get('predictions')
+        return self.should_power_off(response_obj.get('predictions'))
+
+    def should_power_off(self, predictions):
         if predictions:
             for prediction in predictions:
                 if all(pred < 0.04 for pred in prediction):
@@ -226,10 +374,8 @@ class ESrapp():
 
     # Check if the cell is in TEIV cell inventory
     def check_cell_in_teiv(self, cell_id):
-        # Check if the cell ID is in the TEIV cell inventory
-        self.teiv_cells = self.teiv_client.get_nrcelldus()
-
-        if cell_id in self.teiv_cells:
+        # Check if the cell ID is in the cached TEIV cell inventory
+        if self.cell_inventory.contains(cell_id):
             logger.info(f"Cell {cell_id} is in the TEIV cell inventory.")
         else:
             logger.info(f"Cell {cell_id} is not in the TEIV cell inventory.")
@@ -251,9 +397,12 @@ if __name__ == "__main__":
     parser.add_argument("--generate_db_data", type=str2bool, default=True, help="Set to True to generate data in db.")
     parser.add_argument("--use_sme_db", type=str2bool, default=False, help="Set to True use SME url for DB.")
     parser.add_argument("--random_predictions", type=str2bool, default=False, help="Set to True to generate random predictions.")
+    parser.add_argument("--seed_rows", type=int, default=0, help="Bulk write this many synthetic rows instead of the small demo data set.")
     args = parser.parse_args()
 
-    rapp = ESrapp(generate_db_data=args.generate_db_data, use_sme_db=args.use_sme_db, random_predictions=args.random_predictions)
+    rapp = ESrapp(generate_db_data=args.generate_db_data, use_sme_db=args.use_sme_db, random_predictions=args.random_predictions, seed_rows=args.seed_rows)
     logger.debug("ES xApp starting")
 
+    # Kubernetes stops the pod with SIGTERM; leave the loop so entry() shuts down cleanly
+    signal.signal(signal.SIGTERM, lambda signum, frame: rapp.stop())
     rapp.entry()
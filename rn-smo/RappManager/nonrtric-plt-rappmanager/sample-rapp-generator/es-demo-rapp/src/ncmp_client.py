@@ -15,19 +15,27 @@
 #  ============LICENSE_END=================================================
 #
 
-import json
 import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from sme_client import SMEClient
+from http_transport import get_transport
+from rapp_config import get_config
+from sme_client import get_discovery_cache
 
 logger = logging.getLogger(__name__)
 
-class NCMP_CLIENT(object):
-    def __init__(self):
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+ADMINISTRATIVE_STATES = {"off": "LOCKED", "on": "UNLOCKED"}
+
+# Status codes with which a DMI plugin rejects a PATCH on the GNBDUFunction itself.
+# A 400 or 404 is a data error or a CM handle that is not synced yet, not a missing feature
+NODE_PATCH_UNSUPPORTED = (405, 501)
+
 
-        sme_config = config.get("SME", {})
+class NCMP_CLIENT(object):
+    def __init__(self, ncmp_uri=None):
+        sme_config = get_config().get("SME", {})
         self.host = sme_config.get("host")
         self.port = sme_config.get("port")
         self.ncmp_invoker_id = sme_config.get("ncmp_invoker_id")
@@ -35,87 +43,156 @@ class NCMP_CLIENT(object):
         self.ncmp_resource_name = sme_config.get("ncmp_resource_name")
         self.ncmp_me = sme_config.get("ncmp_managed_element_id", "ManagedElement-002")
         self.ncmp_gnb = sme_config.get("ncmp_gnbdufunction_id", "GNBDUFunction-001")
+        # Optional per-node overrides: {"<cm handle>": {"managed_element_id": ..., "gnbdufunction_id": ...}}
+        self.ncmp_nodes = sme_config.get("ncmp_nodes", {})
+        # "cell" sends one PATCH per cell, "node" one PATCH per GNBDUFunction with all its cells
+        self.bulk_mode = sme_config.get("ncmp_bulk_mode", "cell")
+        self.max_workers = int(sme_config.get("ncmp_max_workers", 8))
         self.resourse_identifier = sme_config.get("resource_id")
-        self.ncmp_uri = None
-
-        sme_client = SMEClient(
-            invoker_id=self.ncmp_invoker_id,
-            api_name=self.ncmp_api_name,
-            resource_name=self.ncmp_resource_name
-        )
+        self.node_patch_unsupported = set()
+        self.static_uri = ncmp_uri
 
-        self.ncmp_uri = sme_client.discover_service()
+        self.ncmp_uri = ncmp_uri or get_discovery_cache().get(self.ncmp_invoker_id, self.ncmp_api_name, self.ncmp_resource_name)
 
         print("Discovered NCMP URI: ", self.ncmp_uri)
 
     def power_off_cell(self, cell_with_node):
+        return self.set_administrative_state(cell_with_node, "off")
 
-        passthrough_request = self.make_passthrough_request(cell_with_node)
-        # This log is all it does in testing
-        logger.info("Powering-off cell " + str(cell_with_node) + " in progress...")
+    def power_on_cell(self, cell_with_node):
+        return self.set_administrative_state(cell_with_node, "on")
+
+    def set_administrative_state(self, cell_with_node, action, ncmp_uri=None):
+        passthrough_request = self.make_passthrough_request(cell_with_node, ncmp_uri)
+        logger.info(f"Powering-{action} cell {cell_with_node} in progress...")
 
-        # It expects the SME ncmp endpoint to call power off
-        # endpoint_with_query = f"{endpoint}?resourceIdentifier={self.resourse_identifier}"
-        #
         headers = {
             "Content-Type": "application/json"
         }
 
         body = {
             "attributes": {
-                "administrativeState": "LOCKED"
+                "administrativeState": ADMINISTRATIVE_STATES[action]
             }
         }
 
-        response = requests.patch(passthrough_request, json=body, headers=headers)
+        response = self.send_patch(passthrough_request, body, headers)
 
         if response.status_code == 200:
-            logger.info("Power-off successful. " + response.text)
+            logger.info(f"Power-{action} successful. " + response.text)
             return True
         else:
-            logger.error(f"Error in connection to NCMP for power off: {response.status_code}")
+            logger.error(f"Error in connection to NCMP for power {action}: {response.status_code}")
             logger.error(response.text)
             return False
 
-    def power_on_cell(self, cell_with_node):
-
-        # This log is all it does in testing
-        passthrough_request = self.make_passthrough_request(cell_with_node)
-        logger.info("Powering-on cell " + str(cell_with_node) + " in progress...")
-
-        # It expects the SME ncmp endpoint to call power on
-        # endpoint_with_query = f"{endpoint}?resourceIdentifier={self.resourse_identifier}"
-
-        headers = {
-            "Content-Type": "application/json"
-        }
-
+    def bulk_actuate(self, intents):
+        """
+        Applies many power on/off intents and returns {cell_with_node: success}.
+
+        intents maps "<cell>_<node>" to "on" or "off". In "node" mode the intents are
+        grouped per node and each node is actuated with one request, in "cell" mode every
+        cell gets its own PATCH. Requests run on at most max_workers threads and the NCMP
+        URI is resolved once for the whole call.
+        """
+        ncmp_uri = self.resolve_ncmp_uri()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ncmp-bulk") as executor:
+            if self.bulk_mode == "node":
+                by_node = defaultdict(dict)
+                for cell_with_node, action in intents.items():
+                    by_node[cell_with_node.split('_')[1]][cell_with_node] = action
+                futures = [executor.submit(self.actuate_node, node_id, node_intents, ncmp_uri)
+                           for node_id, node_intents in by_node.items()]
+            else:
+                futures = [executor.submit(self.actuate_cells, {cell_with_node: action}, ncmp_uri)
+                           for cell_with_node, action in intents.items()]
+
+            results = {}
+            for future in futures:
+                results.update(future.result())
+        return results
+
+    def actuate_cells(self, intents, ncmp_uri=None):
+        results = {}
+        for cell_with_node, action in intents.items():
+            try:
+                results[cell_with_node] = self.set_administrative_state(cell_with_node, action, ncmp_uri)
+            except requests.RequestException as e:
+                logger.error(f"Power-{action} of cell {cell_with_node} failed: {str(e)}")
+                results[cell_with_node] = False
+        return results
+
+    def actuate_node(self, node_id, intents, ncmp_uri=None):
+        """
+        Sets the administrative state of several cells of one node with a single PATCH
+        on its GNBDUFunction. Nodes whose DMI plugin rejects that fall back to one PATCH
+        per cell, now and for later calls.
+        """
+        if self.bulk_mode != "node" or node_id in self.node_patch_unsupported or len(intents) == 1:
+            return self.actuate_cells(intents, ncmp_uri)
+
+        ncmp_uri = ncmp_uri or self.resolve_ncmp_uri()
+        managed_element, gnbdufunction = self.node_path(node_id)
+        url = (f"{ncmp_uri}ncmp/v1/ch/{node_id}/data/ds/ncmp-datastore%3Apassthrough-running"
+               f"?resourceIdentifier=/_3gpp-common-managed-element:ManagedElement={managed_element}"
+               f"/_3gpp-nr-nrm-gnbdufunction:GNBDUFunction={gnbdufunction}")
         body = {
-            "attributes": {
-                "administrativeState": "UNLOCKED"
-            }
+            "_3gpp-nr-nrm-nrcelldu:NRCellDU": [
+                {"id": cell_with_node.split('_')[0], "attributes": {"administrativeState": ADMINISTRATIVE_STATES[action]}}
+                for cell_with_node, action in intents.items()
+            ]
         }
+        logger.info(f"Actuating {len(intents)} cells of node {node_id} in one request...")
+
+        try:
+            response = self.send_patch(url, body, {"Content-Type": "application/json"})
+        except requests.RequestException as e:
+            logger.error(f"Bulk actuation of node {node_id} failed: {str(e)}")
+            return {cell_with_node: False for cell_with_node in intents}
+
+        if response.status_code in NODE_PATCH_UNSUPPORTED:
+            logger.warning(f"Node {node_id} does not accept bulk PATCHes ({response.status_code}), falling back to per-cell PATCHes.")
+            self.node_patch_unsupported.add(node_id)
+            return self.actuate_cells(intents, ncmp_uri)
+
+        success = response.status_code == 200
+        if not success:
+            logger.error(f"Error in connection to NCMP for bulk actuation of node {node_id}: {response.status_code}")
+            logger.error(response.text)
+        return {cell_with_node: success for cell_with_node in intents}
 
-        response = requests.patch(passthrough_request, json=body, headers=headers)
+    def send_patch(self, url, body, headers):
+        try:
+            return get_transport().patch(url, json=body, headers=headers)
+        except requests.ConnectionError:
+            if self.static_uri is None:
+                get_discovery_cache().invalidate(self.ncmp_invoker_id, self.ncmp_api_name, self.ncmp_resource_name)
+            raise
 
-        if response.status_code == 200:
-            logger.info("Power-on successful. " + response.text)
-            return True
-        else:
-            logger.error(f"Error in connection to NCMP for power on: {response.status_code}")
-            logger.error(response.text)
-            return False
+    def resolve_ncmp_uri(self):
+        # Resolved through the discovery cache so an expired or invalidated URL is discovered again
+        if self.static_uri is None:
+            self.ncmp_uri = get_discovery_cache().get(self.ncmp_invoker_id, self.ncmp_api_name, self.ncmp_resource_name)
+        return self.ncmp_uri
+
+    def node_path(self, node_id):
+        node = self.ncmp_nodes.get(node_id, {})
+        return node.get("managed_element_id", self.ncmp_me), node.get("gnbdufunction_id", self.ncmp_gnb)
+
+    def make_passthrough_request(self, cell_with_node, ncmp_uri=None):
+        ncmp_uri = ncmp_uri or self.resolve_ncmp_uri()
 
-    def make_passthrough_request(self, cell_with_node):
         node_id = cell_with_node.split('_')[1]
         cell_id = cell_with_node.split('_')[0]
+        managed_element, gnbdufunction = self.node_path(node_id)
 
         endpoint = f"ncmp/v1/ch/{node_id}/data/ds/ncmp-datastore%3Apassthrough-running"
-        query_param = (f"?resourceIdentifier=/_3gpp-common-managed-element:ManagedElement={self.ncmp_me}"
-                       f"/_3gpp-nr-nrm-gnbdufunction:GNBDUFunction={self.ncmp_gnb}"
+        query_param = (f"?resourceIdentifier=/_3gpp-common-managed-element:ManagedElement={managed_element}"
+                       f"/_3gpp-nr-nrm-gnbdufunction:GNBDUFunction={gnbdufunction}"
                        f"/_3gpp-nr-nrm-nrcelldu:NRCellDU={cell_id}/attributes")
 
-        return f"{self.ncmp_uri}{endpoint}{query_param}"
+        return f"{ncmp_uri}{endpoint}{query_param}"
 
 # if __name__ == "__main__":
 #     logging.basicConfig(level=logging.INFO)  # Set up logging for better visibility
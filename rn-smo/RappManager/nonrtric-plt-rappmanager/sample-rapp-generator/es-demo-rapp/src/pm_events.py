@@ -0,0 +1,183 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def nodes_from_event(event):
+    """
+    Returns the ManagedElement names a PM report refers to, or None if it names none.
+
+    Understands the VES perf3gpp reports the RAN PM pipeline publishes to Kafka
+    (sourceName, measuredEntityDn and measObjInstId).
+    """
+    event = event.get("event", event) if isinstance(event, dict) else {}
+    nodes = set()
+
+    source_name = event.get("commonEventHeader", {}).get("sourceName")
+    if source_name:
+        nodes.add(source_name)
+
+    collection = event.get("perf3gppFields", {}).get("measDataCollection", {})
+    dns = [collection.get("measuredEntityDn", "")]
+    for meas_info in collection.get("measInfoList", []):
+        dns.extend(values.get("measObjInstId", "") for values in meas_info.get("measValuesList", []))
+    for dn in dns:
+        for part in dn.split(','):
+            if part.startswith("ManagedElement="):
+                nodes.add(part.split('=', 1)[1])
+
+    return nodes or None
+
+
+class Debouncer(object):
+    """
+    Collects change notifications and runs the callback once they settle.
+
+    The callback gets the set of changed keys, or None when a change could not be
+    attributed and everything has to be refreshed. It runs delay seconds after the
+    last notification, but never later than max_delay seconds after the first one.
+    It runs on the debouncer's own thread, so notifications that arrive while it is
+    busy are collected for the next run.
+    """
+
+    def __init__(self, callback, delay=5.0, max_delay=30.0):
+        self.callback = callback
+        self.delay = delay
+        self.max_delay = max_delay
+
+        self.condition = threading.Condition()
+        self.keys = set()
+        self.refresh_all = False
+        self.first_at = None
+        self.last_at = None
+        self._stopped = False
+        self.thread = threading.Thread(target=self._run, name="pm-debouncer", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def notify(self, keys):
+        with self.condition:
+            if keys is None:
+                self.refresh_all = True
+            else:
+                self.keys.update(keys)
+            now = time.monotonic()
+            if self.first_at is None:
+                self.first_at = now
+            self.last_at = now
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self._stopped and self.first_at is None:
+                    self.condition.wait()
+                if self._stopped:
+                    return
+
+                due = min(self.last_at + self.delay, self.first_at + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+
+                keys = None if self.refresh_all else self.keys
+                self.keys = set()
+                self.refresh_all = False
+                self.first_at = self.last_at = None
+
+            try:
+                self.callback(keys)
+            except Exception as e:
+                logger.error(f"Error handling PM data change: {str(e)}", exc_info=True)
+
+    def stop(self):
+        with self.condition:
+            self._stopped = True
+            self.condition.notify()
+        self.thread.join()
+
+
+class PmEventListener(object):
+    """
+    Consumes PM report events from Kafka and feeds the nodes they refer to into a Debouncer.
+
+    kafka-python is only imported when the listener is started, so polling mode does
+    not need it.
+    """
+
+    def __init__(self, debouncer, bootstrap_servers, topic, group_id="es-rapp"):
+        self.debouncer = debouncer
+        self.bootstrap_servers = bootstrap_servers
+        self.topic = topic
+        self.group_id = group_id
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._consume, name="pm-events", daemon=True)
+
+    def start(self):
+        self.debouncer.start()
+        self.thread.start()
+        logger.info(f"Listening for PM events on Kafka topic {self.topic} at {self.bootstrap_servers}")
+
+    def _consume(self):
+        from kafka import KafkaConsumer
+
+        while not self._stop.is_set():
+            try:
+                consumer = KafkaConsumer(
+                    self.topic,
+                    bootstrap_servers=self.bootstrap_servers,
+                    group_id=self.group_id,
+                    auto_offset_reset="latest",
+                    consumer_timeout_ms=1000
+                )
+            except Exception as e:
+                logger.error(f"Failed to connect to Kafka at {self.bootstrap_servers}: {str(e)}, retrying in 30 seconds...")
+                self._stop.wait(30)
+                continue
+
+            try:
+                while not self._stop.is_set():
+                    # Returns after consumer_timeout_ms without messages, so stop is noticed
+                    for message in consumer:
+                        self.debouncer.notify(self.parse(message.value))
+                        if self._stop.is_set():
+                            break
+            except Exception as e:
+                logger.error(f"Error consuming PM events: {str(e)}")
+                self._stop.wait(5)
+            finally:
+                consumer.close()
+
+    def parse(self, value):
+        try:
+            return nodes_from_event(json.loads(value))
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("Received a PM event that could not be parsed, refreshing all cells.")
+            return None
+
+    def stop(self):
+        self._stop.set()
+        self.thread.join()
+        self.debouncer.stop()
@@ -0,0 +1,157 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+
+import importlib
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def import_runtime(*modules, install):
+    # Imports the first available of modules, or fails with what the image has to install
+    for module in modules:
+        try:
+            return importlib.import_module(module)
+        except ImportError:
+            pass
+    raise RuntimeError(
+        f"The local ES predictor needs {install}, which is not installed. The default alpine "
+        "image only runs the kserve backend, see the README for building an image with a runtime."
+    )
+
+
+class Predictor(object):
+    """
+    Interface of the ES model backends.
+
+    predict takes a float32 tensor of shape (cells, window, features) and returns one
+    prediction (a list of floats) per cell, or None if the backend could not predict.
+    """
+
+    batch_size = 64
+
+    def predict(self, instances):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class KServePredictor(Predictor):
+    # Sends each batch to the es-aiml-model KServe predictor in one request
+
+    def __init__(self, assist, randomize=False):
+        self.assist = assist
+        self.randomize = randomize
+        self.batch_size = assist.batch_size
+
+    def predict(self, instances):
+        json_data = {"signature_name": "serving_default", "instances": instances}
+        _, predictions = self.assist.send_batch_request_to_server(json_data, randomize=self.randomize)
+        return predictions
+
+    def close(self):
+        self.assist.close()
+
+
+class LocalPredictor(Predictor):
+    """
+    Runs the ES model in-process on the CPU.
+
+    The artifact is loaded once and its runtime is picked from the path: *.tflite runs
+    on the TFLite interpreter, *.onnx on ONNX Runtime and anything else is loaded as a
+    TensorFlow SavedModel directory. The runtimes are imported lazily so only the one
+    in use has to be installed; a missing runtime or artifact fails at startup with
+    a RuntimeError.
+    """
+
+    def __init__(self, model_path, batch_size=256):
+        self.model_path = model_path
+        self.batch_size = batch_size
+
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"The local ES model {model_path} does not exist, check PREDICTOR.model_path.")
+        if model_path.endswith(".tflite"):
+            self._run = self._load_tflite(model_path)
+        elif model_path.endswith(".onnx"):
+            self._run = self._load_onnx(model_path)
+        else:
+            self._run = self._load_saved_model(model_path)
+        logger.info(f"Loaded local ES model from {model_path}")
+
+    def _load_saved_model(self, model_path):
+        tf = import_runtime("tensorflow", install="tensorflow")
+
+        serving_fn = tf.saved_model.load(model_path).signatures["serving_default"]
+        input_name = next(iter(serving_fn.structured_input_signature[1]))
+
+        def run(batch):
+            outputs = serving_fn(**{input_name: tf.constant(batch)})
+            return next(iter(outputs.values())).numpy()
+        return run
+
+    def _load_tflite(self, model_path):
+        Interpreter = import_runtime(
+            "tflite_runtime.interpreter", "ai_edge_litert.interpreter", "tensorflow.lite.python.interpreter",
+            install="tflite-runtime, ai-edge-litert or tensorflow"
+        ).Interpreter
+
+        interpreter = Interpreter(model_path=model_path)
+        input_index = interpreter.get_input_details()[0]["index"]
+        output_index = interpreter.get_output_details()[0]["index"]
+        allocated_shape = [None]
+
+        def run(batch):
+            if allocated_shape[0] != batch.shape:
+                interpreter.resize_tensor_input(input_index, batch.shape)
+                interpreter.allocate_tensors()
+                allocated_shape[0] = batch.shape
+            interpreter.set_tensor(input_index, batch)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_index)
+        return run
+
+    def _load_onnx(self, model_path):
+        onnxruntime = import_runtime("onnxruntime", install="onnxruntime")
+
+        session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+
+        def run(batch):
+            return session.run(None, {input_name: batch})[0]
+        return run
+
+    def predict(self, instances):
+        instances = np.ascontiguousarray(instances, dtype=np.float32)
+        outputs = [
+            self._run(instances[start:start + self.batch_size])
+            for start in range(0, len(instances), self.batch_size)
+        ]
+        return np.concatenate(outputs).tolist()
+
+
+def create_predictor(predictor_config, assist=None, randomize=False):
+    backend = predictor_config.get("backend", "kserve")
+    if backend == "local" and not randomize:
+        model_path = predictor_config.get("model_path", os.path.join("models", "es-aiml-model"))
+        return LocalPredictor(model_path, batch_size=int(predictor_config.get("batch_size", 256)))
+    if backend not in ("kserve", "local"):
+        raise ValueError(f"Unknown predictor backend: {backend}")
+    return KServePredictor(assist, randomize=randomize)
@@ -0,0 +1,114 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+
+def _gzip_namer(name):
+    return name + ".gz"
+
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _to_json(value):
+    # numpy arrays and scalars are written as plain lists and numbers
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RequestCapture(object):
+    """
+    Samples prediction requests and their responses into a capture file.
+
+    Sampled requests are handed to a background thread, which serialises them as
+    JSON lines into a size-rotated file; rotated files are gzip-compressed. When the
+    queue is full, samples are dropped rather than blocking the caller. Useful for
+    debugging and for building replay corpora.
+    """
+
+    def __init__(self, path, sample_rate=0.01, max_bytes=10 * 1024 * 1024, backup_count=5, queue_size=1000):
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.handler.namer = _gzip_namer
+        self.handler.rotator = _gzip_rotator
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self._write_loop, name="request-capture", daemon=True)
+        self.thread.start()
+        logger.info(f"Capturing {sample_rate:.2%} of prediction requests to {path}")
+
+    @classmethod
+    def from_config(cls, capture_config):
+        # Returns None when capturing is disabled, which is the default
+        if not capture_config.get("enabled", False):
+            return None
+        return cls(
+            path=capture_config.get("path", "capture/kserve_requests.jsonl"),
+            sample_rate=float(capture_config.get("sample_rate", 0.01)),
+            max_bytes=int(capture_config.get("max_bytes", 10 * 1024 * 1024)),
+            backup_count=int(capture_config.get("backup_count", 5))
+        )
+
+    def capture(self, request, status_code=None, response=None):
+        if random.random() >= self.sample_rate:
+            return
+        try:
+            self.queue.put_nowait({"time": time.time(), "request": request, "status_code": status_code, "response": response})
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
+
+    def _write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                record = logging.makeLogRecord({"msg": json.dumps(item, default=_to_json)})
+                self.handler.handle(record)
+            except Exception as e:
+                logger.error(f"Failed to write captured request: {e}")
+
+    def close(self):
+        # Writes out the samples still queued, then flushes and closes the capture file
+        self.queue.put(None)
+        self.thread.join()
+        self.handler.close()
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} captured requests because the capture queue was full")
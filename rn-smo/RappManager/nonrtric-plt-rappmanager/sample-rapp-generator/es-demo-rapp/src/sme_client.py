@@ -17,7 +17,11 @@
 
 import requests
 import logging
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http_transport import get_transport
+from rapp_config import get_config
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +33,7 @@ class SMEClient:
         self.api_name = api_name
         self.resource_name = resource_name
 
-        with open('config.json', 'r') as f:
-            config = json.load(f)
-
-        sme_config = config.get("SME", {})
+        sme_config = get_config().get("SME", {})
         self.host = sme_config.get("host")
         self.port = sme_config.get("port")
         self.sme_discovery_endpoint = sme_config.get("sme_discovery_endpoint")
@@ -45,7 +46,7 @@ class SMEClient:
         logger.info(f"Full URL for service discovery: {full_url}")
 
         try:
-            response = requests.get(full_url, headers={"Content-Type": "application/json"})
+            response = get_transport().get(full_url, headers={"Content-Type": "application/json"})
             if response.status_code == 200:
                 logger.info("Service discovery successful.")
                 return self.parse_uri(response.json())
@@ -76,4 +77,61 @@ class SMEClient:
             return f"http://{ipv4_addr}:{port}{uri}" if uri else f"http://{ipv4_addr}:{port}"
         except (KeyError, IndexError, TypeError) as e:
             logger.error(f"Error parsing URI: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+class ServiceDiscoveryCache(object):
+    """
+    Caches SME discovery results keyed by (invoker_id, api_name, resource_name).
+
+    Entries expire after ttl seconds and are discovered again on the next lookup.
+    Clients invalidate an entry when they fail to connect to the discovered URL,
+    and prefetch runs the discovery of several services in parallel at startup.
+    Failed discoveries are not cached.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.entries = {}  # (invoker_id, api_name, resource_name) -> (url, discovered_at)
+        self.lock = threading.Lock()
+
+    def get(self, invoker_id, api_name, resource_name):
+        key = (invoker_id, api_name, resource_name)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+
+        url = SMEClient(invoker_id=invoker_id, api_name=api_name, resource_name=resource_name).discover_service()
+        if url is not None:
+            with self.lock:
+                self.entries[key] = (url, time.monotonic())
+        elif entry is not None:
+            logger.warning(f"Service discovery for {api_name} failed, using the previously discovered URL.")
+            return entry[0]
+        return url
+
+    def prefetch(self, services):
+        services = [service for service in set(services) if all(service)]
+        if not services:
+            return
+        with ThreadPoolExecutor(max_workers=len(services)) as executor:
+            list(executor.map(lambda service: self.get(*service), services))
+
+    def invalidate(self, invoker_id, api_name, resource_name):
+        with self.lock:
+            if self.entries.pop((invoker_id, api_name, resource_name), None) is not None:
+                logger.info(f"Invalidated the discovered URL for {api_name}.")
+
+
+_discovery_cache = None
+_discovery_cache_lock = threading.Lock()
+
+
+def get_discovery_cache():
+    global _discovery_cache
+    with _discovery_cache_lock:
+        if _discovery_cache is None:
+            ttl = float(get_config().get("SME", {}).get("discovery_ttl", 300))
+            _discovery_cache = ServiceDiscoveryCache(ttl=ttl)
+        return _discovery_cache
@@ -15,20 +15,20 @@
 #  ============LICENSE_END=================================================
 #
 
-import json
 import logging
+import threading
+import time
 import requests
 import urllib.parse
-from sme_client import SMEClient
+from http_transport import get_transport
+from rapp_config import get_config
+from sme_client import get_discovery_cache
 
 logger = logging.getLogger(__name__)
 
 class TEIV_CLIENT(object):
     def __init__(self):
-        with open('config.json', 'r') as f:
-            config = json.load(f)
-
-        sme_config = config.get("SME", {})
+        sme_config = get_config().get("SME", {})
         self.host = sme_config.get("host")
         self.port = sme_config.get("port")
         self.teiv_invoker_id = sme_config.get("teiv_invoker_id")
@@ -37,17 +37,23 @@ class TEIV_CLIENT(object):
         self.odufunction_id = sme_config.get("odufunction_id")
         self.teiv_uri = None
 
-        sme_client = SMEClient(
-            invoker_id=self.teiv_invoker_id,
-            api_name=self.teiv_api_name,
-            resource_name=self.teiv_resource_name
-        )
-
-        self.teiv_uri = sme_client.discover_service() + "topology-inventory/v1alpha11/"
+        self.teiv_uri = self.resolve_teiv_uri()
 
         print("Discovered TEIV URI: ", self.teiv_uri)
 
+    def resolve_teiv_uri(self):
+        # Resolved through the discovery cache so an expired or invalidated URL is discovered again
+        base_uri = get_discovery_cache().get(self.teiv_invoker_id, self.teiv_api_name, self.teiv_resource_name)
+        if base_uri is None:
+            return None
+        return base_uri + "topology-inventory/v1alpha11/"
+
     def get_nrcelldus(self):
+        self.teiv_uri = self.resolve_teiv_uri()
+        if self.teiv_uri is None:
+            logger.error("TEIV URL is not available, cannot query NRCellDUs.")
+            return None
+
         odufunction_id = self.odufunction_id
         scope_filter = f"/provided-by-oduFunction[@id=\"{odufunction_id}\"]"
         encoded_scope_filter = urllib.parse.quote(scope_filter)
@@ -56,7 +62,11 @@ class TEIV_CLIENT(object):
             f"scopeFilter={encoded_scope_filter}&targetFilter=/attributes;/sourceIds"
         )
         logger.info("TEIV full endpoint: " + endpoint)
-        response = requests.get(endpoint)
+        try:
+            response = get_transport().get(endpoint)
+        except requests.ConnectionError:
+            get_discovery_cache().invalidate(self.teiv_invoker_id, self.teiv_api_name, self.teiv_resource_name)
+            raise
         
         if response.status_code == 200:
             nrcelldu_ids = self.search_entity_data_for_ids(response.json())
@@ -79,6 +89,63 @@ class TEIV_CLIENT(object):
                 )
         return ids
 
+class CellInventory(object):
+    """
+    Cached index of the NRCellDU IDs known to TEIV.
+
+    The IDs are held in a set so membership checks are O(1), and the set is
+    refreshed from TEIV every ttl seconds by a background thread instead of on
+    every lookup.
+    """
+
+    def __init__(self, teiv_client, ttl=300):
+        self.teiv_client = teiv_client
+        self.ttl = ttl
+        self.cell_ids = frozenset()
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="teiv-inventory", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.ttl):
+            self.refresh()
+
+    def refresh(self):
+        try:
+            nrcelldu_ids = self.teiv_client.get_nrcelldus()
+        except requests.RequestException as e:
+            logger.error(f"Failed to refresh the TEIV cell inventory: {e}")
+            return False
+
+        if nrcelldu_ids is None:
+            logger.warning("TEIV cell inventory refresh failed, keeping the cached inventory.")
+            return False
+
+        with self.lock:
+            self.cell_ids = frozenset(nrcelldu_ids)
+            self.refreshed_at = time.monotonic()
+        logger.debug(f"TEIV cell inventory refreshed with {len(nrcelldu_ids)} cells.")
+        return True
+
+    def is_stale(self):
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > self.ttl
+
+    def contains(self, cell_id):
+        # Without the background thread, fall back to refreshing on demand once the TTL expires
+        if self._thread is None and self.is_stale():
+            self.refresh()
+        return cell_id in self.cell_ids
+
 # if __name__ == "__main__":
 #     logging.basicConfig(level=logging.INFO)  # Set up logging for better visibility
 #
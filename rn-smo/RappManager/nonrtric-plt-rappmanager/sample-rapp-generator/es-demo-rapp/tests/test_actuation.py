@@ -0,0 +1,155 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""Test the actuation module."""
+
+import threading
+from concurrent.futures import CancelledError
+
+import pytest
+
+import actuation
+from actuation import POWER_OFF, POWER_ON, ActuationScheduler, RateLimiter
+
+
+class BlockingNcmpClient(object):
+    # Records the PATCHes; the first one blocks until release is set, so that the
+    # intents submitted meanwhile stay queued
+    def __init__(self, bulk_mode="cell"):
+        self.bulk_mode = bulk_mode
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def patch(self, call):
+        self.calls.append(call)
+        self.started.set()
+        self.release.wait(5)
+
+    def power_off_cell(self, cell_with_node):
+        self.patch((POWER_OFF, cell_with_node))
+        return True
+
+    def power_on_cell(self, cell_with_node):
+        self.patch((POWER_ON, cell_with_node))
+        return True
+
+    def actuate_node(self, node_id, actions):
+        self.patch((node_id, actions))
+        return {cell_with_node: True for cell_with_node in actions}
+
+
+@pytest.fixture
+def ncmp_client():
+    return BlockingNcmpClient()
+
+
+@pytest.fixture
+def scheduler(ncmp_client):
+    scheduler = ActuationScheduler(ncmp_client, node_interval=0, max_rate=0)
+    yield scheduler
+    ncmp_client.release.set()
+    scheduler.shutdown()
+
+
+def test_rate_limiter_spaces_calls(monkeypatch):
+    """Calls made at the same time are let through 1 / max_rate seconds apart."""
+    delays = []
+    monkeypatch.setattr(actuation.time, "monotonic", lambda: 100.0)
+    monkeypatch.setattr(actuation.time, "sleep", delays.append)
+    limiter = RateLimiter(10)
+    for _ in range(3):
+        limiter.acquire()
+    assert delays == pytest.approx([0.1, 0.2])
+
+
+def test_rate_limiter_without_limit(monkeypatch):
+    """A max_rate of 0 never waits."""
+    delays = []
+    monkeypatch.setattr(actuation.time, "sleep", delays.append)
+    limiter = RateLimiter(0)
+    for _ in range(3):
+        limiter.acquire()
+    assert delays == []
+
+
+def test_submit_rejects_unknown_action(scheduler):
+    """Only power on and off are accepted."""
+    with pytest.raises(ValueError):
+        scheduler.submit("cell1_node1", "reboot")
+
+
+def test_submit_deduplicates_scheduled_intent(scheduler, ncmp_client):
+    """The same intent submitted twice returns the first Future, not a new one."""
+    scheduler.submit("cell1_node1", POWER_OFF)
+    assert ncmp_client.started.wait(5)
+
+    first, created = scheduler.submit("cell2_node1", POWER_OFF)
+    assert created
+    again, created = scheduler.submit("cell2_node1", POWER_OFF)
+    assert again is first
+    assert not created
+    assert scheduler.pending_count() == 1
+
+    ncmp_client.release.set()
+    assert first.result(5) is True
+    assert ncmp_client.calls == [(POWER_OFF, "cell1_node1"), (POWER_OFF, "cell2_node1")]
+
+
+def test_submit_replaces_queued_intent(scheduler, ncmp_client):
+    """A newer intent for a queued cell cancels the older one."""
+    scheduler.submit("cell1_node1", POWER_OFF)
+    assert ncmp_client.started.wait(5)
+
+    superseded, _ = scheduler.submit("cell2_node1", POWER_OFF)
+    future, created = scheduler.submit("cell2_node1", POWER_ON)
+    assert created
+    assert superseded.cancelled()
+    with pytest.raises(CancelledError):
+        superseded.result(0)
+
+    ncmp_client.release.set()
+    assert future.result(5) is True
+    assert ncmp_client.calls[-1] == (POWER_ON, "cell2_node1")
+
+
+def test_submit_after_completion_creates_new_future(scheduler, ncmp_client):
+    """Once an intent is done, the same intent is scheduled again."""
+    ncmp_client.release.set()
+    first, _ = scheduler.submit("cell1_node1", POWER_ON)
+    assert first.result(5) is True
+
+    second, created = scheduler.submit("cell1_node1", POWER_ON)
+    assert created
+    assert second is not first
+    assert second.result(5) is True
+
+
+def test_node_mode_sends_queued_intents_in_one_request():
+    """In node bulk mode, all intents queued for a node go out in one request."""
+    ncmp_client = BlockingNcmpClient(bulk_mode="node")
+    scheduler = ActuationScheduler(ncmp_client, node_interval=0, max_rate=0)
+    try:
+        scheduler.submit("cell1_node1", POWER_OFF)
+        assert ncmp_client.started.wait(5)
+        futures = [scheduler.submit("cell2_node1", POWER_OFF)[0], scheduler.submit("cell3_node1", POWER_ON)[0]]
+
+        ncmp_client.release.set()
+        assert [future.result(5) for future in futures] == [True, True]
+        assert ncmp_client.calls[-1] == ("node1", {"cell2_node1": POWER_OFF, "cell3_node1": POWER_ON})
+    finally:
+        ncmp_client.release.set()
+        scheduler.shutdown()
@@ -0,0 +1,97 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""Test the line protocol conversion of the data module."""
+
+import numpy as np
+import pytest
+
+import rapp_config
+from data import DATABASE, escape_key, escape_measurement, format_field_value, to_nanoseconds
+
+NEW_YEAR_2025_NS = 1735689600 * 10**9
+
+
+@pytest.fixture
+def database(monkeypatch):
+    # An empty config, the conversion needs neither SME nor InfluxDB
+    monkeypatch.setattr(rapp_config, "_config", {})
+    return DATABASE()
+
+
+def test_escape_measurement():
+    """Commas, spaces and backslashes are escaped in measurement names, equals signs are not."""
+    assert escape_measurement("ManagedElement=o-du 1,NRCellDU=1") == "ManagedElement=o-du\\ 1\\,NRCellDU=1"
+    assert escape_measurement("a\\b") == "a\\\\b"
+
+
+def test_escape_key():
+    """Field keys also escape equals signs."""
+    assert escape_key("DRB.UEThpDl") == "DRB.UEThpDl"
+    assert escape_key("a=b c,d") == "a\\=b\\ c\\,d"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, "true"),
+    (7, "7i"),
+    (np.int64(7), "7i"),
+    (1.5, "1.5"),
+    (np.float32(0.5), "0.5"),
+    ('cell "1" \\ 2', '"cell \\"1\\" \\\\ 2"'),
+])
+def test_format_field_value(value, expected):
+    """Field values keep their type and strings are quoted and escaped."""
+    assert format_field_value(value) == expected
+
+
+def test_to_nanoseconds():
+    """ISO times become epoch nanoseconds, naive times are UTC."""
+    assert to_nanoseconds("2025-01-01T00:00:00+00:00") == NEW_YEAR_2025_NS
+    assert to_nanoseconds("2025-01-01T01:00:00+01:00") == NEW_YEAR_2025_NS
+    assert to_nanoseconds("2025-01-01T00:00:00.000001") == NEW_YEAR_2025_NS + 1000
+
+
+def test_to_line_protocol_merges_fields(database):
+    """Records that share a measurement and time become one escaped point."""
+    data = [
+        {"_measurement": "o-ran pm", "_time": "2025-01-01T00:00:00+00:00", "_field": "CellID", "_value": "S1/B13"},
+        {"_measurement": "o-ran pm", "_time": "2025-01-01T00:00:00+00:00", "_field": "RRU.PrbUsedUl", "_value": 12.5},
+        {"_measurement": "o-ran pm", "_time": "2025-01-01T00:00:01+00:00", "_field": "Granularity Period", "_value": 900},
+    ]
+    assert list(database.to_line_protocol(data)) == [
+        f'o-ran\\ pm CellID="S1/B13",RRU.PrbUsedUl=12.5 {NEW_YEAR_2025_NS}',
+        f'o-ran\\ pm Granularity\\ Period=900i {NEW_YEAR_2025_NS + 10**9}',
+    ]
+
+
+def test_measurement_filter_narrows_shared_measurements(database):
+    """Measurements without a ManagedElement, like o-ran-pm, are filtered by the node tag."""
+    measurements = ["ManagedElement=o-du-1,GNBDUFunction=1,NRCellDU=1", "o-ran-pm"]
+    assert database.measurement_filter(measurements) == \
+        'r["_measurement"] == "ManagedElement=o-du-1,GNBDUFunction=1,NRCellDU=1" or r["_measurement"] == "o-ran-pm"'
+    assert database.measurement_filter(measurements, {"o-du-2", "o-du-1"}) == (
+        'r["_measurement"] == "ManagedElement=o-du-1,GNBDUFunction=1,NRCellDU=1"'
+        ' or (r["_measurement"] == "o-ran-pm" and (r["ManagedElement"] == "o-du-1" or r["ManagedElement"] == "o-du-2"))'
+    )
+
+
+def test_read_data_for_nodes_queries_their_o_ran_pm_points(database, monkeypatch):
+    """read_data with nodes only reads those nodes' points of o-ran-pm."""
+    queries = []
+    monkeypatch.setattr(database, "query", queries.append)
+    database.node_tag = "sourceName"
+    database.read_data(measurements=["o-ran-pm"], nodes={"o-du-1"})
+    assert '|> filter(fn: (r) => (r["_measurement"] == "o-ran-pm" and (r["sourceName"] == "o-du-1")))' in queries[0]
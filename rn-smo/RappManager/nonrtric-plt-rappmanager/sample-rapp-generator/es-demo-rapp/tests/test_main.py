@@ -0,0 +1,138 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""Test the inference loop of the ES rApp."""
+
+import threading
+
+import pandas as pd
+import pytest
+
+from actuation import POWER_OFF, POWER_ON, ActuationScheduler
+from main import ESrapp
+
+CELL = "S1-B1-C1"
+MEASUREMENT = "ManagedElement=node1,GNBDUFunction=1"
+
+
+class GatedNcmpClient(object):
+    # Records the PATCHes, which wait until release is set
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def power_off_cell(self, cell_with_node):
+        self.calls.append((POWER_OFF, cell_with_node))
+        self.release.wait(5)
+        return True
+
+    def power_on_cell(self, cell_with_node):
+        self.calls.append((POWER_ON, cell_with_node))
+        self.release.wait(5)
+        return True
+
+
+class StaticDatabase(object):
+    # Returns the same data for every read, and records the reads
+    def __init__(self, data, measurements=None):
+        self.data = data
+        self.measurements = measurements
+        self.reads = []
+
+    def read_data(self, measurements=None, nodes=None):
+        self.reads.append((measurements, nodes))
+        return self.data
+
+
+class StaticPredictor(object):
+    batch_size = 8
+
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, instances):
+        return [[self.value]] * len(instances)
+
+
+class AllCells(object):
+    def contains(self, cell_id):
+        return True
+
+
+@pytest.fixture
+def ncmp_client():
+    return GatedNcmpClient()
+
+
+@pytest.fixture
+def rapp(ncmp_client):
+    # The inference state only, without the SME, InfluxDB and TEIV connections of __init__
+    rapp = ESrapp.__new__(ESrapp)
+    rapp.cell_power_status = {}
+    rapp.cell_id_cache = {}
+    rapp.cell_inventory = AllCells()
+    rapp.db = StaticDatabase(pd.DataFrame({
+        "CellID": [CELL] * 2, "_measurement": [MEASUREMENT] * 2, "_time": [1, 2],
+        "DRB.UEThpUl": [1.0, 2.0], "RRU.PrbUsedUl": [3.0, 4.0], "PEE.AvgPower": [5.0, 6.0]
+    }))
+    rapp.actuation = ActuationScheduler(ncmp_client, node_interval=0, max_rate=0)
+    yield rapp
+    ncmp_client.release.set()
+    rapp.actuation.shutdown()
+
+
+def run_inference(rapp, prediction):
+    rapp.predictor = StaticPredictor(prediction)
+    rapp.inference()
+
+
+def test_reverted_decision_replaces_queued_actuation(rapp, ncmp_client):
+    """A decision back to the applied state cancels the opposite intent that is still queued."""
+    # Keep the node busy so that the intents for CELL stay queued
+    rapp.actuation.submit("S9-B9-C9_node1", POWER_ON)
+
+    run_inference(rapp, 0.0)
+    assert rapp.actuation.intended_action(f"{CELL}_node1") == POWER_OFF
+    run_inference(rapp, 1.0)
+    assert rapp.actuation.intended_action(f"{CELL}_node1") == POWER_ON
+    future = rapp.actuation.intents[f"{CELL}_node1"][1]
+
+    ncmp_client.release.set()
+    assert future.result(5) is True
+    rapp.actuation.shutdown()
+    assert ncmp_client.calls == [(POWER_ON, "S9-B9-C9_node1"), (POWER_ON, f"{CELL}_node1")]
+    assert rapp.cell_power_status[f"{CELL}_node1"] == POWER_ON
+
+
+def test_applied_state_is_not_submitted_again(rapp, ncmp_client):
+    """Without a pending intent, a decision for the applied state sends nothing."""
+    ncmp_client.release.set()
+    rapp.cell_power_status[f"{CELL}_node1"] = POWER_ON
+
+    run_inference(rapp, 1.0)
+    assert rapp.actuation.intended_action(f"{CELL}_node1") is None
+    assert rapp.actuation.pending_count() == 0
+    assert ncmp_client.calls == []
+
+
+def test_pm_event_reads_changed_nodes_only(rapp):
+    """A PM event re-reads the changed nodes' own measurements and their points of the shared o-ran-pm."""
+    rapp.db.measurements = [MEASUREMENT, "ManagedElement=node2,GNBDUFunction=1", "o-ran-pm"]
+    rapp.inference_lock = threading.Lock()
+    rapp.predictor = StaticPredictor(1.0)
+
+    rapp.on_pm_data_changed({"node1"})
+    assert rapp.db.reads == [([MEASUREMENT, "o-ran-pm"], {"node1"})]
@@ -0,0 +1,110 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""Test the pm_events module."""
+
+import queue
+import time
+
+import pytest
+
+from pm_events import Debouncer, nodes_from_event
+
+
+@pytest.fixture
+def runs():
+    return queue.Queue()
+
+
+def start_debouncer(runs, callback=None, **kwargs):
+    debouncer = Debouncer(callback or runs.put, **kwargs)
+    debouncer.start()
+    return debouncer
+
+
+def test_notifications_are_merged(runs):
+    """Notifications within delay of each other make one callback with all keys."""
+    debouncer = start_debouncer(runs, delay=0.1, max_delay=5)
+    try:
+        debouncer.notify({"node1"})
+        debouncer.notify({"node2"})
+        debouncer.notify({"node1", "node3"})
+        assert runs.get(timeout=5) == {"node1", "node2", "node3"}
+        time.sleep(0.2)
+        assert runs.empty()
+    finally:
+        debouncer.stop()
+
+
+def test_unattributed_change_refreshes_all(runs):
+    """A None notification makes the callback refresh everything."""
+    debouncer = start_debouncer(runs, delay=0.05, max_delay=5)
+    try:
+        debouncer.notify({"node1"})
+        debouncer.notify(None)
+        assert runs.get(timeout=5) is None
+    finally:
+        debouncer.stop()
+
+
+def test_max_delay_bounds_the_wait(runs):
+    """A steady stream of notifications still runs the callback after max_delay."""
+    debouncer = start_debouncer(runs, delay=0.2, max_delay=0.3)
+    try:
+        started = time.monotonic()
+        while runs.empty() and time.monotonic() - started < 5:
+            debouncer.notify({"node1"})
+            time.sleep(0.05)
+        assert runs.get_nowait() == {"node1"}
+        assert time.monotonic() - started < 1
+    finally:
+        debouncer.stop()
+
+
+def test_callback_error_does_not_stop_the_debouncer(runs):
+    """The debouncer keeps running after the callback raised."""
+    def callback(keys):
+        runs.put(keys)
+        if keys == {"node1"}:
+            raise RuntimeError("refresh failed")
+
+    debouncer = start_debouncer(runs, callback=callback, delay=0.05, max_delay=5)
+    try:
+        debouncer.notify({"node1"})
+        assert runs.get(timeout=5) == {"node1"}
+        debouncer.notify({"node2"})
+        assert runs.get(timeout=5) == {"node2"}
+    finally:
+        debouncer.stop()
+
+
+def test_nodes_from_event():
+    """The ManagedElement names come from the source name and the measured DNs."""
+    event = {
+        "event": {
+            "commonEventHeader": {"sourceName": "o-du-1"},
+            "perf3gppFields": {
+                "measDataCollection": {
+                    "measuredEntityDn": "ManagedElement=o-du-2,GNBDUFunction=1",
+                    "measInfoList": [
+                        {"measValuesList": [{"measObjInstId": "ManagedElement=o-du-3,GNBDUFunction=1,NRCellDU=1"}]}
+                    ]
+                }
+            }
+        }
+    }
+    assert nodes_from_event(event) == {"o-du-1", "o-du-2", "o-du-3"}
+    assert nodes_from_event({"event": {}}) is None
@@ -0,0 +1,38 @@
+#  ============LICENSE_START===============================================
+#  Copyright (C) 2025 OpenInfra Foundation Europe. All rights reserved.
+#  ========================================================================
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ============LICENSE_END=================================================
+#
+"""Test the startup checks of the local predictor."""
+
+import sys
+
+import pytest
+
+from predictor import LocalPredictor, create_predictor
+
+
+def test_missing_model_fails_at_startup(tmp_path):
+    """A model_path that does not exist is reported before any runtime is loaded."""
+    with pytest.raises(RuntimeError, match="PREDICTOR.model_path"):
+        create_predictor({"backend": "local", "model_path": str(tmp_path / "es-aiml-model.onnx")})
+
+
+def test_missing_runtime_fails_at_startup(tmp_path, monkeypatch):
+    """Without the runtime of the model format the error names the package to install."""
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+    model_path = tmp_path / "es-aiml-model.onnx"
+    model_path.write_bytes(b"")
+    with pytest.raises(RuntimeError, match="needs onnxruntime"):
+        LocalPredictor(str(model_path))
@@ -1,9 +1,14 @@
-from datetime import timedelta
+import argparse
+import importlib.util
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-import time
 
-from influxdb_client import InfluxDBClient,WriteOptions,Point, WritePrecision
+from influxdb_client import InfluxDBClient, WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
 
 from influxdb_client.rest import ApiException
 
@@ -11,27 +16,12 @@ DEFAULT_START = "2025-01-01 00:00:00"
 DEFAULT_END = "2025-01-02 00:00:00"
 DEFAULT_INTERVAL = 15
 
-START_TIME_STRING = input(f"Enter START_TIME (YYYY-MM-DD HH:MM:SS) [default: {DEFAULT_START}]: ") or DEFAULT_START
-END_TIME_STRING = input(f"Enter END_TIME (YYYY-MM-DD HH:MM:SS) [default: {DEFAULT_END}]: ") or DEFAULT_END
-INTERVAL_MIN = int(input(f"Enter INTERVAL_MIN (minutes) [default: {DEFAULT_INTERVAL}]: ") or DEFAULT_INTERVAL)
-
-START_TIME = pd.Timestamp(START_TIME_STRING)
-END_TIME = pd.Timestamp(END_TIME_STRING)
-
 # Default InfluxDB configuration
 DEFAULT_INFLUX_URL = "http://localhost:8086"
 DEFAULT_INFLUX_TOKEN = ""
 DEFAULT_INFLUX_ORG = ""
 DEFAULT_INFLUX_BUCKET = "nssi_pm_bucket"
-
-# Get user input or use defaults
-INFLUX_URL = input(f"Enter InfluxDB URL [default: {DEFAULT_INFLUX_URL}]: ") or DEFAULT_INFLUX_URL
-INFLUX_TOKEN = input(f"Enter InfluxDB Token [default: {DEFAULT_INFLUX_TOKEN}]: ") or DEFAULT_INFLUX_TOKEN
-INFLUX_ORG = input(f"Enter InfluxDB Organization [default: {DEFAULT_INFLUX_ORG}]: ") or DEFAULT_INFLUX_ORG
-INFLUX_BUCKET = input(f"Enter InfluxDB Bucket [default: {DEFAULT_INFLUX_BUCKET}]: ") or DEFAULT_INFLUX_BUCKET
-
-if END_TIME <= START_TIME:
-    raise ValueError("END_TIME must be after START_TIME")
+DEFAULT_MEASUREMENT = "nssi_pm_bucket"
 
 NSSIS = [
     {"measObjLdn": "9090d36f-6af5-4cfd-8bda-7a3c88fa82fa", "sliceType": "embb"},
@@ -48,291 +38,400 @@ MEAS_TYPES = [
     "RRC.ConnEstabSucc.Cause"
 ]
 
+SLICE_TYPES = ["embb", "urllc", "mmtc"]
+
+def make_nssis(count):
+    """
+    Build the list of NSSI configurations to generate data for.
+
+    The first six are the NSSIs in NSSIS. Further NSSIs continue their ID sequence
+    and cycle through the slice types in pairs, in the same order as NSSIS.
+
+    Args:
+        count (int): Number of NSSIs
+
+    Returns:
+        list: NSSI configurations with "measObjLdn" and "sliceType"
+    """
+    nssis = list(NSSIS[:count])
+    first_id = int(NSSIS[0]["measObjLdn"].rsplit("-", 1)[1], 16)
+    for i in range(len(nssis), count):
+        nssis.append({
+            "measObjLdn": f"9090d36f-6af5-4cfd-8bda-{first_id + i:012x}",
+            "sliceType": SLICE_TYPES[(i // 2) % len(SLICE_TYPES)]
+        })
+    return nssis
+
 def embb_activity_level(hour):
     """
     Determine the activity level for eMBB (Enhanced Mobile Broadband) slice based on hour of day.
-    
+
     eMBB typically has higher usage during daytime hours and lower usage during night hours.
     This function models realistic traffic patterns for broadband services.
-    
+
     Args:
-        hour (int): Hour of the day (0-23)
-        
+        hour (np.ndarray): Hours of the day (0-23)
+
     Returns:
-        str: Activity level - "low" (0-6h), "medium" (6-17h), or "medhigh" (17-23h)
+        np.ndarray: Activity levels - "low" (0-6h), "medium" (6-17h), or "medhigh" (17-23h)
     """
-    if 0 <= hour <= 6:
-        return "low"
-    elif 6 < hour <= 17:
-        return "medium"
-    else:
-        return "medhigh"
-    
+    return np.select([hour <= 6, hour <= 17], ["low", "medium"], "medhigh")
+
 def urllc_activity_level(hour):
     """
     Determine the activity level for URLLC (Ultra-Reliable Low-Latency Communication) slice based on hour of day.
-    
+
     URLLC services are typically used for critical applications during business hours.
     This function models high activity during daytime (8-20h) and low activity otherwise.
-    
+
     Args:
-        hour (int): Hour of the day (0-23)
-        
+        hour (np.ndarray): Hours of the day (0-23)
+
     Returns:
-        str: Activity level - "high" (8-20h) or "low" (otherwise)
+        np.ndarray: Activity levels - "high" (8-20h) or "low" (otherwise)
     """
-    return "high" if 8 <= hour <= 20 else "low"
+    return np.where((hour >= 8) & (hour <= 20), "high", "low")
 
-def mmtc_is_burst(ts):
+def mmtc_is_burst(times):
     """
-    Determine if the given timestamp represents a burst period for mMTC (Massive Machine Type Communications).
-    
+    Determine which timestamps represent a burst period for mMTC (Massive Machine Type Communications).
+
     mMTC devices typically communicate in bursts at specific intervals to conserve power.
     This function models burst behavior at 6-hour intervals (6, 12, 18) during quarter-hour marks.
-    
+
     Args:
-        ts (datetime): Timestamp to check for burst condition
-        
+        times (pd.DatetimeIndex): Timestamps to check for burst condition
+
     Returns:
-        bool: True if it's a burst time, False otherwise
+        np.ndarray: True where it's a burst time, False otherwise
     """
-    return (ts.hour in [6,12,18]) and (ts.minute in [0,15,30,45])
+    return np.isin(times.hour, [6, 12, 18]) & np.isin(times.minute, [0, 15, 30, 45])
 
-rng = np.random.default_rng(42)
+def dl_volume(mean_vol, rng, sigma_limit=50):
+    # Normal around the mean with a 10% deviation capped at sigma_limit, clipped at 0
+    return np.maximum(0, rng.normal(mean_vol, np.minimum(0.1 * mean_vol, sigma_limit)))
 
-def gen_embb_kpis(ts):
+def gen_embb_kpis(times, count, rng):
     """
-    Generate Key Performance Indicators (KPIs) for eMBB slice at a given timestamp.
-    
+    Generate Key Performance Indicators (KPIs) for eMBB slices over a range of timestamps.
+
     eMBB KPIs include downlink volume, RRC connection success rate, and PRB usage.
-    The values are generated based on the activity level for the given hour.
-    
+    The values are generated based on the activity level for each hour.
+
     Args:
-        ts (datetime): Timestamp for which to generate KPIs
-        
+        times (pd.DatetimeIndex): Timestamps for which to generate KPIs
+        count (int): Number of eMBB NSSIs
+        rng (np.random.Generator): Random number generator
+
     Returns:
-        tuple: (dl_volume, rrc_success, prb_usage)
+        tuple: (dl_volume, rrc_success, prb_usage), arrays of shape (len(times), count)
             - dl_volume (float): Downlink data volume in MB
             - rrc_success (int): Number of successful RRC connections
             - prb_usage (float): Physical Resource Block usage percentage
     """
-    lvl = embb_activity_level(ts.hour)
-    ue_count=0
-    sigma_limit=50
-    if lvl == "low":
-        ue_count = 10+np.random.poisson(6)*10
-    elif lvl == "medium":
-        ue_count = 500 + np.random.poisson(10)*30
-    else:
-        ue_count = 1300 + np.random.poisson(10)*40
+    shape = (len(times), count)
+    lvl = embb_activity_level(times.hour.to_numpy())[:, np.newaxis]
+    ue_count = np.select(
+        [lvl == "low", lvl == "medium"],
+        [10 + rng.poisson(6, shape) * 10, 500 + rng.poisson(10, shape) * 30],
+        1300 + rng.poisson(10, shape) * 40
+    )
 
-    mean_vol = 2*ue_count
-    dl_vol =max(0, np.random.normal(mean_vol,min(0.1*mean_vol,sigma_limit)))
-    prb_dl = dl_vol*3
-    
-    return round(dl_vol, 2), max(int(ue_count * 0.6), 0), prb_dl
+    dl_vol = dl_volume(2 * ue_count, rng)
+    prb_dl = dl_vol * 3
 
-def gen_urllc_kpis(ts):
+    return dl_vol.round(2), (ue_count * 0.6).astype(np.int64), prb_dl
+
+def gen_urllc_kpis(times, count, rng):
     """
-    Generate Key Performance Indicators (KPIs) for URLLC slice at a given timestamp.
-    
+    Generate Key Performance Indicators (KPIs) for URLLC slices over a range of timestamps.
+
     URLLC KPIs prioritize reliability and low latency, with higher data volume per UE
-    compared to eMBB. The values are generated based on the activity level for the given hour.
-    
+    compared to eMBB. The values are generated based on the activity level for each hour.
+
     Args:
-        ts (datetime): Timestamp for which to generate KPIs
-        
+        times (pd.DatetimeIndex): Timestamps for which to generate KPIs
+        count (int): Number of URLLC NSSIs
+        rng (np.random.Generator): Random number generator
+
     Returns:
-        tuple: (dl_volume, rrc_success, prb_usage)
+        tuple: (dl_volume, rrc_success, prb_usage), arrays of shape (len(times), count)
             - dl_volume (float): Downlink data volume in MB
             - rrc_success (int): Number of successful RRC connections
             - prb_usage (float): Physical Resource Block usage percentage
     """
-    lvl = urllc_activity_level(ts.hour)
-    ue_count=0
-    sigma_limit=50
-    if lvl == "high":
-        ue_count = 500 + np.random.poisson(10)*30
-    else:
-        ue_count = 100 + np.random.poisson(10)*5
+    shape = (len(times), count)
+    lvl = urllc_activity_level(times.hour.to_numpy())[:, np.newaxis]
+    ue_count = np.where(
+        lvl == "high",
+        500 + rng.poisson(10, shape) * 30,
+        100 + rng.poisson(10, shape) * 5
+    )
 
-    mean_vol = 7*ue_count
-    dl_vol =max(0, np.random.normal(mean_vol,min(sigma_limit,0.1*mean_vol )))
-    prb_dl = dl_vol*3
-    return round(dl_vol, 2), max(int(ue_count * 0.6), 0), prb_dl
+    dl_vol = dl_volume(7 * ue_count, rng)
+    prb_dl = dl_vol * 3
+    return dl_vol.round(2), (ue_count * 0.6).astype(np.int64), prb_dl
 
-def gen_mmtc_kpis(ts):
+def gen_mmtc_kpis(times, count, rng):
     """
-    Generate Key Performance Indicators (KPIs) for mMTC slice at a given timestamp.
-    
+    Generate Key Performance Indicators (KPIs) for mMTC slices over a range of timestamps.
+
     mMTC KPIs model massive device connectivity with bursty traffic patterns.
     High device count with low individual data volume, except during burst periods.
-    
+
     Args:
-        ts (datetime): Timestamp for which to generate KPIs
-        
+        times (pd.DatetimeIndex): Timestamps for which to generate KPIs
+        count (int): Number of mMTC NSSIs
+        rng (np.random.Generator): Random number generator
+
     Returns:
-        tuple: (dl_volume, rrc_success, prb_usage)
+        tuple: (dl_volume, rrc_success, prb_usage), arrays of shape (len(times), count)
             - dl_volume (float): Downlink data volume in MB
             - rrc_success (int): Number of successful RRC connections
             - prb_usage (float): Physical Resource Block usage percentage
     """
-    ue_count = np.random.uniform(1000,1100)
-    sigma_limit=50
-    if mmtc_is_burst(ts):
-        mean_vol = 1*ue_count
-    else:
-        mean_vol = 0.1*ue_count
-    
-    dl_vol =max(0, np.random.normal(mean_vol,min(sigma_limit,0.1*mean_vol)))
-    prb_dl = dl_vol*2
-    return round(dl_vol, 2), max(int(ue_count * 0.6), 0), prb_dl
+    ue_count = rng.uniform(1000, 1100, (len(times), count))
+    mean_vol = np.where(mmtc_is_burst(times)[:, np.newaxis], 1, 0.1) * ue_count
 
+    dl_vol = dl_volume(mean_vol, rng)
+    prb_dl = dl_vol * 2
+    return dl_vol.round(2), (ue_count * 0.6).astype(np.int64), prb_dl
 
-def push_to_influxdb(data_points):
+def gen_default_kpis(times, count, rng):
     """
-    Push performance data points to InfluxDB time series database.
-    
-    Uses batch writing for efficient data ingestion with configurable batch size
-    and flush interval. Properly closes connections to ensure data integrity.
-    
+    Generate generic KPIs for NSSIs of a slice type without a dedicated traffic model.
+
     Args:
-        data_points (list): List of InfluxDB Point objects containing performance data
+        times (pd.DatetimeIndex): Timestamps for which to generate KPIs
+        count (int): Number of NSSIs
+        rng (np.random.Generator): Random number generator
+
+    Returns:
+        tuple: (dl_volume, rrc_success, prb_usage), arrays of shape (len(times), count)
     """
-    with InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG) as client:
-        write_api = client.write_api(write_options=WriteOptions(batch_size=500, flush_interval=10000))
+    shape = (len(times), count)
+    dl_vol = np.maximum(0, rng.normal(300, 80, shape))
+    return dl_vol.round(2), rng.poisson(20, shape), dl_vol * 3
 
-        for point in data_points:
-            write_api.write(bucket=INFLUX_BUCKET, record=point)
-        
-        write_api.flush()
-        write_api.close()
-        client.close()
-
-                       
-def generate_nssi_pm(
-        start_time=START_TIME,
-        end_time=END_TIME,
-        interval_min=INTERVAL_MIN,
-        nssis=NSSIS
-):
+KPI_GENERATORS = {
+    "embb": gen_embb_kpis,
+    "urllc": gen_urllc_kpis,
+    "mmtc": gen_mmtc_kpis
+}
+
+def generate_nssi_pm(times, nssis, rng):
     """
     Generate Network Slice Subnet Instance (NSSI) performance monitoring data.
-    
-    Creates time-series performance data for different network slice types (eMBB, URLLC, mMTC)
-    over a specified time period. Generates KPIs for each slice at regular intervals and
-    formats the data for both InfluxDB storage and CSV export.
-    
+
+    Creates time-series performance data for different network slice types (eMBB, URLLC, mMTC).
+    The KPIs of all NSSIs of a slice type are generated for all timestamps at once.
+
     Args:
-        start_time (pd.Timestamp): Start time for data generation
-        end_time (pd.Timestamp): End time for data generation
-        interval_min (int): Time interval in minutes between data points
+        times (pd.DatetimeIndex): Timestamps of the data points
         nssis (list): List of NSSI configurations with slice types and IDs
-        
+        rng (np.random.Generator): Random number generator
+
     Returns:
-        list: List of InfluxDB Point objects containing performance data
+        pd.DataFrame: One row per timestamp and NSSI, ordered by time, with the columns
+            time, measObjLdn, sliceType and one column per entry of MEAS_TYPES
     """
-    delta = end_time - start_time
-    total_minutes = int(delta.total_seconds() // 60)
-    periods = (total_minutes // interval_min) + 1
-    times = pd.date_range(start_time, periods=periods, freq=f"{interval_min}min")
-
-    records = []
-    data_points = []
-    for ts in times:
-        for n in nssis:
-            nssi_id = n["measObjLdn"]
-            slice_type = n["sliceType"].lower()
-
-            if slice_type == "embb":
-                pdcp_mb, rrc_succ, prb_pct = gen_embb_kpis(ts)
-            elif slice_type == "urllc":
-                pdcp_mb, rrc_succ, prb_pct = gen_urllc_kpis(ts)
-            elif slice_type == "mmtc":
-                pdcp_mb, rrc_succ, prb_pct = gen_mmtc_kpis(ts)
-            else:
-                pdcp_mb, rrc_succ, prb_pct = rng.normal(300, 80), int(rng.poisson(20))
-            
-            record = {
-                "measObjLdn": nssi_id,
-                "beginTime": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "endTime": (ts + timedelta(minutes=interval_min)).strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "sliceType": slice_type,
-                "measTypes": MEAS_TYPES,
-                "measValue": [
-                    round(prb_pct, 2),
-                    round(float(pdcp_mb), 2),
-                    int(rrc_succ)
-            ] 
-            }
-            records.append(record)
-            p = (Point("nssi_pm_bucket")
-                    .tag("measObjLdn", nssi_id)
-                    .tag("sliceType", slice_type)
-                    .field("RRU.PrbDl.SNSSAI", round(prb_pct, 2))
-                    .field("DRB.PdcpSduVolumeDL.SNSSAI", round(float(pdcp_mb), 2))
-                    .field("RRC.ConnEstabSucc.Cause", int(rrc_succ))
-                    .time(ts.strftime("%Y-%m-%dT%H:%M:%S.%fZ"), WritePrecision.NS)
+    frames = []
+    by_type = {}
+    for n in nssis:
+        by_type.setdefault(n["sliceType"].lower(), []).append(n["measObjLdn"])
+
+    for slice_type, nssi_ids in by_type.items():
+        generate = KPI_GENERATORS.get(slice_type, gen_default_kpis)
+        pdcp_mb, rrc_succ, prb_pct = generate(times, len(nssi_ids), rng)
+        frames.append(pd.DataFrame({
+            "time": np.repeat(times.to_numpy(), len(nssi_ids)),
+            "measObjLdn": np.tile(np.array(nssi_ids, dtype=object), len(times)),
+            "sliceType": slice_type,
+            MEAS_TYPES[0]: prb_pct.round(2).ravel(),
+            MEAS_TYPES[1]: pdcp_mb.astype(float).ravel(),
+            MEAS_TYPES[2]: rrc_succ.astype(np.int64).ravel()
+        }))
+
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values("time", kind="stable", ignore_index=True)
+
+def escape_tag(value):
+    return value.replace(",", r"\,").replace("=", r"\=").replace(" ", r"\ ")
+
+def to_line_protocol(df, measurement):
+    """
+    Format generated data as InfluxDB line protocol, with timestamps in seconds.
+
+    Args:
+        df (pd.DataFrame): Data as returned by generate_nssi_pm
+        measurement (str): Measurement name
+
+    Returns:
+        list: One line protocol string per row
+    """
+    measurement = measurement.replace(",", r"\,").replace(" ", r"\ ")
+    prefixes = {}
+    for nssi_id, slice_type in df[["measObjLdn", "sliceType"]].drop_duplicates().itertuples(index=False):
+        prefixes[nssi_id] = f"{measurement},measObjLdn={escape_tag(nssi_id)},sliceType={escape_tag(slice_type)} "
+
+    seconds = df["time"].to_numpy().astype("datetime64[s]").astype(np.int64)
+    return [
+        f"{prefixes[nssi_id]}{MEAS_TYPES[0]}={prb},{MEAS_TYPES[1]}={pdcp},{MEAS_TYPES[2]}={rrc}i {ts}"
+        for nssi_id, prb, pdcp, rrc, ts in zip(
+            df["measObjLdn"].tolist(),
+            df[MEAS_TYPES[0]].tolist(),
+            df[MEAS_TYPES[1]].tolist(),
+            df[MEAS_TYPES[2]].tolist(),
+            seconds.tolist()
+        )
+    ]
+
+def push_to_influxdb(client, lines, bucket, org, batch_size):
+    """
+    Push line protocol to InfluxDB time series database.
+
+    Lines are sent in synchronous requests of batch_size lines; with a gzip enabled
+    client every request body is compressed.
+
+    Args:
+        client (InfluxDBClient): InfluxDB client
+        lines (list): Line protocol strings with timestamps in seconds
+        bucket (str): Destination bucket
+        org (str): InfluxDB organization
+        batch_size (int): Lines per write request
+    """
+    write_api = client.write_api(write_options=SYNCHRONOUS)
+    try:
+        for start in range(0, len(lines), batch_size):
+            write_api.write(
+                bucket=bucket,
+                org=org,
+                record="\n".join(lines[start:start + batch_size]),
+                write_precision=WritePrecision.S
             )
-            data_points.append(p)
-    
-    return data_points
+    finally:
+        write_api.close()
+
+def export_chunk(df, output_dir, output_format, index):
+    """
+    Write one chunk of generated data to output_dir as part-<index>.parquet or part-<index>.csv.gz.
+
+    Returns:
+        str: Path of the written file
+    """
+    if output_format == "parquet":
+        path = os.path.join(output_dir, f"part-{index:05d}.parquet")
+        df.to_parquet(path, index=False)
+    else:
+        path = os.path.join(output_dir, f"part-{index:05d}.csv.gz")
+        df.to_csv(path, index=False, date_format="%Y-%m-%dT%H:%M:%SZ")
+    return path
+
+# Per-process state of the generator workers, set by init_worker
+worker = {}
+
+def init_worker(args):
+    worker["args"] = args
+    worker["nssis"] = make_nssis(args.nssi_count)
+    worker["client"] = None
+    if not args.no_influx:
+        worker["client"] = InfluxDBClient(url=args.url, token=args.token, org=args.org, enable_gzip=True, timeout=60000)
+
+def generate_chunk(chunk):
+    """
+    Generate, write and export one chunk of the time range.
+
+    Every chunk has its own random stream derived from the seed and the chunk index,
+    so the output does not depend on the number of workers.
 
-def create_bucket_if_not_exists():
+    Args:
+        chunk (tuple): (index, first timestamp, number of timestamps)
+
+    Returns:
+        int: Number of generated rows
+    """
+    index, start, periods = chunk
+    args = worker["args"]
+    times = pd.date_range(start, periods=periods, freq=f"{args.interval}min")
+    rng = np.random.default_rng([args.seed, index])
+    df = generate_nssi_pm(times, worker["nssis"], rng)
+
+    if worker["client"] is not None:
+        push_to_influxdb(worker["client"], to_line_protocol(df, args.measurement), args.bucket, args.org, args.batch_size)
+    if args.output:
+        export_chunk(df, args.output, args.format, index)
+    return len(df)
+
+def make_chunks(start_time, end_time, interval_min, chunk_hours):
+    """
+    Split the time range into chunks of chunk_hours, as (index, first timestamp, number of timestamps).
+    Both start_time and end_time are included, like the timestamps of pd.date_range.
+    """
+    total_minutes = int((end_time - start_time).total_seconds() // 60)
+    periods = (total_minutes // interval_min) + 1
+    chunk_periods = max(1, (chunk_hours * 60) // interval_min)
+    return [
+        (index, start_time + pd.Timedelta(minutes=offset * interval_min), min(chunk_periods, periods - offset))
+        for index, offset in enumerate(range(0, periods, chunk_periods))
+    ]
+
+def create_bucket_if_not_exists(url, token, org, bucket_name):
     """
     Create a bucket in InfluxDB if it doesn't already exist.
-    
+
     Connects to InfluxDB and checks if the specified bucket exists.
     If the bucket doesn't exist, creates it with infinite retention period.
     Handles various API errors and provides informative error messages.
-    
+
+    Args:
+        url (str): InfluxDB URL
+        token (str): InfluxDB token
+        org (str): InfluxDB organization
+        bucket_name (str): Name of the bucket
+
     Returns:
         bool: True if bucket exists or was created successfully, False otherwise
-        
-    Raises:
-        ApiException: If there are issues with InfluxDB API communication
-        Exception: For other unexpected errors during bucket creation
     """
     client = None
     try:
         # Initialize InfluxDB client
         client = InfluxDBClient(
-            url=INFLUX_URL,
-            token=INFLUX_TOKEN,
-            org=INFLUX_ORG
+            url=url,
+            token=token,
+            org=org
         )
-        
+
         # Get buckets API
         buckets_api = client.buckets_api()
-        
+
         # Check if bucket already exists
-        print(f"Checking if bucket '{INFLUX_BUCKET}' exists...")
+        print(f"Checking if bucket '{bucket_name}' exists...")
         buckets = buckets_api.find_buckets().buckets
-        
+
         bucket_exists = False
         for bucket in buckets:
-            if bucket.name == INFLUX_BUCKET:
+            if bucket.name == bucket_name:
                 bucket_exists = True
-                print(f"Bucket '{INFLUX_BUCKET}' already exists.")
+                print(f"Bucket '{bucket_name}' already exists.")
                 break
-        
+
         # Create bucket if it doesn't exist
         if not bucket_exists:
-            print(f"Bucket '{INFLUX_BUCKET}' does not exist. Creating...")
-            
+            print(f"Bucket '{bucket_name}' does not exist. Creating...")
+
             # Create bucket with default retention (infinite)
             bucket = buckets_api.create_bucket(
-                bucket_name=INFLUX_BUCKET,
-                org=INFLUX_ORG
+                bucket_name=bucket_name,
+                org=org
             )
-            
-            print(f"Bucket '{INFLUX_BUCKET}' created successfully.")
+
+            print(f"Bucket '{bucket_name}' created successfully.")
             print(f"Bucket ID: {bucket.id}")
-            print(f"Organization: {INFLUX_ORG}")
-            print(f"Retention period: Infinite (default)")
-        
+            print(f"Organization: {org}")
+            print("Retention period: Infinite (default)")
+
         return True
-        
+
     except ApiException as e:
         print(f"InfluxDB API Error: {e}")
         if e.status == 401:
@@ -344,22 +443,65 @@ def create_bucket_if_not_exists():
         else:
             print(f"HTTP Status: {e.status}")
         return False
-        
+
     except Exception as e:
         print(f"Unexpected error: {e}")
         return False
-        
+
     finally:
         # Close the client connection
         if client:
             client.close()
             print("InfluxDB connection closed.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate slice PM history for the PRB prediction model.")
+    parser.add_argument("--start", default=DEFAULT_START, help="First timestamp (YYYY-MM-DD HH:MM:SS).")
+    parser.add_argument("--end", default=DEFAULT_END, help="Last timestamp (YYYY-MM-DD HH:MM:SS).")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="Minutes between data points.")
+    parser.add_argument("--nssi_count", type=int, default=len(NSSIS), help="Number of NSSIs, see make_nssis.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the random streams.")
+    parser.add_argument("--url", default=DEFAULT_INFLUX_URL, help="InfluxDB URL.")
+    parser.add_argument("--token", default=os.getenv("INFLUX_TOKEN", DEFAULT_INFLUX_TOKEN),
+                        help="InfluxDB token, defaults to the INFLUX_TOKEN environment variable.")
+    parser.add_argument("--org", default=DEFAULT_INFLUX_ORG, help="InfluxDB organization.")
+    parser.add_argument("--bucket", default=DEFAULT_INFLUX_BUCKET, help="InfluxDB bucket.")
+    parser.add_argument("--measurement", default=DEFAULT_MEASUREMENT, help="InfluxDB measurement.")
+    parser.add_argument("--no_influx", action="store_true", help="Do not write to InfluxDB, only export.")
+    parser.add_argument("--batch_size", type=int, default=50000, help="Lines per InfluxDB write request.")
+    parser.add_argument("--output", help="Directory to export the data to, one file per chunk.")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet", help="Export file format.")
+    parser.add_argument("--chunk_hours", type=int, default=24, help="Hours of data per chunk.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Generator processes.")
+    args = parser.parse_args()
+
+    args.start = pd.Timestamp(args.start)
+    args.end = pd.Timestamp(args.end)
+    if args.end <= args.start:
+        parser.error("--end must be after --start")
+    if args.no_influx and not args.output:
+        parser.error("--no_influx needs --output")
+    if args.output and args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        # pandas needs pyarrow for Parquet; fail before generating anything
+        parser.error("Parquet export needs pyarrow: pip install pyarrow, or use --format csv")
+    return args
+
 if __name__ == "__main__":
-    create_bucket_if_not_exists()
+    args = parse_args()
+
+    if not args.no_influx and not create_bucket_if_not_exists(args.url, args.token, args.org, args.bucket):
+        raise SystemExit(1)
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
 
-    gerated_data = generate_nssi_pm()
+    chunks = make_chunks(args.start, args.end, args.interval, args.chunk_hours)
+    print(f"Generating {len(chunks)} chunk(s) for {args.nssi_count} NSSIs on {args.workers} worker(s)...")
 
-    push_to_influxdb(gerated_data)
+    started = time.perf_counter()
+    rows = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(args,)) as executor:
+        for done, count in enumerate(executor.map(generate_chunk, chunks), start=1):
+            rows += count
+            print(f"Chunk {done}/{len(chunks)} done, {rows} rows in {time.perf_counter() - started:.1f}s")
 
-    time.sleep(5)
+    print(f"Generated {rows} rows in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,87 @@
+"""
+Load test for the /predict endpoint of a running slice rApp.
+
+Sends requests from concurrent clients for a fixed duration and reports the
+throughput, the latency percentiles and the batching seen by the rApp, e.g.:
+
+    python benchmark_predict_api.py --url http://localhost:8080 --clients 32 --duration 30
+
+Every request carries --instances random windows of --window rows for the given
+slice type and NSSI, which must be known to the rApp's encoders.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import numpy as np
+import requests
+
+
+def make_payload(args, rng):
+    return {"instances": [
+        {
+            "slice_type": args.slice_type,
+            "nssi_id": args.nssi_id,
+            "rows": [
+                {"prb_dl": float(prb), "data_dl": float(prb) / 3, "rrc_succ": int(rrc)}
+                for prb, rrc in zip(rng.uniform(0, 8000, args.window), rng.integers(0, 1000, args.window))
+            ]
+        }
+        for _ in range(args.instances)
+    ]}
+
+
+def client(args, payload, deadline, latencies, errors, lock):
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{args.url}/predict", json=payload, timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        with lock:
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the slice rApp /predict endpoint.")
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+    parser.add_argument("--instances", type=int, default=1, help="Windows per request.")
+    parser.add_argument("--window", type=int, default=672, help="Rows per window, at least the rApp's window_size.")
+    parser.add_argument("--slice_type", default="embb")
+    parser.add_argument("--nssi_id", default="9090d36f-6af5-4cfd-8bda-7a3c88fa82fa")
+    args = parser.parse_args()
+
+    payload = make_payload(args, np.random.default_rng(0))
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=client, args=(args, payload, deadline, latencies, errors, lock))
+        for _ in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if not latencies:
+        print(f"No successful requests, {len(errors)} errors")
+        return
+    latencies.sort()
+    print(f"{len(latencies)} requests in {args.duration:.0f}s: {len(latencies) / args.duration:.1f} req/s, {len(errors)} errors")
+    print(f"latency ms: p50 {statistics.median(latencies) * 1000:.1f}, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f}, "
+          f"p99 {latencies[int(0.99 * (len(latencies) - 1))] * 1000:.1f}")
+    print(f"rApp batching: {requests.get(f'{args.url}/metrics', timeout=10).json().get('predict')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares cold and warm latency of the slice PRB model backends.
+
+"predict" is the plain Keras model.predict() path; keras, tflite and onnx are the
+SlicePredictor backends. Cold is the time until the first prediction is available
+(including tracing or conversion), warm the mean latency per call afterwards, for
+one window and for a batch of --slices windows. Run from this directory, e.g.:
+
+    python benchmark_predictor.py --backend predict keras tflite --slices 32
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from predictor import SlicePredictor
+
+
+def time_calls(fn, X, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def benchmark(backend, model, window, batch, repeat, export_dir):
+    start = time.perf_counter()
+    if backend == "predict":
+        fn = lambda X: model.predict(X, verbose=0)
+        fn(batch[:1])
+    else:
+        fn = SlicePredictor(model, window=window, backend=backend, batch_size=len(batch), export_dir=export_dir).predict
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    return cold_ms, time_calls(fn, batch[:1], repeat), time_calls(fn, batch, repeat)
+
+
+def main():
+    with open("config.json", "r") as f:
+        window_size = int(json.load(f).get("DB", {}).get("window_size", 672))
+
+    parser = argparse.ArgumentParser(description="Benchmark the slice PRB model backends.")
+    parser.add_argument("--backend", nargs="+", choices=["predict", "keras", "tflite", "onnx"], default=["predict", "keras"], help="Backends to benchmark.")
+    parser.add_argument("--model", default=os.path.join("models", "best_prb_lstm.keras"), help="Keras model to load.")
+    parser.add_argument("--window", type=int, default=window_size, help="Time steps per window.")
+    parser.add_argument("--slices", type=int, default=32, help="Windows per batched call.")
+    parser.add_argument("--repeat", type=int, default=20, help="Warm calls to average over.")
+    parser.add_argument("--export_dir", default="models", help="Where TFLite/ONNX exports are written and looked up.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'backend':<8} {'cold ms':>10} {'warm ms/window':>15} {f'warm ms/{args.slices} windows':>22}")
+    for backend in args.backend:
+        # A fresh model per backend, so no backend profits from another one's tracing
+        tf.keras.backend.clear_session()
+        model = tf.keras.models.load_model(args.model)
+        batch = rng.uniform(0, 1, size=(args.slices, args.window, model.input_shape[-1])).astype(np.float32)
+        cold_ms, single_ms, batch_ms = benchmark(backend, model, args.window, batch, args.repeat, args.export_dir)
+        print(f"{backend:<8} {cold_ms:>10.1f} {single_ms:>15.2f} {batch_ms:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmarks the windowed Flux query of DATABASE.read_data against the previous query.
+
+Populate a local InfluxDB with data_generator.py first, then run from this directory
+so config.json is picked up, e.g.:
+
+    python benchmark_query.py --repeat 5
+
+The previous query scanned the whole bucket and applied tail before the pivot; the
+new one is bounded to about one window per series. Both are timed, and the windows
+they return are compared per (slice type, NSSI) series. As generated data is not
+recent, the range is anchored at the newest point in the bucket unless --stop is
+given.
+"""
+
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from data import DATABASE
+
+
+def legacy_query(db, range_start):
+    fields_filter = " or ".join([f'r["_field"] == "{f}"' for f in db.field_names])
+    return f'''
+        from(bucket: "{db.bucket}")
+        |> range(start: {range_start})
+        |> filter(fn: (r) => r["_measurement"] == "{db.measurements}")
+        |> filter(fn: (r) => {fields_filter})
+        |> tail(n:{db.window_size})
+        |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+        |> keep(columns: ["_time", "{db.tag_slice_type}", "{db.tag_nssi_id}", "{'","'.join(db.field_names)}"])
+        |> sort(columns: ["_time"])
+    '''
+
+
+def latest_time(db):
+    result = db.query(f'''
+        from(bucket: "{db.bucket}")
+        |> range(start: 0)
+        |> filter(fn: (r) => r["_measurement"] == "{db.measurements}")
+        |> last()
+        |> group()
+        |> max(column: "_time")
+    ''')
+    return pd.Timestamp(result["_time"].max())
+
+
+def as_frame(result):
+    # query_data_frame returns a list when the result has tables with different schemas
+    return pd.concat(result, ignore_index=True) if isinstance(result, list) else result
+
+
+def run(db, query, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = as_frame(db.query(query))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def windows(db, df):
+    keys = [db.tag_slice_type, db.tag_nssi_id]
+    df = df.sort_values(keys + ["_time"])
+    return {key: group[db.field_names].reset_index(drop=True) for key, group in df.groupby(keys)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slice rApp Flux queries.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported.")
+    parser.add_argument("--stop", help="End of the query range (RFC3339), defaults to the newest point in the bucket.")
+    parser.add_argument("--legacy_range", default="0", help="Range start of the previous query.")
+    args = parser.parse_args()
+
+    db = DATABASE()
+    db.connect()
+    stop = pd.Timestamp(args.stop) if args.stop else latest_time(db)
+    print(f"Window of {db.window_size} points per series ending at {stop}")
+
+    results = {}
+    print(f"{'query':<8} {'median s':>10} {'rows':>8} {'series':>8}")
+    for name, query in (("legacy", legacy_query(db, args.legacy_range)), ("windowed", db.build_query(stop=stop))):
+        median, df = run(db, query, args.repeat)
+        results[name] = windows(db, df) if not df.empty else {}
+        print(f"{name:<8} {median:>10.3f} {len(df):>8} {len(results[name]):>8}")
+
+    mismatched = [
+        key for key in results["legacy"]
+        if key not in results["windowed"] or not results["legacy"][key].equals(results["windowed"][key])
+    ]
+    print("Windows match" if not mismatched else f"Windows differ for {len(mismatched)} series: {mismatched[:5]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,18 @@ from sme_client import SMEClient
 
 logger = logging.getLogger(__name__)
 
+
+def format_time(timestamp):
+    # RFC3339 time literal for Flux, naive timestamps are taken as UTC
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC")
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def format_string(value):
+    # Flux string literal
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
 class DATABASE(object):
 
     def __init__(self):
@@ -68,6 +80,9 @@ class DATABASE(object):
         self.window_size = int(window_size_str)
         self.tag_slice_type = influx_config.get("tag_slice_type")
         self.tag_nssi_id = influx_config.get("tag_nssi_id")
+        # Seconds between PM reports, used to bound the query range to about one window
+        self.reporting_interval = int(influx_config.get("reporting_interval", 900))
+        self.range_margin = float(influx_config.get("range_margin", 1.5))
 
     # Connect with influxdb
     def connect(self):
@@ -84,21 +99,58 @@ class DATABASE(object):
             logger.error("Failed to establish a new connection with InflulxDB, Please check your url/hostname")
             time.sleep(120)
 
-    def read_data(self):
-        # Fetch Data from InfluxDB
+    def lookback_seconds(self):
+        # Just enough history for one window per series, with some slack for late or missing reports
+        return int(self.reporting_interval * self.window_size * self.range_margin)
+
+    def build_query(self, start=None, stop=None, keys=None):
+        """
+        Builds the Flux query for the latest window of every (slice type, NSSI) series,
+        or only of the (slice type, NSSI) pairs in keys if given.
+
+        The range is bounded: from start (a UTC timestamp) if given, otherwise from
+        time_range if that is a non-zero duration, otherwise reporting_interval x
+        window_size x range_margin back from stop (default: now). Fields are pivoted
+        into columns server-side with schema.fieldsAsCols and tail is applied per
+        series after grouping by the slice type and NSSI tags and sorting by time,
+        as regrouping does not keep the rows in time order.
+        """
+        if start is not None:
+            range_start = format_time(start)
+        elif self.time_range and self.time_range not in ("-0", "0"):
+            range_start = self.time_range
+        elif stop is not None:
+            range_start = format_time(stop - pd.Timedelta(seconds=self.lookback_seconds()))
+        else:
+            range_start = f"-{self.lookback_seconds()}s"
+        range_stop = f", stop: {format_time(stop)}" if stop is not None else ""
+
         fields_filter = " or ".join([f'r["_field"] == "{f}"' for f in self.field_names])
-        query = f'''
+        series_filter = ""
+        if keys:
+            series_filter = "\n            |> filter(fn: (r) => " + " or ".join([
+                f'(r["{self.tag_slice_type}"] == {format_string(slice_type)} and r["{self.tag_nssi_id}"] == {format_string(nssi_id)})'
+                for slice_type, nssi_id in keys
+            ]) + ")"
+        columns = '", "'.join(["_time", self.tag_slice_type, self.tag_nssi_id] + self.field_names)
+        return f'''
+            import "influxdata/influxdb/schema"
+
             from(bucket: "{self.bucket}")
-            |> range(start: {self.time_range})
+            |> range(start: {range_start}{range_stop})
             |> filter(fn: (r) => r["_measurement"] == "{self.measurements}")
-            |> filter(fn: (r) => {fields_filter})
-            |> tail(n:{self.window_size})
-            |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
-            |> keep(columns: ["_time", "{self.tag_slice_type}", "{self.tag_nssi_id}", "{'","'.join(self.field_names)}"])
+            |> filter(fn: (r) => {fields_filter}){series_filter}
+            |> schema.fieldsAsCols()
+            |> group(columns: ["{self.tag_slice_type}", "{self.tag_nssi_id}"])
             |> sort(columns: ["_time"])
+            |> tail(n: {self.window_size})
+            |> keep(columns: ["{columns}"])
+            |> group()
         '''
 
-        result = self.query(query)
+    def read_data(self, start=None, stop=None, keys=None):
+        # Fetch the latest window of every series (or of keys) from InfluxDB, see build_query
+        result = self.query(self.build_query(start=start, stop=stop, keys=keys))
         return result
 
     # Query data
@@ -0,0 +1,177 @@
+"""
+Rolling feature buffers for the slice PRB LSTM.
+
+FeatureCache keeps, per (slice_type, nssi_id), the last window model input rows,
+already one-hot encoded and scaled, as float32. Each inference only scales and appends
+the points that are newer than what the buffer holds, and the inference reads only
+the data since the oldest buffered point, so the work per notification grows with
+the number of new points instead of the window size. Series that show up in such a read
+without their history are read again over the whole lookback range, see keys_to_backfill.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class RollingWindow(object):
+    """
+    Fixed-size window of feature rows.
+
+    Every row is written twice, window rows apart, into a buffer of 2 * window rows,
+    so the latest window is always a contiguous slice and reading it needs no copy.
+    """
+
+    def __init__(self, window, features):
+        self.window = window
+        self.buffer = np.zeros((2 * window, features), dtype=np.float32)
+        self.position = 0
+        self.count = 0
+        self.last_time = None
+
+    def append(self, rows, last_time):
+        rows = rows[-self.window:]
+        for row in rows:
+            self.buffer[self.position] = row
+            self.buffer[self.position + self.window] = row
+            self.position = (self.position + 1) % self.window
+        self.count = min(self.count + len(rows), self.window)
+        self.last_time = last_time
+
+    @property
+    def full(self):
+        return self.count == self.window
+
+    def latest(self):
+        return self.buffer[self.position:self.position + self.window]
+
+
+def onehot_rows(encoder):
+    # Maps every category of a fitted single-column OneHotEncoder to its float32 row
+    categories = encoder.categories_[0]
+    rows = encoder.transform(np.asarray(categories, dtype=object).reshape(-1, 1)).astype(np.float32)
+    return dict(zip(categories.tolist(), rows))
+
+
+class FeatureCache(object):
+
+    def __init__(self, enc, nssi_enc, scalers, window):
+        self.enc = enc
+        self.nssi_enc = nssi_enc
+        self.scalers = scalers
+        self.window = window
+        self.windows = {}  # (slice_type, nssi_id) -> RollingWindow
+        # One-hot rows of the categories the encoders were fitted on, so lookups of
+        # caller-supplied values cannot grow them
+        self.slice_onehot = onehot_rows(enc)
+        self.nssi_onehot = onehot_rows(nssi_enc)
+        self.active = set()  # keys that received points in the last update with new data
+
+    def resume_time(self):
+        """
+        Time from which data has to be read to bring the buffers up to date, or None
+        before the first update. Only series that received points in the last update
+        count, so a series that stopped reporting does not hold the read window open;
+        series that show up (again) later are backfilled, see keys_to_backfill.
+        """
+        if not self.windows:
+            return None
+        keys = self.active or self.windows.keys()
+        return min(self.windows[key].last_time for key in keys)
+
+    def keys_to_backfill(self, df: pd.DataFrame, start):
+        """
+        Keys of df whose buffer misses points before start, the time df was read from:
+        series without a buffer, and series whose buffer ends before start because
+        they stopped reporting for a while.
+        """
+        keys = df[["slice_type", "nssi_id"]].drop_duplicates().itertuples(index=False, name=None)
+        return [
+            key for key in keys
+            if key not in self.windows or self.windows[key].last_time < start
+        ]
+
+    def encode(self, key):
+        """One-hot part of the feature rows of key, raises ValueError for unknown values."""
+        slice_type, nssi_id = key
+        try:
+            return np.concatenate([self.slice_onehot[slice_type], self.nssi_onehot[nssi_id]])
+        except (KeyError, TypeError):
+            raise ValueError(f"Unknown slice type or NSSI: {slice_type!r}, {nssi_id!r}")
+
+    def scale(self, df: pd.DataFrame):
+        """Scaled prb_dl, data_dl and rrc_succ columns of df as a (rows, 3) float32 array."""
+        return np.concatenate([
+            self.scalers["prb"].transform(df[["prb_dl"]]),
+            self.scalers["data"].transform(df[["data_dl"]]),
+            self.scalers["rrc"].transform(df[["rrc_succ"]])
+        ], axis=1).astype(np.float32)
+
+    def window_features(self, key, df: pd.DataFrame):
+        """
+        Model input for the last window rows of df (time ordered KPI rows of the series key),
+        without touching the buffers. Raises ValueError if df has fewer rows than the window
+        or the slice type or NSSI is unknown to the encoders.
+        """
+        if len(df) < self.window:
+            raise ValueError(f"{self.window} rows are needed, got {len(df)}")
+        df = df.iloc[-self.window:]
+        onehot = self.encode(key)
+        return np.concatenate([np.broadcast_to(onehot, (self.window, len(onehot))), self.scale(df)], axis=1)
+
+    def update(self, df: pd.DataFrame):
+        """Appends the rows of df (sorted by slice_type, nssi_id and time) that are new to their buffer."""
+        if df.empty:
+            return 0
+
+        # Drop the points every buffer already holds before scaling anything
+        last_times = pd.Series(
+            {key: rolling.last_time for key, rolling in self.windows.items()}, dtype=object
+        )
+        if not last_times.empty:
+            index = pd.MultiIndex.from_frame(df[["slice_type", "nssi_id"]])
+            known = last_times.reindex(index).to_numpy()
+            has_known = pd.notna(known)
+            is_new = ~has_known
+            is_new[has_known] = (df["time"].to_numpy()[has_known] > known[has_known]).astype(bool)
+            df = df[is_new]
+            if df.empty:
+                return 0
+
+        numeric = self.scale(df)
+
+        slice_types = df["slice_type"].to_numpy()
+        nssi_ids = df["nssi_id"].to_numpy()
+        times = df["time"]
+        boundaries = np.flatnonzero((slice_types[1:] != slice_types[:-1]) | (nssi_ids[1:] != nssi_ids[:-1])) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(df)]))
+
+        self.active = set()
+        for start, end in zip(starts, ends):
+            key = (slice_types[start], nssi_ids[start])
+            self.active.add(key)
+            onehot = self.encode(key)
+            rolling = self.windows.get(key)
+            if rolling is None:
+                rolling = self.windows[key] = RollingWindow(self.window, len(onehot) + numeric.shape[1])
+            rows = np.concatenate([np.broadcast_to(onehot, (end - start, len(onehot))), numeric[start:end]], axis=1)
+            rolling.append(rows, times.iloc[end - 1])
+
+        return len(df)
+
+    def latest_windows(self):
+        """Returns the keys with a full window and a (groups, window, features) float32 tensor of their windows."""
+        keys = []
+        for key in sorted(self.windows):
+            rolling = self.windows[key]
+            if rolling.full:
+                keys.append(key)
+            else:
+                logger.warning(f"Not enough recent points for slice_type='{key[0]}' and nssi='{key[1]}' to build a window of {self.window}. Skipping.")
+        if not keys:
+            return [], None
+        return keys, np.stack([self.windows[key].latest() for key in keys])
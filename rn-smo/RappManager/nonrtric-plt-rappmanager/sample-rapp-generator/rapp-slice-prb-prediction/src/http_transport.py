@@ -0,0 +1,201 @@
+"""
+Shared HTTP transport for the rApp clients.
+
+Keeps one keep-alive session per host with a sized connection pool, applies a
+default timeout and a retry/backoff policy, opens a circuit breaker for hosts
+that keep failing and records per-endpoint latency metrics.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit breaker is open."""
+
+
+class CircuitBreaker(object):
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: let a trial request through once the reset timeout has passed
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class HttpTransport(object):
+
+    def __init__(self, timeout=30, pool_connections=10, pool_maxsize=20, retries=3, backoff_factor=0.5,
+                 status_forcelist=(502, 503, 504), failure_threshold=5, reset_timeout=30):
+        self.timeout = timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False
+        )
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.sessions = {}
+        self.breakers = {}
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    def _host(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _session(self, host):
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=self.retry
+                )
+                session.mount(host, adapter)
+                self.sessions[host] = session
+                self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return session, self.breakers[host]
+
+    def request(self, method, url, **kwargs):
+        host = self._host(url)
+        session, breaker = self._session(host)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"Circuit breaker is open for {host}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = f"{method.upper()} {host}{urlsplit(url).path}"
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            breaker.record_failure()
+            self._record(endpoint, time.perf_counter() - start, failed=True)
+            raise
+
+        failed = response.status_code >= 500
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        self._record(endpoint, time.perf_counter() - start, failed=failed)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def _record(self, endpoint, elapsed, failed=False):
+        with self.lock:
+            stats = self.latencies.setdefault(endpoint, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+
+    def metrics(self):
+        # Snapshot of the per-endpoint latency metrics (seconds) and breaker states
+        with self.lock:
+            endpoints = {
+                endpoint: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg": stats["total"] / stats["count"],
+                    "max": stats["max"]
+                }
+                for endpoint, stats in self.latencies.items()
+            }
+            breakers = {host: "open" if breaker.is_open else "closed" for host, breaker in self.breakers.items()}
+        return {"endpoints": endpoints, "circuit_breakers": breakers}
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+            self.breakers.clear()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def transport_from_config(http_config):
+    # HttpTransport configured from the "HTTP" section of an rApp's config.json
+    return HttpTransport(
+        timeout=float(http_config.get("timeout", 30)),
+        pool_connections=int(http_config.get("pool_connections", 10)),
+        pool_maxsize=int(http_config.get("pool_maxsize", 20)),
+        retries=int(http_config.get("retries", 3)),
+        backoff_factor=float(http_config.get("backoff_factor", 0.5)),
+        failure_threshold=int(http_config.get("failure_threshold", 5)),
+        reset_timeout=float(http_config.get("reset_timeout", 30))
+    )
+
+
+def configure_transport(http_config):
+    # Replaces the process-wide transport with one configured by the caller, at startup
+    global _transport
+    transport = transport_from_config(http_config)
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    if previous is not None:
+        previous.close()
+    return transport
+
+
+def get_transport():
+    # Process-wide transport, with the default settings until configure_transport is called
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
@@ -1,21 +1,21 @@
 import argparse
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from data import DATABASE
 
-from threading import Lock
+from threading import Event, Lock, Thread
 import logging
 
-from joblib import load
-
-import tensorflow as tf
-
 import numpy as np
 import pandas as pd
 import json
 
-from typing import Optional
-
 from ran_nssmf_client import RAN_NSSMF_CLIENT
+from http_transport import configure_transport
+from notification_queue import NotificationQueue
+from micro_batcher import MicroBatcher
+from model_watcher import DirectorySource, ModelManagementSource, ModelWatcher, load_model_version
 from flask import Flask, request, jsonify
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -27,42 +27,89 @@ app = Flask(__name__)
 class SlicePRBPrediction():
     def __init__(self, use_sme=False):
         self.interval = None
+        self.use_sme = use_sme
 
         # Initialize the database and prediction client
         self.db = DATABASE()
         self.ran_nssmf_client = RAN_NSSMF_CLIENT()
 
-        if use_sme:
-            # Get the InfluxDB URL from SME
-            self.db.get_url_from_sme()
-            # self.ran_nssmf_client.get_url_from_sme()
-
-        self.db.connect()
-
         self.inference_lock = Lock()
         self._running = False
 
         self.features = ["sliceType_enc", "RRU.PrbDl.SNSSAI","DRB.PdcpSduVolumeDL.SNSSAI","RRC.ConnEstabSucc.Cause"]
 
-        self.enc = load(os.path.join("models", "slice_onehot.joblib"))
-        self.nssi_enc = load(os.path.join("models", "nssi_onehot.joblib"))
-        self.scalers = {
-            "prb": load(os.path.join("models", "scaler_prb.joblib")),
-            "data": load(os.path.join("models", "scaler_data.joblib")),
-            "rrc": load(os.path.join("models", "scaler_rrc.joblib")),
-            "y": load(os.path.join("models", "scaler_y.joblib"))
-        }
-        self.model = tf.keras.models.load_model(os.path.join("models", "best_prb_lstm.keras"))
+        # Set by load(), which runs in the background so the HTTP listener starts right away.
+        # The serving ModelVersion (predictor, encoders, scalers and feature buffers) is only
+        # ever replaced as a whole, see swap_model().
+        self.model = None
+        self.model_watcher = None
+        self.ready = Event()
+        self.started = time.monotonic()
+        self.startup_seconds = None
 
         self.callback_uri = None
 
         self.config()
 
+    def load(self):
+        """
+        Connects to InfluxDB and loads and warms the model artifacts. Sets ready once
+        the predictor has served its warm-up call.
+        """
+        if self.use_sme:
+            # Get the InfluxDB URL from SME
+            self.db.get_url_from_sme()
+            # self.ran_nssmf_client.get_url_from_sme()
+
+        self.db.connect()
+
+        # Starts on the model in model_dir; newer versions are swapped in by the watcher.
+        # TensorFlow is only imported if the backend needs the Keras model.
+        source, version = None, "bundled"
+        if self.model_watch == "directory":
+            source = DirectorySource(self.model_dir)
+            version = source.fingerprint()
+        elif self.model_watch == "mme":
+            source = ModelManagementSource(self.mme_address, self.model_name, self.tm_address, self.model_download_dir)
+        self.model = self.load_model_version(version, self.model_dir)
+
+        if source:
+            self.model_watcher = ModelWatcher(
+                source, self.load_model_version, self.swap_model,
+                current_version=version, interval=self.model_watch_interval
+            )
+
+        self.startup_seconds = time.monotonic() - self.started
+        self.ready.set()
+        logger.info(f"Slice PRB Prediction rApp ready after {self.startup_seconds:.1f}s")
+
+        if self.model_watcher:
+            self.model_watcher.start()
+
+    def load_model_version(self, version, model_dir):
+        # Loads and warms a model version, keeping the current encoders and scalers if model_dir has none
+        return load_model_version(
+            version,
+            model_dir,
+            window=self.db.window_size,
+            backend=self.predictor_backend,
+            batch_size=self.predict_batch_size,
+            current=self.model
+        )
+
+    def swap_model(self, model):
+        # A single reference assignment: inference and /predict batches in flight finish on
+        # the version they started with
+        self.model = model
+
     def config(self):
 
         with open('config.json', 'r') as f:
             config = json.load(f)
 
+        # The NSSMF, SME and model management clients share one HTTP transport
+        configure_transport(config.get("HTTP", {}))
+
         # Load RAPP configuration, with a default interval of 10 seconds
         rapp_config = config.get("RAPP", {}) # Renamed for clarity
 
@@ -70,6 +117,23 @@ class SlicePRBPrediction():
         interval_str = rapp_config.get("interval", "672") # Default to "10" string
         self.interval = int(interval_str)
         self.callback_uri = rapp_config.get("callback_uri", "http://localhost:8080/handleFileReadyNotification")
+        self.predict_batch_size = int(rapp_config.get("predict_batch_size", 256))
+        self.nssmf_max_workers = int(rapp_config.get("nssmf_max_workers", 8))
+        self.predictor_backend = rapp_config.get("predictor_backend", "keras")
+        # Dynamic batching of /predict requests
+        self.predict_max_batch_size = int(rapp_config.get("predict_max_batch_size", 256))
+        self.predict_max_wait_ms = float(rapp_config.get("predict_max_wait_ms", 5))
+
+        # Model versions: "directory" watches model_dir, "mme" polls the model management service
+        model_config = config.get("MODEL", {})
+        self.model_dir = model_config.get("directory", "models")
+        self.model_watch = model_config.get("watch", "directory")
+        self.model_watch_interval = float(model_config.get("watch_interval", 60))
+        self.model_load_attempts = max(1, int(model_config.get("load_attempts", 5)))
+        self.mme_address = model_config.get("mme_address", "http://modelmgmtservice.ridenext-ai-platform:8082")
+        self.tm_address = model_config.get("tm_address", "http://tm.ridenext-ai-platform:32002")
+        self.model_name = model_config.get("model_name", "slice-prb-lstm")
+        self.model_download_dir = model_config.get("download_dir", os.path.join("models", "versions"))
 
     def subscribe_to_notifications(self):
         # This method will be called after the app is created to subscribe to notifications
@@ -96,9 +160,9 @@ class SlicePRBPrediction():
         finally:
             self.inference_lock.release()
 
-    def inference(self):
-        logger.info("Starting inference process...")
-        df = self.db.read_data()
+    def read_kpis(self, start=None, keys=None):
+        # KPI rows of every series (or of keys) since start, renamed, time ordered per series
+        df = self.db.read_data(start=start, keys=keys)
 
         # Standardize column names
         df = df.rename(columns={
@@ -111,125 +175,217 @@ class SlicePRBPrediction():
         })
 
         if df.empty:
-            logger.info("No data to process... skipping this iteration of inference.")
-            return
+            return df
 
         # Ensure types
         df["time"] = pd.to_datetime(df["time"], utc=True)
         df = df.sort_values(["slice_type", "nssi_id", "time"]).reset_index(drop=True)
 
         # Drop rows with any NA in core columns
-        df = df.dropna(subset=["slice_type", "nssi_id", "time", "prb_dl", "data_dl", "rrc_succ"])
-
-        target_groups = sorted(df[["slice_type", "nssi_id"]].drop_duplicates().values.tolist())
-        results = []
-        for st, nssi in target_groups:
-            X_latest = self.build_window_for_latest_slice(
-            df, 
-            target_slice_type=st, 
-            target_nssi_id=nssi,
-            window=self.db.window_size
-            )
-            if X_latest is None:
-                logger.warning(f"Not enough recent points for slice_type='{st}' and nssi='{nssi}' to build a window of {self.db.window_size}. Skipping.")
-                continue
-        
-            y_pred_scaled = self.model.predict(X_latest).reshape(-1, 1)
-            y_pred = self.scalers["y"].inverse_transform(y_pred_scaled)[0, 0]
-            results.append({"slice_type": st, "nssi_id": nssi, "predicted_prb_dl_next": float(y_pred)})
+        return df.dropna(subset=["slice_type", "nssi_id", "time", "prb_dl", "data_dl", "rrc_succ"])
 
+    def inference(self):
+        logger.info("Starting inference process...")
+        # The whole run uses one model version, even if a new one is swapped in meanwhile
+        model = self.model
+        # Only the points the feature buffers do not hold yet are read
+        start = model.feature_cache.resume_time()
+        df = self.read_kpis(start=start)
+
+        if df.empty:
+            logger.info("No data to process... skipping this iteration of inference.")
+            return
+
+        if start is not None:
+            # New slices, and slices that stopped reporting for a while, need their history too
+            backfill_keys = model.feature_cache.keys_to_backfill(df, start)
+            if backfill_keys:
+                logger.info(f"Reading the full lookback range for {len(backfill_keys)} new or returning slice(s).")
+                series = pd.MultiIndex.from_frame(df[["slice_type", "nssi_id"]])
+                df = pd.concat([df[~series.isin(backfill_keys)], self.read_kpis(keys=backfill_keys)])
+                df = df.sort_values(["slice_type", "nssi_id", "time"]).reset_index(drop=True)
+
+        new_points = model.feature_cache.update(df)
+        logger.info(f"Appended {new_points} new points to the feature buffers.")
+        keys, X = model.feature_cache.latest_windows()
+        if not keys:
+            logger.info("No slice has enough points for a full window... skipping this iteration of inference.")
+            return
+
+        # One model call for all slices
+        y_preds = model.predict(X)
+        results = [
+            {"slice_type": st, "nssi_id": nssi, "predicted_prb_dl_next": float(y_pred)}
+            for (st, nssi), y_pred in zip(keys, y_preds)
+        ]
+
+        # The NSSMF reads and updates of different slices are independent, run them concurrently
+        with ThreadPoolExecutor(max_workers=self.nssmf_max_workers, thread_name_prefix="nssmf") as executor:
+            list(executor.map(self.update_slice, [nssi for _, nssi in keys], y_preds))
+
+        logger.info(f"Inference results: {json.dumps({'results': results}, indent=2)}")
+
+    def prepare_instances(self, instances):
+        """
+        Builds the model input for /predict instances, each with slice_type, nssi_id and
+        rows, the time ordered recent KPI rows of the slice as objects with prb_dl, data_dl
+        and rrc_succ. The last window rows of every instance are used. Raises ValueError
+        for malformed instances. Returns the model version the input was prepared for, the
+        (slice_type, nssi_id) keys and the windows.
+        """
+        model = self.model
+        if not isinstance(instances, list) or not instances:
+            raise ValueError("'instances' must be a non-empty list")
+
+        columns = ["prb_dl", "data_dl", "rrc_succ"]
+        keys, windows = [], []
+        for i, instance in enumerate(instances):
+            try:
+                key = (instance["slice_type"], instance["nssi_id"])
+                rows = instance["rows"]
+                if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                    raise ValueError("'rows' must be a list of objects")
+                missing = sorted({column for row in rows for column in columns if column not in row})
+                if missing:
+                    raise ValueError(f"rows without {', '.join(missing)}")
+                rows = pd.DataFrame(rows, columns=columns).astype(float)
+                if not np.isfinite(rows.to_numpy()).all():
+                    raise ValueError("KPI values must be finite numbers")
+                windows.append(model.feature_cache.window_features(key, rows))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid instance {i}: {e}")
+            keys.append(key)
+        return model, keys, np.stack(windows)
+
+    def update_slice(self, nssi, y_pred):
+        try:
             # Fetch NSSI details from RAN NSSMF simulator
             logger.info(f"Fetching details for NSSI ID: {nssi} from RAN NSSMF simulator.")
             nssi_details = self.ran_nssmf_client.get_network_slice_subnet(subnet_id=nssi)
-            if nssi_details:
-                logger.info(f"Successfully fetched details for NSSI ID {nssi}.")
-                # logger.debug(f"NSSI Details: {json.dumps(nssi_details, indent=2)}") # Uncomment for verbose details
-
-                # Extract current_prb_dl from nssi_details
-                # Path: nssi_details["attributes"]["sliceProfileList"][0]["ransliceSubnetProfile"]["RRU.PrbDl"]
-                try:
-                    current_prb_dl = nssi_details.get("attributes", {}) \
-                                                .get("sliceProfileList", [{}])[0] \
-                                                .get("ransliceSubnetProfile", {}) \
-                                                .get("RRU.PrbDl")
-                    
-                    if current_prb_dl is not None:
-                        logger.info(f"Current PRB DL for NSSI ID {nssi}: {current_prb_dl}. Predicted PRB DL: {y_pred:.2f}")
-                        if current_prb_dl < y_pred:
-                            logger.info(f"Current PRB DL ({current_prb_dl}) is less than predicted ({y_pred:.2f}). Sending modification request.")
-                            modification_response = self.ran_nssmf_client.modify_network_slice_subnet(
-                                subnet_id=nssi, 
-                                new_prb_dl=int(y_pred) # Cast to int as RRU.PrbDl is an integer
-                            )
-                            if modification_response:
-                                logger.info(f"Successfully sent modification request for NSSI ID {nssi}. Status: {modification_response.status_code}")
-                            else:
-                                logger.warning(f"Failed to send modification request for NSSI ID {nssi}.")
-                        else:
-                            logger.info(f"Current PRB DL ({current_prb_dl}) is not less than predicted ({y_pred:.2f}). No modification needed.")
-                    else:
-                        logger.warning(f"Could not find RRU.PrbDl in NSSI details for NSSI ID {nssi}.")
-                except (IndexError, TypeError) as e:
-                    logger.error(f"Error parsing RRU.PrbDl from NSSI details for NSSI ID {nssi}: {e}. NSSI Details: {json.dumps(nssi_details, indent=2)}")
-
-            else:
+            if not nssi_details:
                 logger.warning(f"Failed to fetch details for NSSI ID: {nssi}.")
-        
-        logger.info(f"Inference results: {json.dumps({'results': results}, indent=2)}")
-        
-    
-    def build_window_for_latest_slice(
-        self,
-        df: pd.DataFrame,
-        target_slice_type: str,
-        target_nssi_id: str,
-        window: int
-    ) -> Optional[np.ndarray]:
-        g = df[(df["slice_type"] == target_slice_type) & (df["nssi_id"] == target_nssi_id)].sort_values("time").reset_index(drop=True)
-        if len(g) < window:
-            return None
-
-        oh = self.enc.transform(np.array([[target_slice_type]]))
-        oh_row = np.repeat(oh, window, axis=0)
-
-        nssi_oh = self.nssi_enc.transform(np.array([[target_nssi_id]]))
-        nssi_oh_row = np.repeat(nssi_oh, window, axis=0)
-
-        prb = self.scalers["prb"].transform(g[["prb_dl"]].iloc[-window:])
-        data = self.scalers["data"].transform(g[["data_dl"]].iloc[-window:])
-        rrc = self.scalers["rrc"].transform(g[["rrc_succ"]].iloc[-window:])
-
-        feat = np.concatenate([oh_row, nssi_oh_row, prb, data, rrc], axis=1).astype(np.float32)
-        return feat[np.newaxis, :, :]  # shape (1, window, features)
+                return
+
+            logger.info(f"Successfully fetched details for NSSI ID {nssi}.")
+            # logger.debug(f"NSSI Details: {json.dumps(nssi_details, indent=2)}") # Uncomment for verbose details
+
+            # Extract current_prb_dl from nssi_details
+            # Path: nssi_details["attributes"]["sliceProfileList"][0]["ransliceSubnetProfile"]["RRU.PrbDl"]
+            try:
+                current_prb_dl = nssi_details.get("attributes", {}) \
+                                            .get("sliceProfileList", [{}])[0] \
+                                            .get("ransliceSubnetProfile", {}) \
+                                            .get("RRU.PrbDl")
+            except (IndexError, TypeError) as e:
+                logger.error(f"Error parsing RRU.PrbDl from NSSI details for NSSI ID {nssi}: {e}. NSSI Details: {json.dumps(nssi_details, indent=2)}")
+                return
+
+            if current_prb_dl is None:
+                logger.warning(f"Could not find RRU.PrbDl in NSSI details for NSSI ID {nssi}.")
+                return
+
+            logger.info(f"Current PRB DL for NSSI ID {nssi}: {current_prb_dl}. Predicted PRB DL: {y_pred:.2f}")
+            if current_prb_dl < y_pred:
+                logger.info(f"Current PRB DL ({current_prb_dl}) is less than predicted ({y_pred:.2f}). Sending modification request.")
+                modification_response = self.ran_nssmf_client.modify_network_slice_subnet(
+                    subnet_id=nssi,
+                    new_prb_dl=int(y_pred), # Cast to int as RRU.PrbDl is an integer
+                    subnet_data=nssi_details # Already fetched above, no second GET
+                )
+                if modification_response:
+                    logger.info(f"Successfully sent modification request for NSSI ID {nssi}. Status: {modification_response.status_code}")
+                else:
+                    logger.warning(f"Failed to send modification request for NSSI ID {nssi}.")
+            else:
+                logger.info(f"Current PRB DL ({current_prb_dl}) is not less than predicted ({y_pred:.2f}). No modification needed.")
+        except Exception as e:
+            # One failing slice must not stop the updates of the others
+            logger.error(f"Error updating NSSI ID {nssi}: {str(e)}", exc_info=True)
 
 # Global instance of SlicePRBPrediction to be used by Flask routes
 # This instance will be initialized after parsing arguments.
 rapp_instance = None
+# Runs the inference for incoming notifications on a worker thread
+notification_queue = None
+# Batches concurrent /predict requests into one model call
+predict_batcher = None
 
 @app.route('/handleFileReadyNotification', methods=['POST'])
 def handle_file_ready_notification():
     logger.info("Received POST request on /handleFileReadyNotification")
-    if not rapp_instance:
+    if not rapp_instance or not notification_queue:
         logger.error("rapp_instance not initialized. Cannot process notification.")
         return jsonify({"status": "error", "message": "Application not properly initialized"}), 500
 
-    notification_data = request.get_json()
+    notification_data = request.get_json(silent=True)
     if not notification_data:
         logger.warning("No JSON data received in notification.")
         return jsonify({"status": "error", "message": "Invalid JSON payload"}), 400
 
-    logger.info(f"Notification received: {json.dumps(notification_data, indent=2)}")
+    logger.debug(f"Notification received: {json.dumps(notification_data, indent=2)}")
+
+    # Inference runs on the notification worker, the RAN NSSMF gets its answer right away.
+    # Notifications arriving before the next run starts are coalesced into that run.
+    queue_depth = notification_queue.submit()
+    logger.info(f"Notification queued for inference, {queue_depth} notification(s) pending.")
+    return jsonify({"status": "accepted", "message": "Notification received and inference scheduled", "queue_depth": queue_depth}), 202
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    if not rapp_instance or not predict_batcher:
+        logger.error("rapp_instance not initialized. Cannot serve predictions.")
+        return jsonify({"status": "error", "message": "Application not properly initialized"}), 500
+
+    payload = request.get_json(silent=True)
+    if not payload:
+        return jsonify({"status": "error", "message": "Invalid JSON payload"}), 400
+
+    if not rapp_instance.ready.is_set():
+        return jsonify({"status": "error", "message": "Model is still loading"}), 503
+
+    try:
+        model, keys, X = rapp_instance.prepare_instances(payload.get("instances"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-    # Trigger the inference process
-    # The notification_data (e.g., fileInfoList) could be used to tailor the inference
-    # For now, we'll trigger the general inference process.
     try:
-        rapp_instance.safe_inference()
-        logger.info("Inference process triggered successfully by notification.")
-        return jsonify({"status": "success", "message": "Notification received and inference triggered"}), 200
+        # Batched only with requests prepared for the same model version
+        y_preds = predict_batcher.submit(X, key=model).result()
     except Exception as e:
-        logger.error(f"Error during inference triggered by notification: {str(e)}", exc_info=True)
-        return jsonify({"status": "error", "message": f"Inference failed: {str(e)}"}), 500
+        logger.error(f"Error serving /predict: {str(e)}")
+        return jsonify({"status": "error", "message": "Prediction failed"}), 500
+
+    predictions = [
+        {"slice_type": st, "nssi_id": nssi, "predicted_prb_dl_next": float(y_pred)}
+        for (st, nssi), y_pred in zip(keys, y_preds)
+    ]
+    return jsonify({"predictions": predictions}), 200
+
+@app.route('/health/live', methods=['GET'])
+def live():
+    return jsonify({"status": "alive"}), 200
+
+@app.route('/health/ready', methods=['GET'])
+def ready():
+    # Ready once the artifacts are loaded and the model has served its warm-up call
+    if not rapp_instance or not rapp_instance.ready.is_set():
+        return jsonify({"status": "loading"}), 503
+    return jsonify({"status": "ready"}), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    if not notification_queue:
+        return jsonify({"status": "error", "message": "Application not properly initialized"}), 500
+    metrics = notification_queue.metrics()
+    metrics["ready"] = rapp_instance.ready.is_set()
+    metrics["startup_seconds"] = rapp_instance.startup_seconds
+    if rapp_instance.model_watcher:
+        metrics["model"] = rapp_instance.model_watcher.metrics()
+    elif rapp_instance.model:
+        metrics["model"] = {"version": rapp_instance.model.version}
+    if predict_batcher:
+        metrics["predict"] = predict_batcher.metrics()
+    return jsonify(metrics), 200
 
 if __name__ == "__main__":
     
@@ -247,15 +403,38 @@ if __name__ == "__main__":
     parser.add_argument("--use_sme", type=str2bool, default=False, help="Set to True use SME url for DB.")
     args = parser.parse_args()
 
-    # Instantiate the SlicePRBPrediction class
+    # Instantiate the SlicePRBPrediction class; only the configuration is read here
     rapp_instance = SlicePRBPrediction(use_sme=args.use_sme)
-    logger.debug("Slice PRB Prediction rApp initialized")
-
-    # Subscribe to RAN NSSMF notifications at startup
-    if rapp_instance:
+    # Notifications are accepted and queued from the start, they run once the model is ready
+    notification_queue = NotificationQueue(rapp_instance.safe_inference)
+    predict_batcher = MicroBatcher(
+        lambda model, X: model.predict(X),
+        max_batch_size=rapp_instance.predict_max_batch_size,
+        max_wait=rapp_instance.predict_max_wait_ms / 1000
+    )
+
+    def start():
+        # Subscribe to RAN NSSMF notifications at startup
         rapp_instance.subscribe_to_notifications()
-    else:
-        logger.error("rapp_instance not initialized. Cannot subscribe to notifications.")
+        for attempt in range(1, rapp_instance.model_load_attempts + 1):
+            try:
+                rapp_instance.load()
+                break
+            except Exception as e:
+                logger.error(f"Failed to load the slice PRB model (attempt {attempt}/{rapp_instance.model_load_attempts}): {str(e)}", exc_info=True)
+            if attempt < rapp_instance.model_load_attempts:
+                time.sleep(min(2 ** attempt, 60))
+        else:
+            # Never ready, and nothing would process the queued notifications: exit so
+            # that Kubernetes restarts the pod
+            logger.critical("Giving up loading the slice PRB model, exiting.")
+            os._exit(1)
+        notification_queue.start()
+        predict_batcher.start()
+        logger.debug("Slice PRB Prediction rApp initialized")
+
+    # Loading runs next to the HTTP listener, /health/ready reports when it is done
+    Thread(target=start, name="startup", daemon=True).start()
 
     # Run the Flask app
     # The host is set to '0.0.0.0' to make it accessible from outside the container (if applicable)
@@ -0,0 +1,124 @@
+"""
+Dynamic batching of /predict requests.
+
+Every request thread submits its windows and waits on a Future. A worker thread
+collects the requests that arrive within max_wait seconds of the first one, up to
+max_batch_size windows, and runs one model call for all of them. Requests are only
+batched with requests for the same key, the model version they were prepared for.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher(object):
+
+    def __init__(self, predict, max_batch_size=256, max_wait=0.005):
+        self.predict = predict  # (key, X) -> predictions
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.condition = threading.Condition()
+        self.pending = []  # (key, windows, future) waiting for the next batch
+        self.pending_windows = 0
+        self._stopped = False
+        self.thread = threading.Thread(target=self._work, name="predict-batcher", daemon=True)
+
+        self.requests = 0
+        self.batches = 0
+        self.windows = 0
+        self.failures = 0
+        self.total_duration = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def submit(self, X, key=None):
+        """Queues a (n, window, features) tensor, returns a Future of its n predictions."""
+        future = Future()
+        with self.condition:
+            if self._stopped:
+                raise RuntimeError("Batcher is stopped")
+            self.requests += 1
+            self.pending.append((key, X, future))
+            self.pending_windows += len(X)
+            self.condition.notify()
+        return future
+
+    def _next_batch(self):
+        with self.condition:
+            while not self._stopped and not self.pending:
+                self.condition.wait()
+            # Give concurrent requests max_wait to join, unless the batch is already full
+            deadline = time.monotonic() + self.max_wait
+            while not self._stopped and self.pending_windows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            if self._stopped:
+                return None
+
+            key = self.pending[0][0]
+            batch, size = [], 0
+            while self.pending and self.pending[0][0] == key and \
+                    (not batch or size + len(self.pending[0][1]) <= self.max_batch_size):
+                _, X, future = self.pending.pop(0)
+                batch.append((X, future))
+                size += len(X)
+            self.pending_windows -= size
+            return key, batch
+
+    def _work(self):
+        while True:
+            next_batch = self._next_batch()
+            if next_batch is None:
+                return
+            key, batch = next_batch
+
+            start = time.perf_counter()
+            try:
+                y = self.predict(key, np.concatenate([X for X, _ in batch]))
+            except Exception as e:
+                logger.error(f"Error in batched prediction: {str(e)}", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+                with self.condition:
+                    self.failures += 1
+                continue
+            duration = time.perf_counter() - start
+
+            offset = 0
+            for X, future in batch:
+                future.set_result(y[offset:offset + len(X)])
+                offset += len(X)
+
+            with self.condition:
+                self.batches += 1
+                self.windows += offset
+                self.total_duration += duration
+
+    def metrics(self):
+        with self.condition:
+            return {
+                "queue_depth": len(self.pending),
+                "requests": self.requests,
+                "batches": self.batches,
+                "failures": self.failures,
+                "avg_batch_windows": self.windows / self.batches if self.batches else None,
+                "avg_batch_duration_seconds": self.total_duration / self.batches if self.batches else None
+            }
+
+    def stop(self):
+        with self.condition:
+            self._stopped = True
+            pending, self.pending = self.pending, []
+            self.condition.notify()
+        for _, _, future in pending:
+            future.cancel()
+        self.thread.join()
@@ -0,0 +1,247 @@
+"""
+Hot-swapping of slice PRB model versions.
+
+A ModelVersion bundles a warmed SlicePredictor with the encoders, scalers and feature
+buffers its inputs are prepared with. ModelWatcher polls a source for a newer version,
+loads and warms it on its own thread and hands it to a callback, which swaps it in with
+a single reference assignment: inference in flight finishes on the version it started
+with, the next one uses the new version.
+
+Sources:
+  - DirectorySource watches the model directory; a version is the modification time and
+    size of its Keras model file, taken once it stayed the same for two polls.
+  - ModelManagementSource polls the model management service of the AIML framework
+    (ai-ml-model-discovery/v1/models) and downloads new versions as Model.zip, the way
+    the QoE retrain pipeline does.
+"""
+
+import io
+import logging
+import os
+import shutil
+import threading
+import zipfile
+
+import numpy as np
+from joblib import load
+
+from feature_cache import FeatureCache
+from http_transport import get_transport
+from predictor import MODEL_FILES, SlicePredictor
+
+logger = logging.getLogger(__name__)
+
+ENCODER_FILES = {"enc": "slice_onehot.joblib", "nssi_enc": "nssi_onehot.joblib"}
+SCALER_FILES = {
+    "prb": "scaler_prb.joblib",
+    "data": "scaler_data.joblib",
+    "rrc": "scaler_rrc.joblib",
+    "y": "scaler_y.joblib"
+}
+
+
+def load_artifact(model_dir, name):
+    # The encoders and scalers are small numpy-backed objects; memory mapping their
+    # arrays avoids copying them on load
+    return load(os.path.join(model_dir, name), mmap_mode="r")
+
+
+class ModelVersion(object):
+
+    def __init__(self, version, predictor, enc, nssi_enc, scalers, feature_cache):
+        self.version = version
+        self.predictor = predictor
+        self.enc = enc
+        self.nssi_enc = nssi_enc
+        self.scalers = scalers
+        self.feature_cache = feature_cache
+
+    def predict(self, X):
+        # Unscaled next PRB DL predictions for a (n, window, features) tensor
+        y_pred_scaled = self.predictor.predict(X).reshape(-1, 1)
+        return self.scalers["y"].inverse_transform(y_pred_scaled)[:, 0]
+
+
+def load_model_version(version, model_dir, window, backend, batch_size, current=None):
+    """
+    Loads and warms the model in model_dir. Encoders and scalers are loaded from model_dir
+    if it has them all, otherwise those of the current version are kept, along with its
+    feature buffers. Raises ValueError if the model does not take the features the
+    encoders produce.
+    """
+    files = list(ENCODER_FILES.values()) + list(SCALER_FILES.values())
+    if current is None or all(os.path.exists(os.path.join(model_dir, name)) for name in files):
+        enc = load_artifact(model_dir, ENCODER_FILES["enc"])
+        nssi_enc = load_artifact(model_dir, ENCODER_FILES["nssi_enc"])
+        scalers = {key: load_artifact(model_dir, name) for key, name in SCALER_FILES.items()}
+        # Buffered windows were scaled with the previous scalers, start over
+        feature_cache = FeatureCache(enc, nssi_enc, scalers, window=window)
+    else:
+        enc, nssi_enc, scalers = current.enc, current.nssi_enc, current.scalers
+        feature_cache = current.feature_cache
+
+    predictor = SlicePredictor(None, window=window, backend=backend, batch_size=batch_size, export_dir=model_dir)
+
+    # One-hot slice type and NSSI, then the scaled prb, data and rrc columns
+    features = (
+        enc.transform(np.array([[enc.categories_[0][0]]])).shape[1]
+        + nssi_enc.transform(np.array([[nssi_enc.categories_[0][0]]])).shape[1]
+        + 3
+    )
+    if predictor.features != features:
+        raise ValueError(f"Model {version} takes {predictor.features} features, the encoders and scalers produce {features}")
+
+    return ModelVersion(version, predictor, enc, nssi_enc, scalers, feature_cache)
+
+
+class DirectorySource(object):
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MODEL_FILES["keras"])
+        self.last_seen = None
+
+    def fingerprint(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def latest(self):
+        """Returns (version, model_dir) once the model file stayed unchanged for two polls, else None."""
+        seen, self.last_seen = self.last_seen, self.fingerprint()
+        if self.last_seen is None or self.last_seen != seen:
+            # Missing, or possibly still being written
+            return None
+        return self.last_seen, self.directory
+
+
+class ModelManagementSource(object):
+
+    def __init__(self, mme_address, model_name, tm_address, download_dir):
+        self.mme_address = mme_address.rstrip('/')
+        self.model_name = model_name
+        self.tm_address = tm_address.rstrip('/')
+        self.download_dir = download_dir
+
+    @staticmethod
+    def version_key(modelinfo):
+        # Orders by model version, then artifact version, numerically where possible
+        model_id = modelinfo["modelId"]
+        return tuple(
+            tuple(int(part) if part.isdigit() else 0 for part in str(model_id.get(field, "")).split("."))
+            for field in ("modelVersion", "artifactVersion")
+        )
+
+    def latest(self):
+        """Returns (version, model_dir) of the newest registered version, downloading it if needed."""
+        url = f"{self.mme_address}/ai-ml-model-discovery/v1/models/?model-name={self.model_name}"
+        response = get_transport().get(url, timeout=10)
+        response.raise_for_status()
+        models = response.json()
+        if not models:
+            logger.warning(f"No versions of model '{self.model_name}' are registered.")
+            return None
+
+        modelinfo = max(models, key=self.version_key)
+        model_version = modelinfo["modelId"]["modelVersion"]
+        artifact_version = modelinfo["modelId"]["artifactVersion"]
+        version = f"{model_version}-{artifact_version}"
+        model_dir = os.path.join(self.download_dir, version)
+        if not os.path.exists(os.path.join(model_dir, MODEL_FILES["keras"])):
+            self.download(modelinfo, model_dir)
+        return version, model_dir
+
+    def download(self, modelinfo, model_dir):
+        model_version = modelinfo["modelId"]["modelVersion"]
+        artifact_version = modelinfo["modelId"]["artifactVersion"]
+        model_url = modelinfo.get("modelLocation") or \
+            f"{self.tm_address}/model/{self.model_name}_keras/{model_version}/{artifact_version}/Model.zip"
+
+        logger.info(f"Downloading model version {model_version}-{artifact_version} from: {model_url}")
+        response = get_transport().get(model_url, timeout=120)
+        response.raise_for_status()
+
+        # Extract next to the target and rename, so a partial download is never picked up
+        staging_dir = f"{model_dir}.download"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            archive.extractall(staging_dir)
+
+        # The archive holds Model/<version>/model.keras; flatten it to the layout of models/
+        wanted = [MODEL_FILES["keras"]] + list(ENCODER_FILES.values()) + list(SCALER_FILES.values())
+        for root, _, names in os.walk(staging_dir):
+            for name in names:
+                target = MODEL_FILES["keras"] if name.endswith(".keras") else name
+                source, destination = os.path.join(root, name), os.path.join(staging_dir, target)
+                if target in wanted and source != destination:
+                    os.replace(source, destination)
+        if not os.path.exists(os.path.join(staging_dir, MODEL_FILES["keras"])):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise ValueError(f"No Keras model in the archive from {model_url}")
+
+        shutil.rmtree(model_dir, ignore_errors=True)
+        os.replace(staging_dir, model_dir)
+
+
+class ModelWatcher(object):
+
+    def __init__(self, source, load_version, swap, current_version=None, interval=60):
+        self.source = source
+        self.load_version = load_version  # (version, model_dir) -> ModelVersion
+        self.swap = swap  # ModelVersion -> None
+        self.current_version = current_version
+        self.failed_version = None
+        self.interval = interval
+        self._stopped = threading.Event()
+        self.thread = threading.Thread(target=self._work, name="model-watcher", daemon=True)
+
+        self.swaps = 0
+        self.failures = 0
+
+    def start(self):
+        self.thread.start()
+
+    def check(self):
+        """Polls the source once and swaps in a new version if there is one. Returns True on a swap."""
+        latest = self.source.latest()
+        if latest is None:
+            return False
+        version, model_dir = latest
+        if version == self.current_version or version == self.failed_version:
+            return False
+
+        logger.info(f"Loading slice PRB model version {version} from {model_dir}")
+        try:
+            model_version = self.load_version(version, model_dir)
+        except Exception as e:
+            # Not retried until the source reports another version
+            self.failed_version = version
+            self.failures += 1
+            logger.error(f"Failed to load model version {version}, keeping {self.current_version}: {str(e)}", exc_info=True)
+            return False
+
+        self.swap(model_version)
+        self.current_version = version
+        self.swaps += 1
+        logger.info(f"Swapped in slice PRB model version {version}")
+        return True
+
+    def _work(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error checking for a new model version: {str(e)}")
+
+    def metrics(self):
+        return {
+            "version": self.current_version,
+            "swaps": self.swaps,
+            "failures": self.failures
+        }
+
+    def stop(self):
+        self._stopped.set()
+        self.thread.join()
@@ -0,0 +1,98 @@
+"""
+Intake queue for file-ready notifications.
+
+The Flask handler only enqueues a notification and answers 202; a worker thread runs
+the inference. Notifications that arrive while a run is pending are coalesced into it,
+since a single run reads all the data that is new by then; notifications that arrive
+while a run is in progress schedule exactly one follow-up run.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQueue(object):
+
+    def __init__(self, run):
+        self.run = run
+        self.condition = threading.Condition()
+        # Notifications waiting for the next run; only their number is kept, a run
+        # reads all the data that is new by then regardless of the payloads
+        self.pending = 0
+        self.running = False
+        self._stopped = False
+        self.thread = threading.Thread(target=self._work, name="notification-worker", daemon=True)
+
+        self.received = 0
+        self.coalesced = 0
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def submit(self):
+        with self.condition:
+            self.received += 1
+            if self.pending:
+                self.coalesced += 1
+            self.pending += 1
+            self.condition.notify()
+            return self.pending
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self._stopped and not self.pending:
+                    self.condition.wait()
+                if self._stopped:
+                    return
+                notifications = self.pending
+                self.pending = 0
+                self.running = True
+
+            logger.info(f"Running inference for {notifications} file-ready notification(s)")
+            start = time.perf_counter()
+            failed = False
+            try:
+                self.run()
+            except Exception as e:
+                failed = True
+                logger.error(f"Error during inference triggered by notification: {str(e)}", exc_info=True)
+            duration = time.perf_counter() - start
+
+            with self.condition:
+                self.running = False
+                self.runs += 1
+                self.failures += int(failed)
+                self.last_duration = duration
+                self.total_duration += duration
+                self.max_duration = max(self.max_duration, duration)
+
+    def metrics(self):
+        with self.condition:
+            return {
+                "queue_depth": self.pending,
+                "running": self.running,
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "runs": self.runs,
+                "failures": self.failures,
+                "run_duration_seconds": {
+                    "last": self.last_duration,
+                    "avg": self.total_duration / self.runs if self.runs else None,
+                    "max": self.max_duration
+                }
+            }
+
+    def stop(self):
+        with self.condition:
+            self._stopped = True
+            self.condition.notify()
+        self.thread.join()
@@ -0,0 +1,196 @@
+"""
+Warm, compiled inference for the slice PRB LSTM.
+
+Keras' model.predict() builds a data adapter on every call and traces the model on
+the first one. SlicePredictor instead runs a tf.function forward pass with a fixed
+input signature, warmed at startup, or serves the model on the TFLite interpreter or
+ONNX Runtime. The backend is picked with RAPP.predictor_backend.
+
+TensorFlow is only imported when it is needed: a TFLite or ONNX backend with an
+already exported model file runs on the standalone LiteRT / tflite_runtime
+interpreter or ONNX Runtime, without loading TensorFlow or the Keras model.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("keras", "tflite", "onnx")
+MODEL_FILES = {
+    "keras": "best_prb_lstm.keras",
+    "tflite": "best_prb_lstm.tflite",
+    "onnx": "best_prb_lstm.onnx"
+}
+
+
+def needs_export(path, keras_path):
+    # Missing, or exported from an older Keras model than the one next to it
+    if not os.path.exists(path):
+        return True
+    return os.path.exists(keras_path) and os.path.getmtime(keras_path) > os.path.getmtime(path)
+
+
+def replace_atomically(path, write):
+    # Exports go to a temporary file next to path that is renamed over it, so an interpreter
+    # or session still serving the previous file (a TFLite interpreter mmaps it) keeps
+    # reading the old, complete model
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_keras_model(path):
+    import tensorflow as tf
+
+    return tf.keras.models.load_model(path)
+
+
+def tflite_interpreter(path):
+    # Prefer the standalone interpreters, TensorFlow's is a fallback
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path)
+
+
+def export_tflite(model, window, features, path):
+    """Converts the Keras model to a TFLite flatbuffer with a fixed (1, window, features) input."""
+    import tensorflow as tf
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+
+    # With the whole shape fixed and the weights frozen, the LSTM converts to builtin ops
+    # only, so no Flex delegate is needed. The result cannot be resized to larger batches.
+    forward = tf.function(lambda x: model(x, training=False), autograph=False,
+                          input_signature=[tf.TensorSpec([1, window, features], tf.float32)])
+    frozen = convert_variables_to_constants_v2(forward.get_concrete_function())
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([frozen])
+    flatbuffer = converter.convert()
+
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(flatbuffer)
+    replace_atomically(path, write)
+    logger.info(f"Exported TFLite model to {path}")
+    return path
+
+
+def export_onnx(model, window, features, path):
+    """Converts the Keras model to ONNX. Needs tf2onnx."""
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = [tf.TensorSpec([None, window, features], tf.float32, name="input")]
+    replace_atomically(path, lambda tmp_path: tf2onnx.convert.from_keras(model, input_signature=signature, output_path=tmp_path))
+    logger.info(f"Exported ONNX model to {path}")
+    return path
+
+
+class SlicePredictor(object):
+    """
+    model is a loaded Keras model, or None to load it from export_dir only when the backend
+    needs it: always for keras, for tflite and onnx only to export a missing or outdated
+    model file.
+    """
+
+    def __init__(self, model, window, backend="keras", batch_size=256, export_dir="models"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown predictor backend: {backend}")
+
+        self.model = model
+        self.model_dir = export_dir
+        self.window = window
+        self.features = None
+        self.backend = backend
+        self.batch_size = batch_size
+        # Notification inference and /predict batches may call in from different threads,
+        # and a TFLite interpreter must not be invoked concurrently
+        self.lock = threading.Lock()
+
+        path = os.path.join(export_dir, MODEL_FILES[backend])
+        keras_path = os.path.join(export_dir, MODEL_FILES["keras"])
+        if backend == "tflite":
+            if needs_export(path, keras_path):
+                model = self.keras_model()
+                export_tflite(model, window, model.input_shape[-1], path)
+            self._run = self._load_tflite(path)
+        elif backend == "onnx":
+            if needs_export(path, keras_path):
+                model = self.keras_model()
+                export_onnx(model, window, model.input_shape[-1], path)
+            self._run = self._load_onnx(path)
+        else:
+            self._run = self._compile_keras(self.keras_model())
+
+        self.warm()
+
+    def keras_model(self):
+        if self.model is None:
+            self.model = load_keras_model(os.path.join(self.model_dir, MODEL_FILES["keras"]))
+        return self.model
+
+    def _compile_keras(self, model):
+        import tensorflow as tf
+
+        self.features = model.input_shape[-1]
+        forward = tf.function(
+            lambda x: model(x, training=False),
+            autograph=False,
+            input_signature=[tf.TensorSpec([None, self.window, self.features], tf.float32)]
+        )
+        return lambda batch: forward(tf.constant(batch)).numpy()
+
+    def _load_tflite(self, path):
+        interpreter = tflite_interpreter(path)
+        interpreter.allocate_tensors()
+        input_details = interpreter.get_input_details()[0]
+        input_index = input_details["index"]
+        output_index = interpreter.get_output_details()[0]["index"]
+        self.features = int(input_details["shape"][-1])
+
+        def run(batch):
+            # The exported model takes one window per invoke
+            outputs = []
+            for window in batch:
+                interpreter.set_tensor(input_index, window[np.newaxis])
+                interpreter.invoke()
+                outputs.append(interpreter.get_tensor(output_index))
+            return np.concatenate(outputs)
+        return run
+
+    def _load_onnx(self, path):
+        import onnxruntime
+
+        session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.features = int(model_input.shape[-1])
+        return lambda batch: session.run(None, {model_input.name: batch})[0]
+
+    def warm(self):
+        # Pays the tracing / allocation cost at startup instead of in the first notification
+        self._run(np.zeros((1, self.window, self.features), dtype=np.float32))
+        logger.info(f"Slice PRB model ready on the {self.backend} backend")
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        with self.lock:
+            return np.concatenate([
+                self._run(X[start:start + self.batch_size])
+                for start in range(0, len(X), self.batch_size)
+            ])
@@ -1,8 +1,11 @@
+import copy
 import json
 import logging
+import threading
 
 import requests
 
+from http_transport import get_transport
 from sme_client import SMEClient
 
 
@@ -22,6 +25,10 @@ class RAN_NSSMF_CLIENT(object):
         self.invoker_id = sme_config.get("invoker_id")
         self.ran_nssmf_api_name = sme_config.get("ran_nssmf_api_name")
         self.ran_nssmf_resource_name = sme_config.get("ran_nssmf_resource_name")
+
+        # Last known state of each subnet: subnet_id -> (etag, NetworkSliceSubnetDTO)
+        self.subnet_cache = {}
+        self.subnet_cache_lock = threading.Lock()
     
     def get_url_from_sme(self):
         sme_client = SMEClient(
@@ -72,7 +79,7 @@ class RAN_NSSMF_CLIENT(object):
         logger.debug(f"Payload: {payload}")
         
         try:
-            response = requests.post(subscription_url, json=payload, headers=headers, timeout=10)
+            response = get_transport().post(subscription_url, json=payload, headers=headers, timeout=10)
             response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
             
             logger.info(f"Successfully subscribed to notifications. Status: {response.status_code}")
@@ -95,6 +102,8 @@ class RAN_NSSMF_CLIENT(object):
     def get_network_slice_subnet(self, subnet_id: str):
         """
         Retrieves details of a specific Network Slice Subnet from the RAN NSSMF.
+        If an ETag is known for the subnet the request is conditional, and a 304 Not
+        Modified answer is served from the subnet cache.
 
         Args:
             subnet_id (str): The unique identifier of the Network Slice Subnet.
@@ -117,22 +126,45 @@ class RAN_NSSMF_CLIENT(object):
         headers = {
             "Accept": "application/json"
         }
+
+        etag, cached = self.cached_subnet(subnet_id)
+        if etag:
+            headers["If-None-Match"] = etag
         
         logger.info(f"Getting details for Network Slice Subnet ID: {subnet_id} from: {get_subnet_url}")
         
         try:
-            response = requests.get(get_subnet_url, headers=headers, timeout=10)
+            response = get_transport().get(get_subnet_url, headers=headers, timeout=10)
             
             # Check for 404 Not Found specifically, as the simulator returns this for unknown IDs
             if response.status_code == 404:
                 logger.warning(f"Network Slice Subnet with ID '{subnet_id}' not found. Status: {response.status_code}")
+                self.invalidate_subnet(subnet_id)
                 return None
-            
+
+            if response.status_code == 304:
+                if cached is not None:
+                    logger.info(f"Network Slice Subnet ID: {subnet_id} is unchanged, using the cached details.")
+                    return cached
+                # Nothing cached to serve a 304 from, fetch the full representation
+                logger.warning(f"Got 304 for Network Slice Subnet ID: {subnet_id} without cached details, fetching it again.")
+                headers.pop("If-None-Match", None)
+                response = get_transport().get(get_subnet_url, headers=headers, timeout=10)
+                if response.status_code == 404:
+                    logger.warning(f"Network Slice Subnet with ID '{subnet_id}' not found. Status: {response.status_code}")
+                    self.invalidate_subnet(subnet_id)
+                    return None
+                if response.status_code == 304:
+                    logger.error(f"RAN NSSMF answered an unconditional GET for Network Slice Subnet ID: {subnet_id} with 304.")
+                    return None
+
             response.raise_for_status()  # Raise an exception for other HTTP errors (4xx or 5xx)
             
             logger.info(f"Successfully retrieved details for Network Slice Subnet ID: {subnet_id}. Status: {response.status_code}")
             # logger.debug(f"Response Body: {response.json()}") # Uncomment for detailed debugging
-            return response.json() # Return the parsed JSON response (NetworkSliceSubnetDTO)
+            subnet_data = response.json() # Parsed JSON response (NetworkSliceSubnetDTO)
+            self.cache_subnet(subnet_id, response.headers.get("ETag"), subnet_data)
+            return copy.deepcopy(subnet_data)
             
         except requests.exceptions.HTTPError as http_err:
             # This will catch errors from response.raise_for_status() for non-404 codes
@@ -148,14 +180,20 @@ class RAN_NSSMF_CLIENT(object):
             
         return None
 
-    def modify_network_slice_subnet(self, subnet_id: str, new_prb_dl: int):
+    def modify_network_slice_subnet(self, subnet_id: str, new_prb_dl: int, subnet_data: dict = None):
         """
         Modifies the RRU.PrbDl value of an existing Network Slice Subnet in the RAN NSSMF.
-        It first fetches the current subnet data, updates the RRU.PrbDl, and then sends the modification.
+        The RRU.PrbDl is updated in the subnet data and the whole DTO is sent back with a PUT.
+
+        When subnet_data (a NetworkSliceSubnetDTO the caller just fetched) is given it is
+        used instead of fetching the subnet again. If an ETag is known for the subnet the
+        PUT carries If-Match, so a concurrent change is not overwritten: on 412
+        Precondition Failed the subnet is fetched again and the PUT retried once.
 
         Args:
             subnet_id (str): The unique identifier of the Network Slice Subnet to modify.
             new_prb_dl (int): The new RRU.PrbDl value to set.
+            subnet_data (dict, optional): The current NetworkSliceSubnetDTO of the subnet.
 
         Returns:
             requests.Response: The response object from the PUT request if successful,
@@ -167,15 +205,32 @@ class RAN_NSSMF_CLIENT(object):
             logger.error("RAN NSSMF address is not configured. Cannot modify network slice subnet.")
             return None
 
-        logger.info(f"Attempting to modify Network Slice Subnet ID: {subnet_id}. Fetching current data first.")
-        
-        # Fetch the current network slice subnet data
-        current_subnet_data = self.get_network_slice_subnet(subnet_id)
+        if subnet_data is not None:
+            logger.info(f"Attempting to modify Network Slice Subnet ID: {subnet_id} using the already fetched data.")
+            current_subnet_data = copy.deepcopy(subnet_data)
+        else:
+            logger.info(f"Attempting to modify Network Slice Subnet ID: {subnet_id}. Fetching current data first.")
+            # Fetch the current network slice subnet data
+            current_subnet_data = self.get_network_slice_subnet(subnet_id)
         
         if current_subnet_data is None:
             logger.error(f"Failed to retrieve current data for Network Slice Subnet ID: {subnet_id}. Cannot modify.")
             return None
 
+        response = self.put_network_slice_subnet(base_url, subnet_id, current_subnet_data, new_prb_dl)
+        if response is not None and response.status_code == 412:
+            logger.warning(f"Network Slice Subnet ID: {subnet_id} changed since it was read, fetching it again.")
+            self.invalidate_subnet(subnet_id)
+            current_subnet_data = self.get_network_slice_subnet(subnet_id)
+            if current_subnet_data is None:
+                return None
+            response = self.put_network_slice_subnet(base_url, subnet_id, current_subnet_data, new_prb_dl)
+        if response is not None and response.status_code == 412:
+            logger.error(f"Network Slice Subnet ID: {subnet_id} keeps changing, giving up on this modification.")
+            return None
+        return response
+
+    def put_network_slice_subnet(self, base_url, subnet_id, current_subnet_data, new_prb_dl):
         # Ensure base_url does not have a trailing slash
         base_url = base_url.rstrip('/')
         modify_subnet_url = f"{base_url}/3GPPManagement/ProvMnS/v17.0.0/NetworkSliceSubnets/{subnet_id}"
@@ -206,21 +261,36 @@ class RAN_NSSMF_CLIENT(object):
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+
+        etag, _ = self.cached_subnet(subnet_id)
+        if etag:
+            headers["If-Match"] = etag
         
         logger.info(f"Modifying Network Slice Subnet ID: {subnet_id} with new PRB DL: {new_prb_dl}. URL: {modify_subnet_url}")
         logger.debug(f"Payload for modification (based on fetched data): {json.dumps(payload, indent=2)}")
         
         try:
-            response = requests.put(modify_subnet_url, json=payload, headers=headers, timeout=10)
+            response = get_transport().put(modify_subnet_url, json=payload, headers=headers, timeout=10)
             
             # Check for 404 Not Found specifically
             if response.status_code == 404:
                 logger.warning(f"Network Slice Subnet with ID '{subnet_id}' not found for modification during PUT. Status: {response.status_code}")
+                self.invalidate_subnet(subnet_id)
                 return None
+
+            if response.status_code == 412:
+                # Handled by modify_network_slice_subnet
+                return response
             
             response.raise_for_status()  # Raise an exception for other HTTP errors (4xx or 5xx)
             
             logger.info(f"Successfully sent modification request for Network Slice Subnet ID: {subnet_id}. Status: {response.status_code}")
+            # The PUT body is the new state; without a new ETag the cached one is stale
+            new_etag = response.headers.get("ETag")
+            if new_etag:
+                self.cache_subnet(subnet_id, new_etag, payload)
+            else:
+                self.invalidate_subnet(subnet_id)
             return response
             
         except requests.exceptions.HTTPError as http_err:
@@ -233,4 +303,25 @@ class RAN_NSSMF_CLIENT(object):
             logger.error(f"An unexpected error occurred while modifying network slice subnet '{subnet_id}': {req_err}")
             
         return None
-            
\ No newline at end of file
+            
+
+    def cached_subnet(self, subnet_id):
+        # Returns (etag, copy of the DTO), or (None, None) if the subnet is not cached
+        with self.subnet_cache_lock:
+            entry = self.subnet_cache.get(subnet_id)
+        if entry is None:
+            return None, None
+        etag, subnet_data = entry
+        return etag, copy.deepcopy(subnet_data)
+
+    def cache_subnet(self, subnet_id, etag, subnet_data):
+        # Only versioned state is kept, it is never served without revalidation
+        if not etag:
+            self.invalidate_subnet(subnet_id)
+            return
+        with self.subnet_cache_lock:
+            self.subnet_cache[subnet_id] = (etag, copy.deepcopy(subnet_data))
+
+    def invalidate_subnet(self, subnet_id):
+        with self.subnet_cache_lock:
+            self.subnet_cache.pop(subnet_id, None)
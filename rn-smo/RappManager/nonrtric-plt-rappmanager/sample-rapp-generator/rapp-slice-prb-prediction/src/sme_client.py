@@ -9,6 +9,7 @@ and connect to available services without hardcoding endpoint information.
 import requests
 import logging
 import json
+from http_transport import get_transport
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -76,7 +77,7 @@ class SMEClient:
 
         try:
             # Make HTTP GET request to SME discovery endpoint
-            response = requests.get(full_url, headers={"Content-Type": "application/json"})
+            response = get_transport().get(full_url, headers={"Content-Type": "application/json"})
             
             if response.status_code == 200:
                 logger.info("Service discovery successful.")
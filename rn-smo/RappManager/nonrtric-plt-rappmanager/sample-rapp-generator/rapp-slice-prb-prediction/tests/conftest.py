@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The rApp modules import each other by module name, as they do when run from src;
+# the data generator is a script in the rApp directory
+RAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [os.path.join(RAPP_DIR, "src"), RAPP_DIR]
@@ -0,0 +1,52 @@
+"""Test the line protocol and arguments of the PM data generator."""
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_generator
+from data_generator import MEAS_TYPES, escape_tag, generate_nssi_pm, make_nssis, to_line_protocol
+
+
+def test_escape_tag():
+    """Commas, equals signs and spaces are escaped in tag values."""
+    assert escape_tag("slice a=1,b") == "slice\\ a\\=1\\,b"
+
+
+def test_to_line_protocol():
+    """One line per row, with escaped tags, an integer RRC count and seconds."""
+    df = pd.DataFrame({
+        "time": pd.to_datetime(["2025-01-01 00:00:00", "2025-01-01 00:15:00"]),
+        "measObjLdn": ["nssi 1", "nssi=2"],
+        "sliceType": "embb",
+        MEAS_TYPES[0]: [12.5, 40.0],
+        MEAS_TYPES[1]: [100.0, 2.25],
+        MEAS_TYPES[2]: np.array([3, 4], dtype=np.int64),
+    })
+    assert to_line_protocol(df, "slice pm,1") == [
+        "slice\\ pm\\,1,measObjLdn=nssi\\ 1,sliceType=embb "
+        "RRU.PrbDl.SNSSAI=12.5,DRB.PdcpSduVolumeDL.SNSSAI=100.0,RRC.ConnEstabSucc.Cause=3i 1735689600",
+        "slice\\ pm\\,1,measObjLdn=nssi\\=2,sliceType=embb "
+        "RRU.PrbDl.SNSSAI=40.0,DRB.PdcpSduVolumeDL.SNSSAI=2.25,RRC.ConnEstabSucc.Cause=4i 1735690500",
+    ]
+
+
+def test_generated_data_to_line_protocol():
+    """Every generated row becomes one line with the three fields."""
+    times = pd.date_range("2025-01-01", periods=8, freq="15min")
+    nssis = make_nssis(8)
+    df = generate_nssi_pm(times, nssis, np.random.default_rng(0))
+    lines = to_line_protocol(df, "ran_pm")
+    assert len(lines) == len(times) * len(nssis)
+    assert all(len(line.split(" ")) == 3 and line.split(" ")[1].count("=") == 3 for line in lines)
+
+
+def test_parquet_export_needs_pyarrow(monkeypatch, capsys):
+    """Without pyarrow a Parquet export fails before anything is generated."""
+    monkeypatch.setattr(sys, "argv", ["data_generator.py", "--no_influx", "--output", "out"])
+    monkeypatch.setattr(data_generator.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(SystemExit):
+        data_generator.parse_args()
+    assert "pyarrow" in capsys.readouterr().err
@@ -0,0 +1,105 @@
+"""Test the Flux query of the data module."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from data import DATABASE, format_time
+
+DB_CONFIG = {
+    "address": "http://influxdb:8086",
+    "org": "est",
+    "bucket": "pm-bucket",
+    "measurements": "ran_pm",
+    "field_names": ["prb_dl", "data_dl"],
+    "tag_slice_type": "slice_type",
+    "tag_nssi_id": "nssi_id",
+    "window_size": "10",
+    "reporting_interval": 60,
+    "range_margin": 1.5,
+}
+
+
+@pytest.fixture
+def make_database(tmp_path, monkeypatch):
+    # DATABASE reads config.json from the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("INFLUX_TOKEN", raising=False)
+
+    def make_database(**db_config):
+        (tmp_path / "config.json").write_text(json.dumps({"DB": dict(DB_CONFIG, **db_config)}))
+        return DATABASE()
+    return make_database
+
+
+def flux_range(query):
+    return next(line.strip() for line in query.splitlines() if "range(" in line)
+
+
+def test_format_time():
+    """Times are written as UTC RFC3339, naive times are taken as UTC."""
+    assert format_time(pd.Timestamp("2025-01-01 12:00:00")) == "2025-01-01T12:00:00.000000Z"
+    assert format_time(pd.Timestamp("2025-01-01 13:00:00+01:00")) == "2025-01-01T12:00:00.000000Z"
+
+
+def test_default_range_covers_one_window(make_database):
+    """Without time_range the range is reporting_interval x window_size x range_margin."""
+    database = make_database()
+    assert database.lookback_seconds() == 900
+    assert flux_range(database.build_query()) == "|> range(start: -900s)"
+
+
+@pytest.mark.parametrize("time_range, expected", [
+    ("-2h", "|> range(start: -2h)"),
+    ("0", "|> range(start: -900s)"),
+    ("-0", "|> range(start: -900s)"),
+])
+def test_time_range(make_database, time_range, expected):
+    """A configured time_range is used, unless it is zero."""
+    assert flux_range(make_database(time_range=time_range).build_query()) == expected
+
+
+def test_start_and_stop(make_database):
+    """start and stop bound the range as UTC time literals."""
+    database = make_database(time_range="-2h")
+    start = pd.Timestamp("2025-01-01 10:00:00", tz="UTC")
+    stop = pd.Timestamp("2025-01-01 12:00:00", tz="UTC")
+    assert flux_range(database.build_query(start=start, stop=stop)) == \
+        "|> range(start: 2025-01-01T10:00:00.000000Z, stop: 2025-01-01T12:00:00.000000Z)"
+
+
+def test_stop_without_start(make_database):
+    """With only stop, the range reaches one lookback before it."""
+    stop = pd.Timestamp("2025-01-01 12:00:00", tz="UTC")
+    assert flux_range(make_database().build_query(stop=stop)) == \
+        "|> range(start: 2025-01-01T11:45:00.000000Z, stop: 2025-01-01T12:00:00.000000Z)"
+
+
+def test_query_pivots_and_tails_per_series(make_database):
+    """The fields are filtered and pivoted, and tail keeps the latest window per series."""
+    lines = [line.strip() for line in make_database().build_query().splitlines() if line.strip()]
+    assert lines[0] == 'import "influxdata/influxdb/schema"'
+    assert lines[1:] == [
+        'from(bucket: "pm-bucket")',
+        '|> range(start: -900s)',
+        '|> filter(fn: (r) => r["_measurement"] == "ran_pm")',
+        '|> filter(fn: (r) => r["_field"] == "prb_dl" or r["_field"] == "data_dl")',
+        '|> schema.fieldsAsCols()',
+        '|> group(columns: ["slice_type", "nssi_id"])',
+        '|> sort(columns: ["_time"])',
+        '|> tail(n: 10)',
+        '|> keep(columns: ["_time", "slice_type", "nssi_id", "prb_dl", "data_dl"])',
+        '|> group()',
+    ]
+
+
+def test_query_for_keys(make_database):
+    """keys limits the query to those slice type and NSSI pairs."""
+    query = make_database().build_query(keys=[("eMBB", "nssi-1"), ("URLLC", 'nssi "2"')])
+    lines = [line.strip() for line in query.splitlines()]
+    assert lines[lines.index('|> filter(fn: (r) => r["_field"] == "prb_dl" or r["_field"] == "data_dl")') + 1] == (
+        '|> filter(fn: (r) => (r["slice_type"] == "eMBB" and r["nssi_id"] == "nssi-1")'
+        ' or (r["slice_type"] == "URLLC" and r["nssi_id"] == "nssi \\"2\\""))'
+    )
+    assert flux_range(query) == "|> range(start: -900s)"
@@ -0,0 +1,110 @@
+"""Test the rolling feature buffers."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+from feature_cache import FeatureCache, RollingWindow
+
+WINDOW = 4
+SLICE_TYPES = ["eMBB", "URLLC"]
+NSSI_IDS = ["nssi-1", "nssi-2"]
+
+
+def fitted_scaler(column):
+    return MinMaxScaler().fit(pd.DataFrame({column: [0.0, 100.0]}))
+
+
+@pytest.fixture
+def cache():
+    enc = OneHotEncoder(sparse_output=False).fit(np.array(SLICE_TYPES).reshape(-1, 1))
+    nssi_enc = OneHotEncoder(sparse_output=False).fit(np.array(NSSI_IDS).reshape(-1, 1))
+    scalers = {"prb": fitted_scaler("prb_dl"), "data": fitted_scaler("data_dl"), "rrc": fitted_scaler("rrc_succ")}
+    return FeatureCache(enc, nssi_enc, scalers, window=WINDOW)
+
+
+def kpi_rows(slice_type, nssi_id, times):
+    values = np.arange(len(times), dtype=float)
+    return pd.DataFrame({
+        "slice_type": slice_type, "nssi_id": nssi_id, "time": pd.to_datetime(times, unit="s", utc=True),
+        "prb_dl": values, "data_dl": values * 2, "rrc_succ": values * 3
+    })
+
+
+def test_rolling_window_keeps_latest_rows():
+    """latest() returns the last window rows in order, as a view of the buffer."""
+    rolling = RollingWindow(3, 1)
+    rolling.append(np.array([[1.0], [2.0]]), 2)
+    assert not rolling.full
+    assert rolling.latest()[:, 0].tolist() == [0.0, 1.0, 2.0]
+
+    for value in (3.0, 4.0, 5.0):
+        rolling.append(np.array([[value]]), value)
+    assert rolling.full
+    assert rolling.latest()[:, 0].tolist() == [3.0, 4.0, 5.0]
+    assert rolling.last_time == 5.0
+    assert np.shares_memory(rolling.latest(), rolling.buffer)
+
+
+def test_rolling_window_append_longer_than_window():
+    """Appending more rows than the window keeps only the last window rows."""
+    rolling = RollingWindow(3, 1)
+    rolling.append(np.arange(10, dtype=np.float32).reshape(-1, 1), 9)
+    assert rolling.full
+    assert rolling.latest()[:, 0].tolist() == [7.0, 8.0, 9.0]
+
+
+def test_update_appends_only_new_rows(cache):
+    """Rows at or before a series' last buffered time are skipped."""
+    assert cache.resume_time() is None
+    assert cache.update(kpi_rows("eMBB", "nssi-1", range(0, 3))) == 3
+    assert cache.resume_time() == pd.Timestamp(2, unit="s", tz="UTC")
+
+    # Overlapping read: only the points after t=2 are new
+    assert cache.update(kpi_rows("eMBB", "nssi-1", range(1, 6))) == 3
+    assert cache.update(kpi_rows("eMBB", "nssi-1", range(1, 6))) == 0
+    assert cache.resume_time() == pd.Timestamp(5, unit="s", tz="UTC")
+
+
+def test_latest_windows_match_window_features(cache):
+    """The buffered windows equal the features built from the last window rows."""
+    first = kpi_rows("eMBB", "nssi-1", range(0, 6))
+    second = kpi_rows("URLLC", "nssi-2", range(0, 2))
+    cache.update(pd.concat([first.iloc[:3], second]))
+    cache.update(first.iloc[3:])
+
+    keys, windows = cache.latest_windows()
+    # URLLC/nssi-2 has fewer points than the window and is skipped
+    assert keys == [("eMBB", "nssi-1")]
+    assert windows.shape == (1, WINDOW, len(SLICE_TYPES) + len(NSSI_IDS) + 3)
+    assert windows.dtype == np.float32
+    np.testing.assert_allclose(windows[0], cache.window_features(("eMBB", "nssi-1"), first))
+
+
+def test_resume_time_follows_active_series(cache):
+    """A series that stopped reporting does not hold the read window open."""
+    cache.update(pd.concat([kpi_rows("eMBB", "nssi-1", range(0, 3)), kpi_rows("URLLC", "nssi-2", range(0, 3))]))
+    cache.update(kpi_rows("eMBB", "nssi-1", range(3, 8)))
+    assert cache.active == {("eMBB", "nssi-1")}
+    assert cache.resume_time() == pd.Timestamp(7, unit="s", tz="UTC")
+
+
+def test_keys_to_backfill(cache):
+    """Series without a buffer or with a gap before the read start need their history."""
+    cache.update(pd.concat([kpi_rows("eMBB", "nssi-1", range(0, 3)), kpi_rows("URLLC", "nssi-2", range(0, 3))]))
+    cache.update(kpi_rows("eMBB", "nssi-1", range(3, 8)))
+
+    start = cache.resume_time()
+    df = pd.concat([
+        kpi_rows("eMBB", "nssi-1", range(7, 9)),
+        kpi_rows("URLLC", "nssi-2", range(7, 9)),
+        kpi_rows("eMBB", "nssi-2", range(7, 9)),
+    ])
+    assert cache.keys_to_backfill(df, start) == [("URLLC", "nssi-2"), ("eMBB", "nssi-2")]
+
+
+def test_window_features_needs_a_full_window(cache):
+    """window_features raises ValueError for fewer rows than the window."""
+    with pytest.raises(ValueError):
+        cache.window_features(("eMBB", "nssi-1"), kpi_rows("eMBB", "nssi-1", range(0, WINDOW - 1)))
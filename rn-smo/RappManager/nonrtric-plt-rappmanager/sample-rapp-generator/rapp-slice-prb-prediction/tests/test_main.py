@@ -0,0 +1,139 @@
+"""Test the inference run of the slice rApp."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+import main
+from feature_cache import FeatureCache
+from main import SlicePRBPrediction
+
+WINDOW = 4
+
+
+class PmDatabase(object):
+    # Serves the KPI points like the windowed Flux query: from start on, of keys only, tail per series
+    def __init__(self):
+        self.points = []
+        self.reads = []
+
+    def report(self, slice_type, nssi_id, times):
+        for t in times:
+            self.points.append({
+                "_time": pd.Timestamp(t, unit="s", tz="UTC"), "sliceType": slice_type, "measObjLdn": nssi_id,
+                "RRU.PrbDl.SNSSAI": float(t), "DRB.PdcpSduVolumeDL.SNSSAI": 1.0, "RRC.ConnEstabSucc.Cause": 1.0
+            })
+
+    def read_data(self, start=None, stop=None, keys=None):
+        self.reads.append((start, keys))
+        df = pd.DataFrame(self.points)
+        if start is not None:
+            df = df[df["_time"] >= start]
+        if keys is not None:
+            df = df[[(row.sliceType, row.measObjLdn) in keys for row in df.itertuples()]]
+        return df.groupby(["sliceType", "measObjLdn"]).tail(WINDOW)
+
+
+class StaticModel(object):
+    def __init__(self, feature_cache):
+        self.feature_cache = feature_cache
+
+    def predict(self, X):
+        return np.zeros(len(X))
+
+
+@pytest.fixture
+def rapp(monkeypatch):
+    # The inference state only, without the config, InfluxDB and NSSMF setup of __init__
+    enc = OneHotEncoder(sparse_output=False).fit(np.array([["eMBB"], ["URLLC"]]))
+    nssi_enc = OneHotEncoder(sparse_output=False).fit(np.array([["nssi-1"], ["nssi-2"]]))
+    scalers = {
+        name: MinMaxScaler().fit(pd.DataFrame({column: [0.0, 100.0]}))
+        for name, column in (("prb", "prb_dl"), ("data", "data_dl"), ("rrc", "rrc_succ"))
+    }
+    rapp = SlicePRBPrediction.__new__(SlicePRBPrediction)
+    rapp.db = PmDatabase()
+    rapp.model = StaticModel(FeatureCache(enc, nssi_enc, scalers, window=WINDOW))
+    rapp.nssmf_max_workers = 1
+    monkeypatch.setattr(rapp, "update_slice", lambda nssi, y_pred: None)
+    return rapp
+
+
+def test_new_slice_is_backfilled_after_warm_up(rapp):
+    """A slice first seen in an incremental read gets its whole window at once."""
+    rapp.db.report("eMBB", "nssi-1", range(0, 6))
+    rapp.inference()
+
+    # nssi-2 reported before the resume time, only its last point is newer
+    rapp.db.report("URLLC", "nssi-2", range(0, 7))
+    rapp.db.report("eMBB", "nssi-1", [6])
+    rapp.inference()
+
+    start = pd.Timestamp(5, unit="s", tz="UTC")
+    assert rapp.db.reads[1:] == [(start, None), (None, [("URLLC", "nssi-2")])]
+    keys, windows = rapp.model.feature_cache.latest_windows()
+    assert keys == [("URLLC", "nssi-2"), ("eMBB", "nssi-1")]
+    assert rapp.model.feature_cache.windows[("URLLC", "nssi-2")].last_time == pd.Timestamp(6, unit="s", tz="UTC")
+
+
+def test_known_slices_are_not_read_again(rapp):
+    """Without new or returning slices there is only the incremental read."""
+    rapp.db.report("eMBB", "nssi-1", range(0, 6))
+    rapp.inference()
+    rapp.db.report("eMBB", "nssi-1", [6, 7])
+    rapp.inference()
+
+    assert len(rapp.db.reads) == 2
+    assert rapp.model.feature_cache.windows[("eMBB", "nssi-1")].last_time == pd.Timestamp(7, unit="s", tz="UTC")
+
+
+def instance(rows, slice_type="eMBB", nssi_id="nssi-1"):
+    return {"slice_type": slice_type, "nssi_id": nssi_id, "rows": rows}
+
+
+def kpi(prb_dl=1.0, data_dl=2.0, rrc_succ=3.0):
+    return {"prb_dl": prb_dl, "data_dl": data_dl, "rrc_succ": rrc_succ}
+
+
+def test_prepare_instances(rapp):
+    """Each instance becomes the window of its last rows."""
+    model, keys, X = rapp.prepare_instances([instance([kpi()] * (WINDOW + 1))])
+    assert model is rapp.model
+    assert keys == [("eMBB", "nssi-1")]
+    assert X.shape == (1, WINDOW, 7)
+
+
+@pytest.mark.parametrize("rows, message", [
+    ([kpi()] * (WINDOW - 1) + [{"prb_dl": 1.0, "data_dl": 2.0}], "rows without rrc_succ"),
+    ([kpi()] * (WINDOW - 1) + [kpi(prb_dl=None)], "finite"),
+    ([kpi()] * (WINDOW - 1) + [kpi(data_dl="a lot")], "could not convert"),
+    ([kpi()] * WINDOW + [[1.0, 2.0, 3.0]], "list of objects"),
+    ({"prb_dl": 1.0}, "list of objects"),
+])
+def test_prepare_instances_rejects_bad_rows(rapp, rows, message):
+    """Missing or non-numeric KPI values are rejected instead of predicted as NaN."""
+    with pytest.raises(ValueError, match=message):
+        rapp.prepare_instances([instance(rows)])
+
+
+@pytest.mark.parametrize("slice_type, nssi_id", [("mMTC", "nssi-1"), ("eMBB", "nssi-9"), (["eMBB"], "nssi-1")])
+def test_prepare_instances_rejects_unknown_slices(rapp, slice_type, nssi_id):
+    """Values the encoders were not fitted on are rejected and leave no trace in the cache."""
+    with pytest.raises(ValueError, match="Unknown slice type or NSSI"):
+        rapp.prepare_instances([instance([kpi()] * WINDOW, slice_type, nssi_id)])
+    assert len(rapp.model.feature_cache.slice_onehot) == 2
+    assert len(rapp.model.feature_cache.nssi_onehot) == 2
+
+
+def test_predict_answers_bad_rows_with_bad_request(rapp, monkeypatch):
+    """/predict returns 400 with the reason for an instance with a missing KPI."""
+    rapp.ready = main.Event()
+    rapp.ready.set()
+    monkeypatch.setattr(main, "rapp_instance", rapp)
+    monkeypatch.setattr(main, "predict_batcher", object())
+
+    rows = [kpi()] * (WINDOW - 1) + [{"prb_dl": 1.0, "data_dl": 2.0}]
+    response = main.app.test_client().post("/predict", json={"instances": [instance(rows)]})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Invalid instance 0: rows without rrc_succ"
@@ -0,0 +1,126 @@
+"""Test the dynamic batching of /predict requests."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+class RecordingModel(object):
+    # Predicts the first feature of each window's first step, and records the calls
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def __call__(self, key, X):
+        self.calls.append((key, len(X)))
+        if self.error is not None:
+            raise self.error
+        return X[:, 0, 0]
+
+
+def windows(*values):
+    return np.array(values, dtype=np.float32).reshape(-1, 1, 1)
+
+
+@pytest.fixture
+def model():
+    return RecordingModel()
+
+
+@pytest.fixture
+def batcher(model):
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait=0.01)
+    yield batcher
+    batcher.stop()
+
+
+def test_requests_for_one_key_share_a_call(batcher, model):
+    """Queued requests for the same key run as one call, each gets its own predictions."""
+    first = batcher.submit(windows(1, 2), key="v1")
+    second = batcher.submit(windows(3), key="v1")
+    batcher.start()
+
+    assert first.result(5).tolist() == [1, 2]
+    assert second.result(5).tolist() == [3]
+    assert model.calls == [("v1", 3)]
+
+
+def test_requests_are_only_batched_with_the_same_key(batcher, model):
+    """A request for another key ends the batch, so each call sees one model version."""
+    futures = [
+        batcher.submit(windows(1), key="v1"),
+        batcher.submit(windows(2), key="v1"),
+        batcher.submit(windows(3), key="v2"),
+        batcher.submit(windows(4), key="v1"),
+    ]
+    batcher.start()
+
+    assert [future.result(5).tolist() for future in futures] == [[1], [2], [3], [4]]
+    assert model.calls == [("v1", 2), ("v2", 1), ("v1", 1)]
+
+
+def test_batches_are_capped_at_max_batch_size(batcher, model):
+    """Requests that would exceed max_batch_size wait for the next call."""
+    futures = [batcher.submit(windows(i, i), key="v1") for i in range(3)]
+    batcher.start()
+
+    assert [future.result(5).tolist() for future in futures] == [[0, 0], [1, 1], [2, 2]]
+    assert model.calls == [("v1", 4), ("v1", 2)]
+    assert batcher.metrics()["batches"] == 2
+
+
+def test_oversized_request_runs_alone(batcher, model):
+    """A request larger than max_batch_size is not split."""
+    future = batcher.submit(windows(*range(6)), key="v1")
+    batcher.start()
+
+    assert future.result(5).tolist() == list(range(6))
+    assert model.calls == [("v1", 6)]
+
+
+def test_model_error_fails_the_batch():
+    """An exception of the model call is raised by every Future of the batch."""
+    batcher = MicroBatcher(RecordingModel(error=RuntimeError("model failed")), max_wait=0.01)
+    futures = [batcher.submit(windows(1)), batcher.submit(windows(2))]
+    batcher.start()
+    try:
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model failed"):
+                future.result(5)
+        assert batcher.metrics()["failures"] == 1
+    finally:
+        batcher.stop()
+
+
+def test_stop_cancels_pending_requests():
+    """At stop the running batch completes, queued requests are cancelled and new ones refused."""
+    started, release = threading.Event(), threading.Event()
+
+    def predict(key, X):
+        started.set()
+        release.wait(5)
+        return X[:, 0, 0]
+
+    batcher = MicroBatcher(predict, max_wait=0)
+    running = batcher.submit(windows(1))
+    batcher.start()
+    assert started.wait(5)
+    queued = batcher.submit(windows(2))
+
+    stopper = threading.Thread(target=batcher.stop)
+    stopper.start()
+    # Future.cancel does not wake concurrent.futures.wait, so poll
+    deadline = time.monotonic() + 5
+    while not queued.cancelled() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert queued.cancelled()
+    with pytest.raises(RuntimeError):
+        batcher.submit(windows(3))
+
+    release.set()
+    stopper.join(5)
+    assert running.result(5).tolist() == [1]
@@ -0,0 +1,145 @@
+"""Test the conditional requests of the RAN NSSMF client."""
+
+import json
+
+import pytest
+import requests
+
+import ran_nssmf_client
+from ran_nssmf_client import RAN_NSSMF_CLIENT
+
+SUBNET_ID = "subnet-1"
+SUBNET_URL = f"http://nssmf/3GPPManagement/ProvMnS/v17.0.0/NetworkSliceSubnets/{SUBNET_ID}"
+
+
+def subnet(prb_dl):
+    return {"id": SUBNET_ID, "attributes": {"sliceProfileList": [{"ransliceSubnetProfile": {"RRU.PrbDl": prb_dl}}]}}
+
+
+def response(status_code, body=None, etag=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = SUBNET_URL
+    response._content = json.dumps(body).encode() if body is not None else b""
+    if etag:
+        response.headers["ETag"] = etag
+    return response
+
+
+class ScriptedTransport(object):
+    # Answers the requests with the scripted responses in order and records them
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, dict(kwargs.get("headers") or {}), kwargs.get("json")))
+        return self.responses.pop(0)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The client reads config.json from the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.json").write_text(json.dumps({"RAPP": {"ran_nssmf_address": "http://nssmf/"}}))
+    return RAN_NSSMF_CLIENT()
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    def install(*responses):
+        transport = ScriptedTransport(*responses)
+        monkeypatch.setattr(ran_nssmf_client, "get_transport", lambda: transport)
+        return transport
+    return install
+
+
+def test_not_modified_is_served_from_cache(client, transport):
+    """A known ETag makes the GET conditional, a 304 returns the cached subnet."""
+    http = transport(response(200, subnet(10), etag='"v1"'), response(304))
+    assert client.get_network_slice_subnet(SUBNET_ID) == subnet(10)
+
+    cached = client.get_network_slice_subnet(SUBNET_ID)
+    assert cached == subnet(10)
+    assert "If-None-Match" not in http.requests[0][2]
+    assert http.requests[1][2]["If-None-Match"] == '"v1"'
+
+    # The caller gets a copy, changing it does not change the cache
+    cached["attributes"]["sliceProfileList"][0]["ransliceSubnetProfile"]["RRU.PrbDl"] = 99
+    assert client.cached_subnet(SUBNET_ID) == ('"v1"', subnet(10))
+
+
+def test_not_modified_without_cache_entry_fetches_again(client, transport):
+    """A 304 with nothing cached is followed by an unconditional GET."""
+    http = transport(response(304), response(200, subnet(10), etag='"v1"'))
+    assert client.get_network_slice_subnet(SUBNET_ID) == subnet(10)
+    assert len(http.requests) == 2
+    assert "If-None-Match" not in http.requests[1][2]
+
+
+def test_not_modified_to_unconditional_get_fails(client, transport):
+    """A 304 answer to the unconditional GET gives up instead of parsing an empty body."""
+    transport(response(304), response(304))
+    assert client.get_network_slice_subnet(SUBNET_ID) is None
+
+
+def test_not_found_invalidates_cache(client, transport):
+    """A 404 drops the cached subnet, the next GET is unconditional."""
+    http = transport(response(200, subnet(10), etag='"v1"'), response(404), response(200, subnet(20), etag='"v2"'))
+    client.get_network_slice_subnet(SUBNET_ID)
+    assert client.get_network_slice_subnet(SUBNET_ID) is None
+    assert client.cached_subnet(SUBNET_ID) == (None, None)
+    assert client.get_network_slice_subnet(SUBNET_ID) == subnet(20)
+    assert "If-None-Match" not in http.requests[2][2]
+
+
+def test_response_without_etag_is_not_cached(client, transport):
+    """Subnets without an ETag are never served from the cache."""
+    http = transport(response(200, subnet(10)), response(200, subnet(10)))
+    client.get_network_slice_subnet(SUBNET_ID)
+    client.get_network_slice_subnet(SUBNET_ID)
+    assert "If-None-Match" not in http.requests[1][2]
+
+
+def test_modify_sends_if_match_and_caches_new_state(client, transport):
+    """The PUT carries If-Match, and its body is cached under the returned ETag."""
+    http = transport(response(200, subnet(10), etag='"v1"'), response(200, etag='"v2"'), response(304))
+    assert client.modify_network_slice_subnet(SUBNET_ID, 42).status_code == 200
+
+    method, url, headers, body = http.requests[1]
+    assert (method, url) == ("PUT", SUBNET_URL)
+    assert headers["If-Match"] == '"v1"'
+    assert body == subnet(42)
+    assert client.get_network_slice_subnet(SUBNET_ID) == subnet(42)
+    assert http.requests[2][2]["If-None-Match"] == '"v2"'
+
+
+def test_modify_retries_once_on_precondition_failed(client, transport):
+    """On 412 the subnet is fetched again and the PUT retried with the new ETag."""
+    http = transport(
+        response(412),
+        response(200, subnet(15), etag='"v3"'),
+        response(200, etag='"v4"'),
+    )
+    client.cache_subnet(SUBNET_ID, '"v1"', subnet(10))
+    assert client.modify_network_slice_subnet(SUBNET_ID, 42, subnet_data=subnet(10)).status_code == 200
+
+    assert [request[0] for request in http.requests] == ["PUT", "GET", "PUT"]
+    assert http.requests[0][2]["If-Match"] == '"v1"'
+    # The refetch is unconditional, the cache was invalidated by the 412
+    assert "If-None-Match" not in http.requests[1][2]
+    assert http.requests[2][2]["If-Match"] == '"v3"'
+    assert http.requests[2][3] == subnet(42)
+
+
+def test_modify_gives_up_after_second_precondition_failed(client, transport):
+    """A subnet that changes again between the refetch and the retry is left alone."""
+    transport(response(412), response(200, subnet(15), etag='"v3"'), response(412))
+    client.cache_subnet(SUBNET_ID, '"v1"', subnet(10))
+    assert client.modify_network_slice_subnet(SUBNET_ID, 42, subnet_data=subnet(10)) is None